@@ -78,6 +78,19 @@ api_opts = [
                       "the service, this option should be False; note, you "
                       "will want to change public API endpoint to represent "
                       "SSL termination URL with 'public_endpoint' option.")),
+    cfg.BoolOpt('enable_conditional_get',
+                default=True,
+                help=("Add ETags to the boards, plugins and fleets resources "
+                      "and answer If-None-Match requests with 304 when "
+                      "they did not change.")),
+    cfg.IntOpt('etag_cache_size',
+               default=1000,
+               help=("Maximum number of serialized responses kept to answer "
+                     "unchanged GET requests. 0 disables the cache.")),
+    cfg.IntOpt('bulk_batch_size',
+               default=500,
+               help=("Maximum number of boards sent to the conductor in a "
+                     "single call by the bulk provisioning endpoint.")),
 ]
 
 opt_group = cfg.OptGroup(name='api',
@@ -128,6 +141,8 @@ def setup_app(config=None):
         **app_conf
     )
 
+    app = middleware.ConditionalGetMiddleware(app)
+
     if CONF.auth_strategy == "keystone":
         app = auth_token.AuthTokenMiddleware(
             app, dict(cfg.CONF),
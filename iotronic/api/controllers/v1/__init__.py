@@ -25,6 +25,7 @@ from wsme import types as wtypes
 
 from iotronic.api.controllers import base
 from iotronic.api.controllers import link
+from iotronic.api.controllers.v1 import asyncoperation
 from iotronic.api.controllers.v1 import board
 from iotronic.api.controllers.v1 import delegation
 from iotronic.api.controllers.v1 import enabledwebservice
@@ -89,6 +90,9 @@ class V1(base.APIBase):
     webservices = [link.Link]
     """Links to the webservices resource"""
 
+    operations = [link.Link]
+    """Links to the asynchronous operations resource"""
+
     @staticmethod
     def convert():
         v1 = V1()
@@ -171,6 +175,13 @@ class V1(base.APIBase):
                                               'webservices', '',
                                               bookmark=True)]
 
+        v1.operations = [link.Link.make_link('self', pecan.request.public_url,
+                                             'operations', ''),
+                         link.Link.make_link('bookmark',
+                                             pecan.request.public_url,
+                                             'operations', '',
+                                             bookmark=True)]
+
         return v1
 
 
@@ -187,6 +198,7 @@ class Controller(rest.RestController):
     roles = role.RolesController()
     delegations = delegation.DelegationsController()
     webservices = webservice.WebservicesController()
+    operations = asyncoperation.OperationsController()
 
     @expose.expose(V1)
     def get(self):
@@ -0,0 +1,113 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+from iotronic.api.controllers import base
+from iotronic.api.controllers import link
+from iotronic.api.controllers.v1 import types
+from iotronic.api import expose
+from iotronic.common import exception
+from iotronic import objects
+
+import pecan
+from pecan import rest
+import wsme
+from wsme import types as wtypes
+
+
+class AsyncOperation(base.APIBase):
+    """API representation of an asynchronous operation.
+
+    """
+    uuid = types.uuid
+    name = wsme.wsattr(wtypes.text)
+    target = types.uuid
+    status = wsme.wsattr(wtypes.text)
+    result = types.jsontype
+
+    def __init__(self, **kwargs):
+        self.fields = []
+        fields = list(objects.AsyncOperation.fields)
+        for k in fields:
+            # Skip fields we do not expose.
+            if not hasattr(self, k):
+                continue
+            self.fields.append(k)
+            setattr(self, k, kwargs.get(k, wtypes.Unset))
+
+    @classmethod
+    def convert(cls, rpc_operation):
+        return AsyncOperation(**rpc_operation.as_dict())
+
+
+def get_rpc_operation(operation_uuid):
+    """Get an operation of the user of the request.
+
+    :param operation_uuid: the UUID of an operation.
+    :returns: The RPC AsyncOperation.
+    :raises: AsyncOperationNotFound if the operation is not found or it
+             belongs to another user.
+    """
+    context = pecan.request.context
+    operation = objects.AsyncOperation.get_by_uuid(context, operation_uuid)
+    if operation.owner != context.user_id:
+        raise exception.AsyncOperationNotFound(operation=operation_uuid)
+    return operation
+
+
+def prefer_async():
+    """Whether the client asked for an asynchronous response.
+
+    Clients opt in sending the ``Prefer: respond-async`` header.
+    """
+    prefer = pecan.request.headers.get('Prefer', '')
+    return 'respond-async' in [p.strip() for p in prefer.split(',')]
+
+
+def run_async(method, target, **kwargs):
+    """Run a conductor method in background and return its operation.
+
+    The conductor runs the method on its worker pool and stores its status
+    and result in the operation, which is polled on /v1/operations.
+
+    :param method: the name of the conductor method.
+    :param target: the uuid of the resource the method works on.
+    :param kwargs: the arguments of the method.
+    :returns: a 202 response with the :class:`AsyncOperation`.
+    """
+    context = pecan.request.context
+    operation = objects.AsyncOperation(context)
+    operation.name = method
+    operation.target = target
+    operation.owner = context.user_id
+    operation.project = context.project_id
+    operation.create()
+
+    pecan.request.rpcapi.run_async(context, operation.uuid, method, kwargs)
+
+    pecan.response.headers['Location'] = link.build_url(
+        'operations', operation.uuid)
+    return wsme.api.Response(AsyncOperation.convert(operation),
+                             status_code=202, return_type=AsyncOperation)
+
+
+class OperationsController(rest.RestController):
+    """REST controller for the asynchronous operations."""
+
+    @expose.expose(AsyncOperation, types.uuid)
+    def get_one(self, operation_uuid):
+        """Retrieve the status and the result of an operation.
+
+        :param operation_uuid: UUID of an operation.
+        """
+        rpc_operation = get_rpc_operation(operation_uuid)
+        return AsyncOperation.convert(rpc_operation)
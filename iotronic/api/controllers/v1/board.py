@@ -13,6 +13,7 @@
 
 from iotronic.api.controllers import base
 from iotronic.api.controllers import link
+from iotronic.api.controllers.v1 import asyncoperation
 from iotronic.api.controllers.v1 import collection
 from iotronic.api.controllers.v1.enabledwebservice import EnabledWebservice
 from iotronic.api.controllers.v1 import location as loc
@@ -23,8 +24,11 @@ from iotronic.api.controllers.v1.webservice import WebserviceCollection
 from iotronic.api import expose
 from iotronic.common import authorization
 from iotronic.common import exception
+from iotronic.common import permission_cache
 # from iotronic.common import policy
 from iotronic import objects
+import json
+from oslo_config import cfg
 from oslo_utils import uuidutils
 import pecan
 from pecan import rest
@@ -35,6 +39,8 @@ from oslo_log import log as logging
 
 LOG = logging.getLogger(__name__)
 
+CONF = cfg.CONF
+
 _DEFAULT_RETURN_FIELDS = ('name', 'code', 'status', 'uuid', 'session', 'type',
                           'fleet', 'lr_version', 'connectivity')
 _DEFAULT_WEBSERVICE_RETURN_FIELDS = ('name', 'uuid', 'port', 'board_uuid',
@@ -87,22 +93,43 @@ class Board(base.APIBase):
         return board
 
     @classmethod
-    def convert_with_links(cls, rpc_board, fields=None):
+    def convert_with_links(cls, rpc_board, fields=None, sessions=None,
+                           locations=None):
+        """Convert a board object to its API representation.
+
+        :param sessions: Optional, sessions preloaded for a page of boards,
+                         indexed by board uuid.
+        :param locations: Optional, locations preloaded for a page of boards,
+                          indexed by board id.
+        """
         board = Board(**rpc_board.as_dict())
 
-        try:
-            session = objects.SessionWP.get_session_by_board_uuid(
-                pecan.request.context, board.uuid)
-            board.session = session.session_id
-        except Exception:
-            board.session = None
+        # session and location are looked up only when requested
+        if fields is not None and 'session' not in fields:
+            pass
+        elif sessions is not None:
+            session = sessions.get(board.uuid)
+            board.session = session.session_id if session else None
+        else:
+            try:
+                session = objects.SessionWP.get_session_by_board_uuid(
+                    pecan.request.context, board.uuid)
+                board.session = session.session_id
+            except Exception:
+                board.session = None
 
-        try:
-            list_loc = objects.Location.list_by_board_uuid(
-                pecan.request.context, board.uuid)
-            board.location = loc.Location.convert_with_list(list_loc)
-        except Exception:
-            board.location = []
+        if fields is not None and 'location' not in fields:
+            pass
+        elif locations is not None:
+            board.location = loc.Location.convert_with_list(
+                locations.get(rpc_board.id, []))
+        else:
+            try:
+                list_loc = objects.Location.list_by_board_uuid(
+                    pecan.request.context, board.uuid)
+                board.location = loc.Location.convert_with_list(list_loc)
+            except Exception:
+                board.location = []
 
         # to enable as soon as a better session and location management
         # is implemented
@@ -126,7 +153,23 @@ class BoardCollection(collection.Collection):
     @staticmethod
     def convert_with_links(boards, limit, url=None, fields=None, **kwargs):
         collection = BoardCollection()
-        collection.boards = [Board.convert_with_links(n, fields=fields)
+        context = pecan.request.context
+
+        # load the sessions and the locations of the whole page at once
+        sessions = {}
+        if fields is None or 'session' in fields:
+            for session in objects.SessionWP.list_by_board_uuids(
+                    context, [b.uuid for b in boards]):
+                sessions[session.board_uuid] = session
+        locations = {}
+        if fields is None or 'location' in fields:
+            for location in objects.Location.list_by_board_ids(
+                    context, [b.id for b in boards]):
+                locations.setdefault(location.board_id, []).append(location)
+
+        collection.boards = [Board.convert_with_links(n, fields=fields,
+                                                      sessions=sessions,
+                                                      locations=locations)
                              for n in boards]
         collection.next = collection.get_next(limit, url=url, **kwargs)
         return collection
@@ -306,6 +349,12 @@ class BoardPluginsController(rest.RestController):
                 raise exception.InvalidParameterValue(
                     "Parameters are different from the valid ones")
 
+        if asyncoperation.prefer_async():
+            return asyncoperation.run_async(
+                'action_plugin', rpc_board.uuid,
+                plugin_uuid=rpc_plugin.uuid, board_uuid=rpc_board.uuid,
+                action=PluginAction.action, params=PluginAction.parameters)
+
         result = pecan.request.rpcapi.action_plugin(pecan.request.context,
                                                     rpc_plugin.uuid,
                                                     rpc_board.uuid,
@@ -337,6 +386,13 @@ class BoardPluginsController(rest.RestController):
             authorization.authorize('plugin:put', rpc_plugin.uuid)
 
         rpc_board.check_if_online()
+
+        if asyncoperation.prefer_async():
+            return asyncoperation.run_async(
+                'inject_plugin', rpc_board.uuid,
+                plugin_uuid=rpc_plugin.uuid, board_uuid=rpc_board.uuid,
+                onboot=Injection.onboot)
+
         result = pecan.request.rpcapi.inject_plugin(pecan.request.context,
                                                     rpc_plugin.uuid,
                                                     rpc_board.uuid,
@@ -458,7 +514,7 @@ class BoardWebservicesController(rest.RestController):
                                               marker_obj,
                                               sort_key=sort_key,
                                               sort_dir=sort_dir,
-                                              filters=filters)
+                                              filters=filters, fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
@@ -565,6 +621,12 @@ class BoardWebservicesController(rest.RestController):
             raise exception.MissingParameterValue(
                 ("email is not specified."))
 
+        if asyncoperation.prefer_async():
+            return asyncoperation.run_async(
+                'enable_webservice', rpc_board.uuid,
+                dns=EnabledWebserverData.dns, zone=EnabledWebserverData.zone,
+                email=EnabledWebserverData.email, board_uuid=rpc_board.uuid)
+
         new_EnWebservice = pecan.request.rpcapi.enable_webservice(
             pecan.request.context,
             EnabledWebserverData.dns,
@@ -622,6 +684,13 @@ class BoardPortsController(rest.RestController):
 
         rpc_board.check_if_online()
 
+        if asyncoperation.prefer_async():
+            return asyncoperation.run_async(
+                'create_port_on_board', rpc_board.uuid,
+                board_uuid=rpc_board.uuid, network_uuid=Network.network,
+                subnet_uuid=Network.subnet,
+                security_groups=Network.security_groups)
+
         result = pecan.request.rpcapi. \
             create_port_on_board(pecan.request.context, rpc_board.uuid,
                                  Network.network, Network.subnet,
@@ -678,6 +747,8 @@ class BoardsController(rest.RestController):
 
     _custom_actions = {
         'detail': ['GET'],
+        'export': ['GET'],
+        'bulk': ['POST'],
     }
 
     @pecan.expose()
@@ -696,13 +767,16 @@ class BoardsController(rest.RestController):
     def _get_boards_collection(self, authorized_boards, status, marker, limit,
                                sort_key, sort_dir,
                                project=None,
-                               resource_url=None, fields=None):
+                               resource_url=None, fields=None, cursor=None):
 
         limit = api_utils.validate_limit(limit)
         sort_dir = api_utils.validate_sort_dir(sort_dir)
 
+        # a keyset cursor makes the marker lookup unnecessary
         marker_obj = None
-        if marker:
+        if cursor:
+            cursor = api_utils.decode_cursor(cursor)
+        elif marker:
             marker_obj = objects.Board.get_by_uuid(pecan.request.context,
                                                    marker)
 
@@ -722,11 +796,20 @@ class BoardsController(rest.RestController):
         if status:
             filters['status'] = status
 
+        # the sort key is needed to build the cursor of the next page
+        db_fields = fields
+        if fields is not None:
+            db_fields = list(fields) + [sort_key]
+
         boards = objects.Board.list(pecan.request.context, authorized_boards,
                                     limit, marker_obj, sort_key=sort_key,
-                                    sort_dir=sort_dir, filters=filters)
+                                    sort_dir=sort_dir, filters=filters,
+                                    fields=db_fields, cursor=cursor or None)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
+        if boards:
+            parameters['cursor'] = api_utils.encode_cursor(boards[-1],
+                                                           sort_key)
 
         return BoardCollection.convert_with_links(boards, limit,
                                                   url=resource_url,
@@ -748,10 +831,10 @@ class BoardsController(rest.RestController):
         return Board.convert_with_links(rpc_board, fields=fields)
 
     @expose.expose(BoardCollection, wtypes.text, types.uuid, int, wtypes.text,
-                   wtypes.text, types.listtype, wtypes.text)
+                   wtypes.text, types.listtype, wtypes.text, wtypes.text)
     def get_all(self, status=None, marker=None,
                 limit=None, sort_key='id', sort_dir='asc',
-                fields=None, project=None):
+                fields=None, project=None, cursor=None):
         """Retrieve a list of boards.
 
         :param status: Optional string value to get only board in
@@ -765,6 +848,8 @@ class BoardsController(rest.RestController):
         :param sort_dir: direction to sort. "asc" or "desc". Default: asc.
         :param fields: Optional, a list with a specified set of fields
                        of the resource to be returned.
+        :param cursor: Optional, opaque keyset pagination cursor, as found
+                       in the next link. Takes precedence over marker.
         """
         authorized_boards = authorization.authorize('board:get')
 
@@ -772,7 +857,120 @@ class BoardsController(rest.RestController):
             fields = _DEFAULT_RETURN_FIELDS
         return self._get_boards_collection(authorized_boards, status, marker,
                                            limit, sort_key, sort_dir,
-                                           fields=fields, project=project)
+                                           fields=fields, project=project,
+                                           cursor=cursor)
+
+    @pecan.expose()
+    def export(self, status=None, project=None, fields=None):
+        """Stream the boards as newline delimited JSON.
+
+        Boards are read from a server side cursor and written one per line,
+        so the whole result set is never held in memory.
+
+        :param status: Optional string value to get only board in
+                                that status.
+        :param project: Optional string value to get only boards
+                        of the project.
+        :param fields: Optional, a comma separated list of the fields
+                       to be returned.
+        """
+        authorized_boards = authorization.authorize('board:get')
+
+        filters = {}
+        filters['project_id'] = project or pecan.request.context.project_id
+        if status:
+            filters['status'] = status
+        if fields:
+            fields = fields.split(',')
+
+        boards = objects.Board.iterate(pecan.request.context,
+                                       authorized_boards, filters=filters,
+                                       fields=fields)
+
+        def rows():
+            for rpc_board in boards:
+                board = Board(**rpc_board.as_dict())
+                if fields:
+                    board.unset_fields_except(fields)
+                yield (json.dumps(board.as_dict()) + '\n').encode('utf-8')
+
+        return pecan.Response(app_iter=rows(),
+                              content_type='application/x-ndjson',
+                              charset=None)
+
+    @pecan.expose('json')
+    def bulk(self):
+        """Create many Boards in a single request.
+
+        The body is either a JSON array of boards or newline delimited JSON,
+        one board per line. Boards are validated one by one and sent to the
+        conductor in batches of ``[api]bulk_batch_size``; the response holds
+        the outcome of every board, in the order of the request.
+        """
+        authorization.authorize('board:create')
+        context = pecan.request.context
+
+        body = pecan.request.body.decode('utf-8').strip()
+        try:
+            if body.startswith('['):
+                items = json.loads(body)
+            else:
+                items = [json.loads(line) for line in body.splitlines()
+                         if line.strip()]
+        except ValueError as e:
+            pecan.abort(400, "Malformed request body: %s" % e)
+        if not items or not all(isinstance(i, dict) for i in items):
+            pecan.abort(400, "A list of boards is expected.")
+
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            try:
+                location = item.pop('location', None)
+                if not item.get('name'):
+                    raise exception.MissingParameterValue(
+                        ("Name is not specified."))
+                if not item.get('code'):
+                    raise exception.MissingParameterValue(
+                        ("Code is not specified."))
+                if not location:
+                    raise exception.MissingParameterValue(
+                        ("Location is not specified."))
+                if not api_utils.is_valid_board_name(item['name']):
+                    msg = ("Cannot create board with invalid name %(name)s")
+                    raise exception.InvalidParameterValue(
+                        msg % {'name': item['name']})
+
+                api_board = Board(**item)
+                api_location = loc.Location(**location[0])
+            except Exception as e:
+                results[index] = {'index': index,
+                                  'code': item.get('code'),
+                                  'error': str(e)}
+                continue
+
+            new_board = objects.Board(context, **api_board.as_dict())
+            new_board.owner = context.user_id
+            new_board.project = context.project_id
+            new_location = objects.Location(context, **api_location.as_dict())
+            pending.append((index, new_board, new_location))
+
+        batch_size = max(CONF.api.bulk_batch_size, 1)
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            created = pecan.request.rpcapi.create_boards(
+                context,
+                [board for i, board, location in batch],
+                [location for i, board, location in batch],
+                context.user_id)
+            for (index, board, location), result in zip(batch, created):
+                result['index'] = index
+                results[index] = result
+
+        # the owner delegations were added by the conductor
+        permission_cache.PermissionCache.invalidate_user(context.user_id)
+
+        return {'boards': results}
 
     @expose.expose(Board, body=Board, status_code=201)
     def post(self, Board):
@@ -862,10 +1060,10 @@ class BoardsController(rest.RestController):
         return Board.convert_with_links(updated_board)
 
     @expose.expose(BoardCollection, wtypes.text, types.uuid, int, wtypes.text,
-                   wtypes.text, types.listtype, wtypes.text)
+                   wtypes.text, types.listtype, wtypes.text, wtypes.text)
     def detail(self, status=None, marker=None,
                limit=None, sort_key='id', sort_dir='asc',
-               fields=None, project=None):
+               fields=None, project=None, cursor=None):
         """Retrieve a list of boards.
 
         :param status: Optional string value to get only board in
@@ -881,6 +1079,8 @@ class BoardsController(rest.RestController):
                         of the project.
         :param fields: Optional, a list with a specified set of fields
                        of the resource to be returned.
+        :param cursor: Optional, opaque keyset pagination cursor, as found
+                       in the next link. Takes precedence over marker.
         """
 
         authorized_boards = authorization.authorize('board:get')
@@ -892,4 +1092,5 @@ class BoardsController(rest.RestController):
 
         return self._get_boards_collection(authorized_boards, status, marker,
                                            limit, sort_key, sort_dir,
-                                           project=project, fields=fields)
+                                           project=project, fields=fields,
+                                           cursor=cursor)
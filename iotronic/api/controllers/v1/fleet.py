@@ -13,6 +13,7 @@
 
 from iotronic.api.controllers import base
 from iotronic.api.controllers import link
+from iotronic.api.controllers.v1 import asyncoperation
 from iotronic.api.controllers.v1.board import BoardCollection
 from iotronic.api.controllers.v1 import collection
 from iotronic.api.controllers.v1 import types
@@ -21,6 +22,7 @@ from iotronic.api import expose
 from iotronic.common import exception
 # from iotronic.common import policy
 from iotronic.common import authorization
+from iotronic.common import states
 from iotronic import objects
 from oslo_utils import uuidutils
 
@@ -132,7 +134,7 @@ class FleetBoardsController(rest.RestController):
         boards = objects.Board.list(pecan.request.context,
                                     authorized_boards, limit, marker,
                                     sort_key=sort_key, sort_dir=sort_dir,
-                                    filters=filters)
+                                    filters=filters, fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
@@ -141,11 +143,112 @@ class FleetBoardsController(rest.RestController):
                                                   **parameters)
 
 
+class FleetAction(base.APIBase):
+    plugin = types.uuid_or_name
+    service = types.uuid_or_name
+    action = wsme.wsattr(wtypes.text)
+    parameters = types.jsontype
+
+
+class FleetActionsController(rest.RestController):
+    def __init__(self, fleet_ident):
+        self.fleet_ident = fleet_ident
+
+    @expose.expose(asyncoperation.AsyncOperation, types.uuid)
+    def get_one(self, operation_uuid):
+        """Retrieve the progress of an action on a fleet.
+
+        :param operation_uuid: UUID of the operation returned by the action.
+        """
+        rpc_fleet = api_utils.get_rpc_fleet(self.fleet_ident)
+        rpc_operation = asyncoperation.get_rpc_operation(operation_uuid)
+        if rpc_operation.target != rpc_fleet.uuid:
+            raise exception.AsyncOperationNotFound(operation=operation_uuid)
+
+        return asyncoperation.AsyncOperation.convert(rpc_operation)
+
+    @expose.expose(asyncoperation.AsyncOperation, body=FleetAction,
+                   status_code=202)
+    def post(self, FleetAction):
+        """Run a plugin or service action on the online boards of a fleet.
+
+        The action is dispatched by the conductor, and the returned
+        operation is filled in with the result of every board as it replies.
+        The PluginInject action injects the plugin, with the optional
+        onboot parameter.
+
+        :param FleetAction: the plugin or the service, the action and its
+                            parameters.
+        """
+        if not FleetAction.action:
+            raise exception.MissingParameterValue(
+                ("Action is not specified."))
+        if bool(FleetAction.plugin) == bool(FleetAction.service):
+            raise exception.InvalidParameterValue(
+                ("Either a plugin or a service must be specified."))
+
+        context = pecan.request.context
+        rpc_fleet = api_utils.get_rpc_fleet(self.fleet_ident)
+        authorization.authorize('fleet:action', rpc_fleet.uuid)
+
+        plugin_uuid = service_uuid = None
+        if FleetAction.plugin:
+            rpc_plugin = api_utils.get_rpc_plugin(FleetAction.plugin)
+            plugin_uuid = rpc_plugin.uuid
+            params = FleetAction.parameters or {}
+            if FleetAction.action == objects.plugin.INJECT:
+                if not rpc_plugin.public:
+                    authorization.authorize('plugin:put', rpc_plugin.uuid)
+                params = {'onboot': bool(params.get('onboot', False))}
+                authorized_boards = authorization.authorize(
+                    'board:plugin_put')
+            else:
+                if not rpc_plugin.public:
+                    authorization.authorize('plugin:post', rpc_plugin.uuid)
+                objects.plugin.is_valid_action(FleetAction.action)
+                if objects.plugin.want_customs_params(FleetAction.action):
+                    valid_keys = list(rpc_plugin.parameters.keys())
+                    if not all(k in params for k in valid_keys):
+                        raise exception.InvalidParameterValue(
+                            "Parameters are different from the valid ones")
+                authorized_boards = authorization.authorize(
+                    'board:plugin_post')
+        else:
+            rpc_service = api_utils.get_rpc_service(FleetAction.service)
+            objects.service.is_valid_action(FleetAction.action)
+            params = None
+            service_uuid = rpc_service.uuid
+            authorized_boards = authorization.authorize(
+                'board:service_action')
+
+        filters = {'fleet': rpc_fleet.uuid, 'status': states.ONLINE}
+        board_uuids = [b.uuid for b in objects.Board.iterate(
+            context, authorized_boards, filters=filters, fields=['uuid'])]
+
+        operation = objects.AsyncOperation(context)
+        operation.name = FleetAction.action
+        operation.target = rpc_fleet.uuid
+        operation.owner = context.user_id
+        operation.project = context.project_id
+        if not board_uuids:
+            operation.status = states.OPERATION_COMPLETED
+        operation.create(keys=board_uuids)
+
+        if board_uuids:
+            pecan.request.rpcapi.action_fleet(context, operation.uuid,
+                                              board_uuids, FleetAction.action,
+                                              params, plugin_uuid=plugin_uuid,
+                                              service_uuid=service_uuid)
+
+        return asyncoperation.AsyncOperation.convert(operation)
+
+
 class FleetsController(rest.RestController):
     """REST controller for Fleets."""
 
     _subcontroller_map = {
         'boards': FleetBoardsController,
+        'actions': FleetActionsController,
     }
 
     invalid_sort_key_list = ['extra', ]
@@ -187,7 +290,8 @@ class FleetsController(rest.RestController):
         filters = {}
         fleets = objects.Fleet.list(pecan.request.context, authorized_fleets,
                                     limit, marker_obj, sort_key=sort_key,
-                                    sort_dir=sort_dir, filters=filters)
+                                    sort_dir=sort_dir, filters=filters,
+                                    fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
@@ -38,6 +38,7 @@ class Plugin(base.APIBase):
     uuid = types.uuid
     name = wsme.wsattr(wtypes.text)
     code = wsme.wsattr(wtypes.text)
+    code_hash = wsme.wsattr(wtypes.text, readonly=True)
     public = types.boolean
     owner = types.uuid
     callable = types.boolean
@@ -125,7 +126,7 @@ class PublicPluginsController(rest.RestController):
         plugins = objects.Plugin.list(pecan.request.context,
                                       authorized_plugins, limit, marker_obj,
                                       sort_key=sort_key, sort_dir=sort_dir,
-                                      filters=filters)
+                                      filters=filters, fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
@@ -197,7 +198,7 @@ class PluginsController(rest.RestController):
         plugins = objects.Plugin.list(pecan.request.context,
                                       authorized_plugins, limit, marker_obj,
                                       sort_key=sort_key, sort_dir=sort_dir,
-                                      filters=filters)
+                                      filters=filters, fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
@@ -124,7 +124,8 @@ class PublicServicesController(rest.RestController):
         services = objects.Service.list(pecan.request.context,
                                         authorized_services, limit,
                                         marker_obj, sort_key=sort_key,
-                                        sort_dir=sort_dir, filters=filters)
+                                        sort_dir=sort_dir, filters=filters,
+                                        fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
@@ -202,7 +203,8 @@ class ServicesController(rest.RestController):
         services = objects.Service.list(pecan.request.context,
                                         authorized_services, limit,
                                         marker_obj, sort_key=sort_key,
-                                        sort_dir=sort_dir, filters=filters)
+                                        sort_dir=sort_dir, filters=filters,
+                                        fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
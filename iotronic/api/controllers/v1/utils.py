@@ -13,8 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
+import datetime
+import json
+
 import jsonpatch
 from oslo_config import cfg
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
 import pecan
 import wsme
@@ -41,6 +46,53 @@ def validate_limit(limit):
     return min(CONF.api.max_limit, limit)
 
 
+# tags the datetime values of a cursor, which JSON cannot carry
+_CURSOR_DATETIME = 'datetime'
+
+
+def _encode_cursor_value(value):
+    if isinstance(value, datetime.datetime):
+        # the database stores naive UTC datetimes
+        if value.utcoffset() is not None:
+            value = timeutils.normalize_time(value)
+        return {_CURSOR_DATETIME: value.isoformat()}
+    return value
+
+
+def _decode_cursor_value(value):
+    if not isinstance(value, dict):
+        return value
+    return timeutils.normalize_time(
+        timeutils.parse_isotime(value[_CURSOR_DATETIME]))
+
+
+def encode_cursor(obj, sort_key):
+    """Build the opaque keyset pagination cursor after an object.
+
+    :param obj: the last object of a page.
+    :param sort_key: the column the page is sorted by.
+    """
+    values = [obj.id]
+    if sort_key and sort_key != 'id':
+        values.insert(0, _encode_cursor_value(obj[sort_key]))
+    data = json.dumps(values, default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return the sort values carried by a keyset pagination cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(
+            str(cursor).encode('ascii')).decode('utf-8'))
+        if isinstance(values, list):
+            values = [_decode_cursor_value(v) for v in values]
+    except (TypeError, ValueError, KeyError):
+        values = None
+    if not isinstance(values, list):
+        raise wsme.exc.ClientSideError(_("Invalid cursor: %s") % cursor)
+    return values
+
+
 def validate_sort_dir(sort_dir):
     if sort_dir not in ['asc', 'desc']:
         raise wsme.exc.ClientSideError(_("Invalid sort direction: %s. "
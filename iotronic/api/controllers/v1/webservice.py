@@ -146,7 +146,7 @@ class WebservicesController(rest.RestController):
                                               marker_obj,
                                               sort_key=sort_key,
                                               sort_dir=sort_dir,
-                                              filters=filters)
+                                              filters=filters, fields=fields)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
 
@@ -14,12 +14,15 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import time
+
 from oslo_config import cfg
 from oslo_log import log
 from pecan import hooks
 from six.moves import http_client
 
 from iotronic.common import context
+from iotronic.common import metrics
 from iotronic.common import policy
 from iotronic.conductor import rpcapi
 from iotronic.db import api as dbapi
@@ -84,10 +87,31 @@ class ContextHook(hooks.PecanHook):
 
 
 class RPCHook(hooks.PecanHook):
-    """Attach the rpcapi object to the request so controllers can get to it."""
+    """Attach the rpcapi object to the request so controllers can get to it.
+
+    The time spent waiting for the conductor is accounted apart from the
+    rest of the request, so that API overhead can be told from conductor
+    time.
+    """
 
     def before(self, state):
-        state.request.rpcapi = rpcapi.ConductorAPI()
+        state.request.rpcapi = rpcapi.get_instance()
+        state.request.start_time = time.time()
+        rpcapi.reset_rpc_time()
+
+    def after(self, state):
+        start_time = getattr(state.request, 'start_time', None)
+        if start_time is None:
+            return
+        elapsed = time.time() - start_time
+        rpc_time = rpcapi.get_rpc_time()
+        metrics.record('api.request', elapsed)
+        metrics.record('api.overhead', elapsed - rpc_time)
+        LOG.debug("%(method)s %(path)s took %(elapsed).3fs, "
+                  "%(rpc).3fs waiting for the conductor",
+                  {'method': state.request.method,
+                   'path': state.request.path,
+                   'elapsed': elapsed, 'rpc': rpc_time})
 
 
 class NoExceptionTracebackHook(hooks.PecanHook):
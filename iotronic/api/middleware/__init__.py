@@ -13,11 +13,14 @@
 # under the License.
 
 from iotronic.api.middleware import auth_token
+from iotronic.api.middleware import conditional_get
 from iotronic.api.middleware import parsable_error
 
 
 ParsableErrorMiddleware = parsable_error.ParsableErrorMiddleware
 AuthTokenMiddleware = auth_token.AuthTokenMiddleware
+ConditionalGetMiddleware = conditional_get.ConditionalGetMiddleware
 
 __all__ = ('ParsableErrorMiddleware',
-           'AuthTokenMiddleware')
+           'AuthTokenMiddleware',
+           'ConditionalGetMiddleware')
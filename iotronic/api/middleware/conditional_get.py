@@ -0,0 +1,148 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Middleware answering conditional GETs on the polled collections.
+
+The ETag of a response is derived from the user, the project, the roles,
+the host and scheme the links are built from, the URL and the versions of
+the tables the resource is built from, bumped by every transaction writing
+them. While the versions do not change, a request carrying a matching
+If-None-Match gets a 304, and any other request is served from a bounded
+LRU of serialized responses, without running authorization, queries and
+WSME serialization again.
+"""
+
+import collections
+import hashlib
+import threading
+
+from oslo_config import cfg
+from oslo_log import log
+
+from iotronic.db import api as dbapi
+
+LOG = log.getLogger(__name__)
+
+CONF = cfg.CONF
+
+# tables changing the authorization of every resource
+_AUTHORIZATION_TABLES = ('delegations', 'roles', 'users')
+
+# tables every watched resource is built from, all of them versioned or
+# probed by the db api
+_RESOURCE_TABLES = {
+    'boards': ('boards', 'sessions', 'locations'),
+    'plugins': ('plugins',),
+    'fleets': ('fleets', 'boards', 'sessions', 'locations'),
+}
+
+
+def _watched_tables(path):
+    """Return the tables a GET on path depends on, None if not watched."""
+    parts = path.strip('/').split('/')
+    if len(parts) < 2 or parts[0] != 'v1' or parts[1] not in _RESOURCE_TABLES:
+        return None
+    resource = parts[1]
+    if len(parts) == 3 and parts[2] == 'export':
+        # streamed responses are never buffered
+        return None
+    if len(parts) > 3 and not (resource == 'fleets' and len(parts) == 4 and
+                               parts[3] == 'boards'):
+        # sub-resources depend on other tables
+        return None
+    return _RESOURCE_TABLES[resource] + _AUTHORIZATION_TABLES
+
+
+class ConditionalGetMiddleware(object):
+    """Add ETags to the watched collections and answer If-None-Match."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._cache = collections.OrderedDict()
+
+    def _cache_get(self, key, etag):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _cache_set(self, key, etag, response):
+        size = CONF.api.etag_cache_size
+        if size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (etag, response)
+            self._cache.move_to_end(key)
+            while len(self._cache) > size:
+                self._cache.popitem(last=False)
+
+    def __call__(self, environ, start_response):
+        if (not CONF.api.enable_conditional_get or
+                environ.get('REQUEST_METHOD') != 'GET'):
+            return self.app(environ, start_response)
+
+        tables = _watched_tables(environ.get('PATH_INFO', ''))
+        if tables is None:
+            return self.app(environ, start_response)
+
+        try:
+            versions = dbapi.get_instance().get_tables_version(tables)
+        except Exception as e:
+            LOG.warning("Unable to read the ETag table versions: %s", e)
+            return self.app(environ, start_response)
+
+        key = (environ.get('HTTP_X_USER_ID'),
+               environ.get('HTTP_X_PROJECT_ID'),
+               environ.get('HTTP_X_ROLES'),
+               environ.get('wsgi.url_scheme'),
+               environ.get('HTTP_X_FORWARDED_PROTO'),
+               environ.get('HTTP_HOST'),
+               environ.get('PATH_INFO'),
+               environ.get('QUERY_STRING', ''),
+               environ.get('HTTP_X_OPENSTACK_IOTRONIC_API_VERSION'))
+        etag = '"%s"' % hashlib.sha1(
+            repr((key, versions)).encode('utf-8')).hexdigest()
+
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [t.strip() for t in if_none_match.split(',')]:
+            start_response('304 Not Modified', [('ETag', etag)])
+            return []
+
+        cached = self._cache_get(key, etag)
+        if cached is not None:
+            status, headers, body = cached
+            start_response(status, headers)
+            return [body]
+
+        state = {}
+
+        def etag_start_response(status, headers, exc_info=None):
+            state['status'] = status
+            if status.startswith('200'):
+                headers = list(headers) + [('ETag', etag)]
+            state['headers'] = headers
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.app(environ, etag_start_response)
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        if state.get('status', '').startswith('200'):
+            self._cache_set(key, etag, (state['status'], state['headers'],
+                                        body))
+        return [body]
@@ -18,6 +18,7 @@
 from iotronic.db import api as db_api
 
 from iotronic.common import exception
+from iotronic.common import permission_cache
 from iotronic.common import policy
 from oslo_config import cfg
 from oslo_log import log
@@ -31,6 +32,81 @@ LOG = log.getLogger(__name__)
 # at module-load time.
 
 
+def _role_grants(dbapi, role):
+    """Return the (type, operation) pairs granted by a role."""
+    grants = permission_cache.PermissionCache.get_role_grants(role)
+    if grants is None:
+        permissions = dbapi.get_role_permissions(role).permissions
+        grants = _compile(permissions)
+        permission_cache.PermissionCache.set_role_grants(role, grants)
+    return grants
+
+
+def _compile(permissions):
+    return frozenset(tuple(perm.split(':')) for perm in permissions or [])
+
+
+def _base_role(dbapi, user):
+    """Return the base role of a user, or None if the user is unknown."""
+    role = permission_cache.PermissionCache.get_base_role(user)
+    if role is None:
+        try:
+            role = dbapi.get_user_details(user).base_role
+        except exception.UserNotFound:
+            return None
+        # an unknown user or a missing role may be created at any time
+        if role:
+            permission_cache.PermissionCache.set_base_role(user, role)
+    return role or None
+
+
+def _allows(grants, type, op):
+    for ptype, pop in grants:
+        if (ptype == type or ptype == 'all') and (pop == op or pop == 'all'):
+            return True
+    return False
+
+
+def _granting_roles(dbapi, type, op):
+    """Return the names of the roles granting op on nodes of type."""
+    roles = permission_cache.PermissionCache.get_granting_roles(type, op)
+    if roles is None:
+        roles = ['owner']
+        for role in dbapi.get_role_list():
+            if _allows(_compile(role.permissions), type, op):
+                roles.append(role.name)
+        permission_cache.PermissionCache.set_granting_roles(type, op, roles)
+    return roles
+
+
+class AuthorizedNodes(object):
+    """The nodes of a type a user is authorized on for an operation.
+
+    Instead of the list of node uuids, the db api receives this scope and
+    resolves it with a subquery on the delegations table, so that
+    authorization, sorting and pagination run in a single query.
+    """
+
+    def __init__(self, user, type, op, roles):
+        self.user = user
+        self.type = type
+        self.op = op
+        self.roles = list(roles)
+
+
+def _authorized_nodes(dbapi, user, type, op):
+    nodes = permission_cache.PermissionCache.get_nodes(user, type, op)
+    if nodes is None:
+        nodes = []
+        delegations = dbapi.get_node_delegations(user_uuid=user, type=type)
+        for dele in delegations:
+            if (dele.role == 'owner' or
+                    _allows(_role_grants(dbapi, dele.role), type, op)):
+                nodes.append(dele.node)
+        permission_cache.PermissionCache.set_nodes(user, type, op, nodes)
+    return nodes
+
+
 def authorize(operation, target=None):
     """
     Checks authorization of a operation, and
@@ -45,57 +121,39 @@ def authorize(operation, target=None):
 
     # Authorization with base role or policy
     if type == 'user' or type == 'role':
-        try:
-            user = dbapi.get_user_details(user)
-            permissions = dbapi.get_role_permissions(
-                user.base_role).permissions
-            for perm in permissions:
-                ptype, pop = perm.split(':')
+        base_role = _base_role(dbapi, user)
+        if base_role:
+            grants = _role_grants(dbapi, base_role)
+            for ptype, pop in grants:
                 if (ptype == type) and (pop == op or pop == 'all'):
                     return
-        except exception.UserNotFound:
-            pass
         policy.authorize('iot:'+type+':'+op, cdict, cdict)
         # raise exception.HTTPForbidden(resource=operation)
     if op == 'create':
-        try:
-            user = dbapi.get_user_details(user)
-            permissions = dbapi.get_role_permissions(
-                user.base_role).permissions
-            for perm in permissions:
-                ptype, pop = perm.split(':')
-                if (ptype == type or ptype == 'all') and (pop == op
-                                                          or pop == 'all'):
-                    return
-        except exception.UserNotFound:
-            pass
+        base_role = _base_role(dbapi, user)
+        if base_role and _allows(_role_grants(dbapi, base_role), type, op):
+            return
         policy.authorize('iot:'+type+':'+op, cdict, cdict)
         # raise exception.HTTPForbidden(resource=operation)
 
     # Authorization with delegation role
     if not target:
-        authorized_nodes = []
-        delegations = dbapi.get_node_delegations(user_uuid=user, type=type)
-        for dele in delegations:
-            if(dele.role == 'owner'):
-                authorized_nodes.append(dele.node)
-                continue
-            permissions = dbapi.get_role_permissions(dele.role).permissions
-            for perm in permissions:
-                ptype, pop = perm.split(':')
-                if (ptype == type or ptype == 'all') and (pop == op
-                                                          or pop == 'all'):
-                    authorized_nodes.append(dele.node)
-                    break
-        return authorized_nodes
+        if CONF.authorization.list_mode == 'sql':
+            return AuthorizedNodes(user, type, op,
+                                   _granting_roles(dbapi, type, op))
+        return list(_authorized_nodes(dbapi, user, type, op))
     else:
+        # the delegation on the target is always read from the DB: a cached
+        # node set is local to this process, a delegation revoked through
+        # another worker must not keep granting access until it expires
         delegation = dbapi.get_node_delegation(user, type, target)
         if(delegation.role == 'owner'):
             return True
-        permissions = dbapi.get_role_permissions(delegation.role).permissions
-        for perm in permissions:
-            ptype, pop = perm.split(':')
-            if (ptype == type or ptype == 'all') and (pop == op
-                                                      or pop == 'all'):
-                return
+        if _allows(_role_grants(dbapi, delegation.role), type, op):
+            return
         raise exception.HTTPForbidden(resource=target)
+
+
+def stats():
+    """Return the hit/miss counters of the permission cache."""
+    return permission_cache.PermissionCache.stats()
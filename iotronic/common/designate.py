@@ -10,10 +10,13 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import threading
+import time
+
+from designateclient import exceptions as designate_exceptions
 from designateclient.v2 import client
 
-from keystoneauth1.identity import generic
-from keystoneauth1 import session as keystone_session
+from iotronic.common import keystone
 from oslo_config import cfg
 
 CONF = cfg.CONF
@@ -49,44 +52,70 @@ designate_opts = [
     cfg.StrOpt('user_domain_id',
                default='default',
                help=('user domain id')),
+    cfg.IntOpt('zone_cache_ttl',
+               default=600,
+               help=('Seconds the id of a zone is cached.')),
 ]
 
 CONF.register_opts(designate_opts, 'designate')
 
 
+_zones = {}
+_zones_lock = threading.Lock()
+
+
 def get_client():
-    auth = generic.Password(
-        auth_url=CONF.designate.auth_url,
-        username=CONF.designate.username,
-        password=CONF.designate.password,
-        project_name=CONF.designate.project_name,
-        project_domain_id=CONF.designate.project_domain_id,
-        user_domain_id=CONF.designate.user_domain_id,
-    )
-
-    session = keystone_session.Session(auth=auth)
-    cl = client.Client(session=session)
+    cl = client.Client(session=keystone.get_session('designate'))
     return cl
 
 
-def create_record(name, ip, zone_name):
-    client = get_client()
+def get_zone(client, zone_name):
+    """Return the id and the name of a zone, cached for zone_cache_ttl."""
+    with _zones_lock:
+        entry = _zones.get(zone_name)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+
     zone = client.zones.get(zone_name + ".")
-    record = None
+    zone = {'id': zone['id'], 'name': zone['name']}
+    with _zones_lock:
+        _zones[zone_name] = (time.time() + CONF.designate.zone_cache_ttl,
+                             zone)
+    return zone
+
+
+def _forget_zone(zone_name):
+    with _zones_lock:
+        _zones.pop(zone_name, None)
+
+
+def _create_record(client, zone, name, ip):
     try:
-        record = client.recordsets.get(zone["id"], name + "." + zone["name"])
-    except Exception:
-        pass
-    if not record:
         client.recordsets.create(zone["id"], name, 'A', [ip])
+    except designate_exceptions.Conflict:
+        # the record already exists
+        pass
 
 
-def delete_record(name, zone_name):
-    client = get_client()
-    zone = client.zones.get(zone_name + ".")
+def _delete_record(client, zone, name):
     try:
-        record = client.recordsets.get(zone["id"], name + "." + zone["name"])
-    except Exception:
-        pass
-    if record:
         client.recordsets.delete(zone["id"], name + "." + zone["name"])
+    except designate_exceptions.NotFound:
+        pass
+
+
+def create_record(name, ip, zone_name):
+    client = get_client()
+    zone = get_zone(client, zone_name)
+    try:
+        _create_record(client, zone, name, ip)
+    except designate_exceptions.NotFound:
+        # the zone may have been deleted and created again
+        _forget_zone(zone_name)
+        raise
+
+
+def delete_record(name, zone_name):
+    client = get_client()
+    zone = get_zone(client, zone_name)
+    _delete_record(client, zone, name)
@@ -661,6 +661,11 @@ class NetworkError(IotronicException):
     message = _("Network operation failure.")
 
 
+class PortCreationFailed(NetworkError):
+    message = _("The port of the board %(board)s was not created: "
+                "%(reason)s.")
+
+
 class DatabaseVersionTooOld(IotronicException):
     _msg_fmt = _("Database version is too old")
 
@@ -691,3 +696,19 @@ class EnabledWebserviceNotFound(NotFound):
 
 class EnabledWebserviceAlreadyExists(Conflict):
     message = _("Already enabled for %(enabled_webservice)s.")
+
+
+class AsyncOperationNotFound(NotFound):
+    message = _("Operation %(operation)s could not be found.")
+
+
+class AsyncOperationAlreadyExists(Conflict):
+    message = _("An Operation with UUID %(uuid)s already exists.")
+
+
+class NoFreeAgentPort(TemporaryFailure):
+    message = _("No free %(kind)s port on the WampAgent %(agent)s.")
+
+
+class WampCallRejected(TemporaryFailure):
+    message = _("The WampAgent rejected the call %(call)s: %(reason)s.")
@@ -16,6 +16,7 @@
 import bisect
 import hashlib
 import threading
+import time
 
 from oslo_config import cfg
 import six
@@ -47,6 +48,10 @@ hash_opts = [
                     'conductor services to prepare deployment environments '
                     'and potentially allow the Iotronic cluster to recover '
                     'more quickly if a conductor instance is terminated.'),
+    cfg.IntOpt('hash_ring_reset_interval',
+               default=15,
+               help='Seconds after which the hash ring is checked against '
+                    'the active conductors and rebalanced if they changed.'),
 ]
 
 CONF = cfg.CONF
@@ -161,40 +166,46 @@ class HashRing(object):
 
 
 class HashRingManager(object):
-    _hash_rings = None
+    """Maps the boards onto the active conductors.
+
+    The ring is built from the conductors which checked in within
+    [conductor]heartbeat_timeout. Every hash_ring_reset_interval seconds
+    the active conductors are read again, and the ring is rebuilt if some
+    of them joined or left, moving only their share of the boards.
+    """
+
+    _hash_ring = None
+    _hash_ring_time = 0
     _lock = threading.Lock()
 
     def __init__(self):
         self.dbapi = dbapi.get_instance()
 
+    def _is_fresh(self):
+        return (time.time() - self._hash_ring_time <
+                CONF.hash_ring_reset_interval)
+
     @property
     def ring(self):
         # Hot path, no lock
-        if self._hash_rings is not None:
-            return self._hash_rings
+        if self._hash_ring is not None and self._is_fresh():
+            return self._hash_ring
 
         with self._lock:
-            if self._hash_rings is None:
-                rings = self._load_hash_rings()
-                self.__class__._hash_rings = rings
-            return self._hash_rings
-
-    def _load_hash_rings(self):
-        rings = {}
-        d2c = self.dbapi.get_active_driver_dict()
-
-        for driver_name, hosts in d2c.items():
-            rings[driver_name] = HashRing(hosts)
-        return rings
+            if self._hash_ring is None or not self._is_fresh():
+                hosts = self.dbapi.get_active_conductors()
+                if (self._hash_ring is None or
+                        self._hash_ring.hosts != set(hosts)):
+                    self.__class__._hash_ring = HashRing(hosts)
+                self.__class__._hash_ring_time = time.time()
+            return self._hash_ring
 
     @classmethod
     def reset(cls):
         with cls._lock:
-            cls._hash_rings = None
+            cls._hash_ring = None
 
-    def __getitem__(self, driver_name):
-        try:
-            return self.ring[driver_name]
-        except KeyError:
-            raise exception.DriverNotFound(
-                _("The driver '%s' is unknown.") % driver_name)
+    def get_host(self, data):
+        """Return the conductor owning data, None if none is active."""
+        hosts = self.ring.get_hosts(data)
+        return hosts[0] if hosts else None
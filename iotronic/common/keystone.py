@@ -12,6 +12,10 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import threading
+
+from keystoneauth1 import identity
+from keystoneauth1 import session as keystone_session
 from keystoneclient import exceptions as ksexception
 from oslo_config import cfg
 from six.moves.urllib import parse
@@ -30,6 +34,36 @@ keystone_opts = [
 CONF.register_opts(keystone_opts, group='keystone')
 CONF.import_group('keystone_authtoken', 'keystonemiddleware.auth_token')
 
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def get_session(group):
+    """Return the keystone session of a service, shared by the process.
+
+    The session keeps its token until it is about to expire and reuses its
+    HTTP connections, so the clients built on it neither authenticate nor
+    open a connection on every call.
+
+    :param group: the config group with the credentials of the service,
+        e.g. 'neutron'.
+    :returns: a keystoneauth1 Session.
+    """
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(group)
+        if session is None:
+            conf = CONF[group]
+            auth = identity.Password(
+                auth_url=conf.auth_url,
+                username=conf.username,
+                password=conf.password,
+                project_name=conf.project_name,
+                project_domain_id=conf.project_domain_id,
+                user_domain_id=conf.user_domain_id)
+            session = keystone_session.Session(auth=auth)
+            _SESSIONS[group] = session
+        return session
+
 
 def _is_apiv3(auth_url, auth_version):
     """Checks if V3 version of API is being used or not.
@@ -0,0 +1,79 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process timing metrics.
+
+Timings are aggregated by name (count, total, max seconds) and can be read
+with :func:`stats`, e.g. to log them or expose them from a service. Gauges
+hold the last value set, e.g. the depth of a queue, and are read with
+:func:`gauges`.
+"""
+
+import contextlib
+import threading
+import time
+
+_lock = threading.Lock()
+_timings = {}
+_gauges = {}
+
+
+def record(name, seconds):
+    """Record one timing sample under name."""
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            _timings[name] = [1, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Time the enclosed block and record it under name."""
+    start = time.time()
+    try:
+        yield
+    finally:
+        record(name, time.time() - start)
+
+
+def stats(prefix=''):
+    """Return the aggregated timings whose name starts with prefix."""
+    with _lock:
+        return dict((name, {'count': t[0],
+                            'total': t[1],
+                            'max': t[2],
+                            'avg': t[1] / t[0]})
+                    for name, t in _timings.items()
+                    if name.startswith(prefix))
+
+
+def gauge(name, value):
+    """Set the current value of name."""
+    with _lock:
+        _gauges[name] = value
+
+
+def gauges(prefix=''):
+    """Return the gauges whose name starts with prefix."""
+    with _lock:
+        return dict((name, value) for name, value in _gauges.items()
+                    if name.startswith(prefix))
+
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _gauges.clear()
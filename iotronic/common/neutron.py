@@ -13,8 +13,7 @@
 
 from iotronic.common import exception
 from iotronic.common.i18n import _
-from keystoneauth1 import identity
-from keystoneauth1 import session
+from iotronic.common import keystone
 from neutronclient.common import exceptions as neutron_exceptions
 from neutronclient.v2_0 import client as clientv20
 from oslo_config import cfg
@@ -61,25 +60,9 @@ CONF.register_opts(neutron_opts, 'neutron')
 
 DEFAULT_NEUTRON_URL = CONF.neutron.url
 
-_NEUTRON_SESSION = None
-
-"""def _get_neutron_session():
-    global _NEUTRON_SESSION
-    if not _NEUTRON_SESSION:
-        _NEUTRON_SESSION = keystone.get_session('neutron')
-    return _NEUTRON_SESSION
-"""
-
 
 def get_client(token=None):
-    auth = identity.Password(auth_url=CONF.neutron.auth_url,
-                             username=CONF.neutron.username,
-                             password=CONF.neutron.password,
-                             project_name=CONF.neutron.project_name,
-                             project_domain_id=CONF.neutron.project_domain_id,
-                             user_domain_id=CONF.neutron.user_domain_id)
-    sess = session.Session(auth=auth)
-    neutron = clientv20.Client(session=sess)
+    neutron = clientv20.Client(session=keystone.get_session('neutron'))
     return neutron
 
 
@@ -192,6 +175,24 @@ def _verify_security_groups(security_groups, client):
         raise exception.NetworkError(msg)
 
 
+def _port_body(board, network_uuid, subnet_uuid, security_groups=None):
+    port = {
+        'network_id': network_uuid,
+        'project_id': board.project,
+        'device_id': board.uuid,
+        'admin_state_up': True,
+        'device_owner': 'iot:board',
+        'binding:host_id': board.agent,
+        'fixed_ips': [{
+            'subnet_id': subnet_uuid
+        }]
+    }
+
+    if security_groups:
+        port['security_groups'] = security_groups
+    return port
+
+
 def add_port_to_network(board, network_uuid, subnet_uuid,
                         security_groups=None):
 
@@ -201,22 +202,8 @@ def add_port_to_network(board, network_uuid, subnet_uuid,
               '%(network_uuid)s.',
               {'wagent': board.agent, 'network_uuid': network_uuid})
 
-    body = {
-        'port': {
-            'network_id': network_uuid,
-            'project_id': board.project,
-            'device_id': board.uuid,
-            'admin_state_up': True,
-            'device_owner': 'iot:board',
-            'binding:host_id': board.agent,
-            'fixed_ips': [{
-                'subnet_id': subnet_uuid
-            }]
-        }
-    }
-
-    if security_groups:
-        body['port']['security_groups'] = security_groups
+    body = {'port': _port_body(board, network_uuid, subnet_uuid,
+                               security_groups)}
 
     try:
         port = client.create_port(body)
@@ -243,3 +230,4 @@ def delete_port(wagent, port_uuid):
         LOG.warning("Could not delete neutron port from wagent's "
                     "%(wagent)s : %(exc)s ", {'wagent': wagent, 'exc': e})
         return 0
+
@@ -0,0 +1,163 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Per-process cache of compiled delegation permissions.
+
+The cache holds four kinds of entries:
+
+- the base role of a user, if any;
+- the (type, operation) grants of a role;
+- the set of nodes a user is authorized on for a (type, operation) pair,
+  used only with ``[authorization]list_mode = list``;
+- the roles granting a (type, operation) pair.
+
+Entries expire after ``[authorization]cache_ttl`` seconds, and they are
+invalidated explicitly whenever a Delegation, Role or User object is
+created, updated or destroyed in this process. The TTL bounds the
+staleness of changes made by other processes, which is why the
+authorization on a given target never relies on a cached node set.
+"""
+
+import collections
+import threading
+import time
+
+from oslo_config import cfg
+
+authorization_opts = [
+    cfg.BoolOpt('enable_cache',
+                default=True,
+                help='Cache compiled delegation permissions in memory: '
+                     'the base roles of the users and the grants of the '
+                     'roles, and in "list" list_mode the authorized node '
+                     'sets of the users. In "sql" list_mode the node sets '
+                     'are resolved by the list queries, never cached.'),
+    cfg.IntOpt('cache_ttl',
+               default=60,
+               help='Seconds a cached permission entry stays valid. The '
+                    'authorized node sets are cached only in "list" '
+                    'list_mode.'),
+    cfg.IntOpt('cache_size',
+               default=10000,
+               help='Maximum number of cached permission entries.'),
+    cfg.StrOpt('list_mode',
+               default='sql',
+               choices=['sql', 'list'],
+               help='How delegations restrict list queries: "sql" filters '
+                    'them with a subquery on the delegations table, "list" '
+                    'passes the list of the authorized node uuids, cached '
+                    'for cache_ttl seconds.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(authorization_opts, 'authorization')
+
+_USER = 'user'
+_ROLE = 'role'
+_NODES = 'nodes'
+_GRANTS = 'grants'
+
+
+class PermissionCache(object):
+    """A bounded, TTL based LRU cache of permission entries."""
+
+    _lock = threading.Lock()
+    _entries = collections.OrderedDict()
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def _get(cls, key):
+        if not CONF.authorization.enable_cache:
+            return None
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del cls._entries[key]
+                cls.misses += 1
+                return None
+            cls._entries.move_to_end(key)
+            cls.hits += 1
+            return entry[1]
+
+    @classmethod
+    def _set(cls, key, value):
+        if not CONF.authorization.enable_cache:
+            return
+        expires = time.time() + CONF.authorization.cache_ttl
+        with cls._lock:
+            cls._entries[key] = (expires, value)
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > CONF.authorization.cache_size:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def get_base_role(cls, user):
+        return cls._get((_USER, user))
+
+    @classmethod
+    def set_base_role(cls, user, role):
+        cls._set((_USER, user), role)
+
+    @classmethod
+    def get_role_grants(cls, role):
+        return cls._get((_ROLE, role))
+
+    @classmethod
+    def set_role_grants(cls, role, grants):
+        cls._set((_ROLE, role), grants)
+
+    @classmethod
+    def get_nodes(cls, user, type, op):
+        return cls._get((_NODES, user, type, op))
+
+    @classmethod
+    def set_nodes(cls, user, type, op, nodes):
+        cls._set((_NODES, user, type, op), frozenset(nodes))
+
+    @classmethod
+    def get_granting_roles(cls, type, op):
+        return cls._get((_GRANTS, type, op))
+
+    @classmethod
+    def set_granting_roles(cls, type, op, roles):
+        cls._set((_GRANTS, type, op), tuple(roles))
+
+    @classmethod
+    def invalidate_user(cls, user):
+        """Drop every entry computed for a user."""
+        with cls._lock:
+            for key in list(cls._entries):
+                if key[0] in (_USER, _NODES) and key[1] == user:
+                    del cls._entries[key]
+
+    @classmethod
+    def invalidate_nodes(cls):
+        """Drop every authorized node set, e.g. when a node is removed."""
+        with cls._lock:
+            for key in list(cls._entries):
+                if key[0] == _NODES:
+                    del cls._entries[key]
+
+    @classmethod
+    def reset(cls):
+        """Drop every entry; role changes affect all the users."""
+        with cls._lock:
+            cls._entries.clear()
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            return {'hits': cls.hits,
+                    'misses': cls.misses,
+                    'entries': len(cls._entries)}
@@ -20,3 +20,9 @@
 OFFLINE = 'offline'
 REGISTERED = 'registered'
 ONLINE = 'online'
+
+# asynchronous operations, and their entries on each board
+OPERATION_PENDING = 'pending'
+OPERATION_RUNNING = 'running'
+OPERATION_COMPLETED = 'completed'
+OPERATION_FAILED = 'failed'
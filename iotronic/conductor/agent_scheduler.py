@@ -0,0 +1,151 @@
+# coding=utf-8
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Selection of the WAMP agent a registering board is assigned to.
+"""
+
+import math
+import threading
+import time
+
+from iotronic.common import exception
+from iotronic import objects
+from oslo_config import cfg
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+scheduler_opts = [
+    cfg.IntOpt('agent_load_ttl',
+               default=30,
+               help='Seconds the load of the wamp agents is cached before '
+                    'being read again from the sessions table.'),
+    cfg.IntOpt('agent_capacity',
+               default=1000,
+               help='Number of boards a wamp agent can serve, unless set '
+                    'in agent_capacities.'),
+    cfg.DictOpt('agent_capacities',
+                default={},
+                help='Number of boards served by specific wamp agents, as '
+                     'hostname:capacity pairs.'),
+    cfg.DictOpt('agent_locations',
+                default={},
+                help='Position of the wamp agents, as '
+                     'hostname:latitude;longitude pairs.'),
+    cfg.FloatOpt('agent_location_weight',
+                 default=0.0,
+                 help='How much the distance of an agent from the board '
+                      'counts against its load: an agent 1000 km away '
+                      'weighs as this fraction of its capacity. 0 ignores '
+                      'the location of the boards.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(scheduler_opts, 'conductor')
+
+_EARTH_RADIUS = 6371.0
+
+
+def _coordinates(latitude, longitude):
+    try:
+        return float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+
+
+def _distance(a, b):
+    """Return the great-circle distance in km between two coordinates."""
+    lat1, lon1, lat2, lon2 = map(math.radians, a + b)
+    h = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * _EARTH_RADIUS * math.asin(min(1.0, math.sqrt(h)))
+
+
+class AgentScheduler(object):
+    """Assigns boards to the least loaded online wamp agents.
+
+    The load of an agent is the number of valid sessions of its boards,
+    relative to its capacity. The view of the loads is read at most every
+    agent_load_ttl seconds; in between, the boards assigned by this
+    process are added to it, so that a burst of registrations is spread
+    over the agents instead of going all to the same one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loads = None
+        self._expires = 0
+
+    def _refresh(self, ctx):
+        agents = objects.WampAgent.list(ctx, filters={'online': True})
+        sessions = objects.WampAgent.dbapi.get_wampagent_loads()
+        self._loads = dict((a.hostname, sessions.get(a.hostname, 0))
+                           for a in agents)
+        self._expires = time.time() + CONF.conductor.agent_load_ttl
+
+    def _capacity(self, hostname):
+        try:
+            return max(int(CONF.conductor.agent_capacities[hostname]), 1)
+        except (KeyError, ValueError):
+            return max(CONF.conductor.agent_capacity, 1)
+
+    def _position(self, hostname):
+        position = CONF.conductor.agent_locations.get(hostname)
+        if not position or ';' not in position:
+            return None
+        return _coordinates(*position.split(';', 1))
+
+    def _score(self, hostname, load, board_position):
+        score = float(load) / self._capacity(hostname)
+        weight = CONF.conductor.agent_location_weight
+        if weight and board_position:
+            position = self._position(hostname)
+            if position:
+                score += weight * _distance(board_position, position) / 1000
+        return score
+
+    def select(self, ctx, location=None):
+        """Choose the agent for a board and account for it.
+
+        :param ctx: request context.
+        :param location: optional, the Location of the board.
+        :returns: the hostname of the selected agent.
+        :raises: NoValidHost if no agent is online.
+        """
+        board_position = None
+        if location is not None:
+            board_position = _coordinates(location.latitude,
+                                          location.longitude)
+
+        with self._lock:
+            if self._loads is None or time.time() > self._expires:
+                self._refresh(ctx)
+            if not self._loads:
+                raise exception.NoValidHost(reason='no wamp agent is online')
+
+            free = [h for h, load in self._loads.items()
+                    if load < self._capacity(h)]
+            hostname = min(free or self._loads,
+                           key=lambda h: (self._score(h, self._loads[h],
+                                                      board_position), h))
+            self._loads[hostname] += 1
+
+        LOG.debug('Selected agent %s (%d boards)', hostname,
+                  self._loads[hostname])
+        return hostname
+
+    def reset(self):
+        with self._lock:
+            self._loads = None
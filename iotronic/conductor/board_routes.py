@@ -0,0 +1,120 @@
+# coding=utf-8
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Routing table of the connected boards, used to reach them on their agent.
+"""
+
+import collections
+import threading
+import time
+
+from iotronic.common import states
+from iotronic import objects
+from oslo_config import cfg
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+routes_opts = [
+    cfg.IntOpt('board_route_ttl',
+               default=30,
+               help='Seconds the agent and session of a board are cached '
+                    'before being read again from the database. 0 disables '
+                    'the cache.'),
+    cfg.IntOpt('board_route_cache_size',
+               default=10000,
+               help='Maximum number of boards in the routing cache.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(routes_opts, 'conductor')
+
+Route = collections.namedtuple('Route', ['agent', 'session_id', 'status'])
+
+
+class BoardRoutes(object):
+    """A bounded, TTL based LRU cache of the routes of the boards.
+
+    Only the routes of the online boards are cached, so that a board which
+    connects again is never refused because of a stale entry. The entries
+    are invalidated when the session of a board changes: by registration in
+    this process, and by the fanout cast of the wamp agents when a board
+    connects or leaves. A route gone stale anyway fails on the agent and is
+    invalidated by the caller; the TTL bounds how long it can be used.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, board_uuid):
+        with self._lock:
+            entry = self._entries.get(board_uuid)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[board_uuid]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(board_uuid)
+            self.hits += 1
+            return entry[1]
+
+    def _set(self, board_uuid, route):
+        expires = time.time() + CONF.conductor.board_route_ttl
+        with self._lock:
+            self._entries[board_uuid] = (expires, route)
+            self._entries.move_to_end(board_uuid)
+            while len(self._entries) > CONF.conductor.board_route_cache_size:
+                self._entries.popitem(last=False)
+
+    def get(self, ctx, board_uuid):
+        """Return the route of a board, reading it from the DB if needed.
+
+        :param ctx: request context.
+        :param board_uuid: the uuid of the board.
+        :returns: a :class:`Route`.
+        :raises: BoardNotFound if the board does not exist.
+        :raises: SessionWPNotFound if the board has no valid session.
+        """
+        board_uuid = str(board_uuid)
+        if CONF.conductor.board_route_ttl > 0:
+            route = self._get(board_uuid)
+            if route is not None:
+                return route
+
+        board = objects.Board.get_by_uuid(ctx, board_uuid)
+        session = objects.SessionWP.get_session_by_board_uuid(ctx, board_uuid)
+        route = Route(board.agent, session.session_id, board.status)
+        if (CONF.conductor.board_route_ttl > 0 and
+                route.status == states.ONLINE):
+            self._set(board_uuid, route)
+        return route
+
+    def invalidate(self, board_uuid):
+        with self._lock:
+            if self._entries.pop(str(board_uuid), None) is not None:
+                LOG.debug('Route of board %s invalidated', board_uuid)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'entries': len(self._entries)}
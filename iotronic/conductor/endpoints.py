@@ -21,9 +21,13 @@ except Exception:
     # allow iotronic api to run also with python2.7
     import pickle as cpickle
 
+import collections
+from concurrent import futures
 from iotronic.common import exception, designate
 from iotronic.common import neutron
 from iotronic.common import states
+from iotronic.conductor import agent_scheduler
+from iotronic.conductor import board_routes
 from iotronic.conductor.provisioner import Provisioner
 from iotronic import objects
 from iotronic.objects import base as objects_base
@@ -31,26 +35,50 @@ from iotronic.wamp import wampmessage as wm
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging
-import random
 import socket
+import time
 
 LOG = logging.getLogger(__name__)
 
 serializer = objects_base.IotronicObjectSerializer()
 
-Port = list()
+_agent_scheduler = agent_scheduler.AgentScheduler()
 
+_board_routes = board_routes.BoardRoutes()
 
-def get_best_agent(ctx):
-    agents = objects.WampAgent.list(ctx, filters={'online': True})
-    LOG.debug('found %d Agent(s).', len(agents))
-    agent = random.choice(agents)
-    LOG.debug('Selected agent: %s', agent.hostname)
-    return agent.hostname
+# the methods the API can run as asynchronous operations
+ASYNC_METHODS = ('inject_plugin', 'action_plugin', 'enable_webservice',
+                 'create_port_on_board')
 
 
-def random_public_port():
-    return random.randint(50001, 59999)
+def get_best_agent(ctx, location=None):
+    return _agent_scheduler.select(ctx, location)
+
+
+def reserve_public_port(ctx, board):
+    return objects.AgentPort.reserve(ctx, board.agent,
+                                     objects.agentport.PUBLIC, board.uuid,
+                                     cfg.CONF.conductor.public_port_min,
+                                     cfg.CONF.conductor.public_port_max)
+
+
+def reserve_socat_port(ctx, board):
+    return objects.AgentPort.reserve(ctx, board.agent,
+                                     objects.agentport.SOCAT, board.uuid,
+                                     cfg.CONF.conductor.socat_port_min,
+                                     cfg.CONF.conductor.socat_port_max)
+
+
+def plugin_payloads(plugin):
+    """Serialize a plugin once for any number of injections.
+
+    :param plugin: a :class:`Plugin`.
+    :returns: the payload with the code, and the one carrying only its
+              hash, for the boards already holding that code.
+    """
+    payload = objects_base.obj_to_primitive(plugin)
+    by_hash = dict(payload, code=None)
+    return payload, by_hash
 
 
 def manage_result(res, wamp_rpc_call, board_uuid):
@@ -60,7 +88,7 @@ def manage_result(res, wamp_rpc_call, board_uuid):
         LOG.warning('Warning in the execution of %s on %s', wamp_rpc_call,
                     board_uuid)
         return res.message
-    elif res.result == wm.ERROR:
+    elif res.result in (wm.ERROR, wm.REJECTED):
         LOG.error('Error in the execution of %s on %s: %s', wamp_rpc_call,
                   board_uuid, res.message)
         raise exception.ErrorExecutionOnBoard(call=wamp_rpc_call,
@@ -115,6 +143,12 @@ class ConductorEndpoint(object):
                                                                 topic='s4t')
         self.ragent = ragent
 
+        # bounds the boards a fleet action runs on at the same time
+        self.fleet_executor = futures.ThreadPoolExecutor(
+            max_workers=cfg.CONF.conductor.fleet_action_workers)
+        self.async_executor = futures.ThreadPoolExecutor(
+            max_workers=cfg.CONF.conductor.async_workers)
+
     def echo(self, ctx, data):
         LOG.info("ECHO: %s" % data)
         return data
@@ -145,6 +179,7 @@ class ConductorEndpoint(object):
                         'session_id': session_num}
         session = objects.SessionWP(ctx, **session_data)
         session.create()
+        _board_routes.invalidate(board.uuid)
 
         if not board.status == states.REGISTERED:
             msg = "board with code %(board)s " \
@@ -156,14 +191,14 @@ class ConductorEndpoint(object):
             wmessage = wm.WampSuccess(board.config)
             return wmessage.serialize()
 
-        board.agent = get_best_agent(ctx)
+        loc = objects.Location.list_by_board_uuid(ctx, board.uuid)[0]
+        board.agent = get_best_agent(ctx, loc)
         agent = objects.WampAgent.get_by_hostname(ctx, board.agent)
 
         prov = Provisioner(board)
         prov.conf_registration_agent(self.ragent.wsurl)
 
         prov.conf_main_agent(agent.wsurl)
-        loc = objects.Location.list_by_board_uuid(ctx, board.uuid)[0]
         prov.conf_location(loc)
         board.config = prov.get_config()
 
@@ -194,6 +229,7 @@ class ConductorEndpoint(object):
             except exception:
                 return exception
         board.destroy()
+        _board_routes.invalidate(board.uuid)
         if result:
             result = manage_result(result, 'destroyBoard', board_id)
             LOG.debug(result)
@@ -204,6 +240,7 @@ class ConductorEndpoint(object):
         board = serializer.deserialize_entity(ctx, board_obj)
         LOG.debug('Updating board %s', board.name)
         board.save()
+        _board_routes.invalidate(board.uuid)
         return serializer.serialize_entity(ctx, board)
 
     def create_board(self, ctx, board_obj, location_obj):
@@ -217,30 +254,169 @@ class ConductorEndpoint(object):
 
         return serializer.serialize_entity(ctx, new_board)
 
+    def create_boards(self, ctx, board_objs, location_objs, owner):
+        boards = serializer.deserialize_entity(ctx, board_objs)
+        locations = serializer.deserialize_entity(ctx, location_objs)
+        LOG.debug('Creating %d boards', len(boards))
+        results = objects.Board.create_batch(ctx, boards, locations, owner)
+
+        res = []
+        for board, result in zip(boards, results):
+            if isinstance(result, Exception):
+                res.append({'code': board.code, 'error': str(result)})
+            else:
+                res.append({'code': result.code, 'uuid': result.uuid})
+        return res
+
     def execute_on_board(self, ctx, board_uuid, wamp_rpc_call, wamp_rpc_args):
         LOG.debug('Executing \"%s\" on the board: %s',
                   wamp_rpc_call, board_uuid)
 
-        board = objects.Board.get_by_uuid(ctx, board_uuid)
-        # session should be taken from board, not from the object
-
-        session = objects.SessionWP.get_session_by_board_uuid(ctx, board_uuid)
+        # agent and session of the board, from the DB unless cached
+        route = _board_routes.get(ctx, board_uuid)
         full_wamp_call = 'iotronic.' + \
-                         session.session_id + "." + \
-                         board.uuid + "." + wamp_rpc_call
+                         route.session_id + "." + \
+                         str(board_uuid) + "." + wamp_rpc_call
 
         # check the session; it rise an excpetion if session miss
-        if not board.is_online():
-            raise exception.BoardNotConnected(board=board.uuid)
+        if route.status != states.ONLINE:
+            raise exception.BoardNotConnected(board=board_uuid)
 
-        cctx = self.wamp_agent_client.prepare(server=board.agent)
-        res = cctx.call(ctx, 's4t_invoke_wamp',
-                        wamp_rpc_call=full_wamp_call,
-                        data=wamp_rpc_args)
+        cctx = self.wamp_agent_client.prepare(server=route.agent)
+        try:
+            res = cctx.call(ctx, 's4t_invoke_wamp',
+                            wamp_rpc_call=full_wamp_call,
+                            data=wamp_rpc_args)
+        except Exception:
+            # the board may have moved to another session or agent
+            _board_routes.invalidate(board_uuid)
+            raise
         res = wm.deserialize(res)
 
         return res
 
+    def execute_on_boards(self, ctx, calls):
+        """Execute calls on many boards with one RPC per wamp agent.
+
+        The calls are grouped by the agent of their board, in batches of
+        at most wamp_batch_size calls sent one at a time, which the agent
+        runs concurrently. The calls the agent rejects because it is busy
+        are sent again, up to wamp_rejected_retries times.
+
+        Unlike :meth:`execute_on_board`, a call failing on the board or on
+        the agent, or timing out, does not raise: the agent replies to it
+        with a WampError, which manage_result turns into an exception. Only
+        the calls which could not be routed or sent come back as exceptions,
+        as do the failures of the calls falling back to execute_on_board on
+        agents not knowing the batch: callers have to handle both.
+
+        :param ctx: request context.
+        :param calls: a list of (board_uuid, wamp_rpc_call, wamp_rpc_args).
+        :returns: the WampMessage of every call, in order, or the exception
+                  which prevented it.
+        """
+        results = [None] * len(calls)
+        batches = collections.defaultdict(list)
+        for i, (board_uuid, wamp_rpc_call, wamp_rpc_args) in enumerate(calls):
+            try:
+                route = _board_routes.get(ctx, board_uuid)
+                if route.status != states.ONLINE:
+                    raise exception.BoardNotConnected(board=board_uuid)
+            except Exception as e:
+                results[i] = e
+                continue
+            full_wamp_call = 'iotronic.' + route.session_id + "." + \
+                             str(board_uuid) + "." + wamp_rpc_call
+            batches[route.agent].append(
+                (i, {'wamp_rpc_call': full_wamp_call,
+                     'data': wamp_rpc_args}))
+
+        size = max(cfg.CONF.conductor.wamp_batch_size, 1)
+        for agent, batch in batches.items():
+            cctx = self.wamp_agent_client.prepare(server=agent)
+            for start in range(0, len(batch), size):
+                chunk = batch[start:start + size]
+                self._execute_batch(ctx, cctx, calls, chunk, results)
+        return results
+
+    def _execute_batch(self, ctx, cctx, calls, chunk, results):
+        retries = cfg.CONF.conductor.wamp_rejected_retries
+        for attempt in range(retries + 1):
+            if attempt:
+                LOG.warning('%d calls rejected by a busy wamp agent, '
+                            'retry %d of %d', len(chunk), attempt, retries)
+                time.sleep(cfg.CONF.conductor.wamp_rejected_backoff *
+                           2 ** (attempt - 1))
+            try:
+                replies = cctx.call(ctx, 's4t_invoke_wamp_batch',
+                                    calls=[kwarg for i, kwarg in chunk])
+            except Exception as e:
+                if (isinstance(e, oslo_messaging.RemoteError) and
+                        e.exc_type == 'NoSuchMethod'):
+                    # agents not knowing the batch get a call at a time
+                    for i, kwarg in chunk:
+                        try:
+                            results[i] = self.execute_on_board(ctx,
+                                                               *calls[i])
+                        except Exception as err:
+                            results[i] = err
+                    return
+                for i, kwarg in chunk:
+                    _board_routes.invalidate(calls[i][0])
+                    results[i] = e
+                return
+
+            rejected = []
+            for (i, kwarg), reply in zip(chunk, replies):
+                results[i] = wm.deserialize(reply)
+                if results[i].result == wm.REJECTED:
+                    rejected.append((i, kwarg))
+            if not rejected:
+                return
+            # the last replies of the calls still rejected are kept
+            chunk = rejected
+
+    def invalidate_board_routes(self, ctx, board_uuids):
+        for board_uuid in board_uuids:
+            _board_routes.invalidate(board_uuid)
+
+    def _run_async(self, ctx, operation_uuid, method, kwargs):
+        operation = objects.AsyncOperation.get_by_uuid(ctx, operation_uuid)
+        operation.status = states.OPERATION_RUNNING
+        operation.save()
+
+        try:
+            result = getattr(self, method)(ctx, **kwargs)
+            # some methods return the exception module on failure
+            if result is exception or isinstance(result, Exception):
+                raise exception.IotronicException(
+                    "Error executing %s" % method)
+            if isinstance(result, objects_base.IotronicObject):
+                result = result.obj_to_primitive()
+            if isinstance(result, dict) and 'iotronic_object.data' in result:
+                result = result['iotronic_object.data']
+            operation.status = states.OPERATION_COMPLETED
+            operation.result = {'result': result}
+        except Exception as e:
+            LOG.error('Error executing %s (operation %s): %s',
+                      method, operation_uuid, e)
+            operation.status = states.OPERATION_FAILED
+            operation.result = {'error': str(e)}
+        operation.save()
+
+    def run_async(self, ctx, operation_uuid, method, kwargs):
+        if method not in ASYNC_METHODS:
+            LOG.error('%s cannot run as an asynchronous operation', method)
+            operation = objects.AsyncOperation.get_by_uuid(ctx,
+                                                           operation_uuid)
+            operation.status = states.OPERATION_FAILED
+            operation.result = {'error': 'Invalid method %s' % method}
+            operation.save()
+            return
+        LOG.debug('Running %s as operation %s', method, operation_uuid)
+        self.async_executor.submit(self._run_async, ctx, operation_uuid,
+                                   method, kwargs)
+
     def destroy_plugin(self, ctx, plugin_id):
         LOG.info('Destroying plugin with id %s',
                  plugin_id)
@@ -267,13 +443,22 @@ class ConductorEndpoint(object):
                  plugin_uuid, board_uuid)
 
         plugin = objects.Plugin.get(ctx, plugin_uuid)
+        return self._inject_plugin(ctx, plugin, board_uuid, onboot,
+                                   plugin_payloads(plugin))
+
+    def _board_has_code(self, ctx, board_uuid, plugin):
+        # boards not knowing PluginCheck fail and get the whole code
         try:
-            result = self.execute_on_board(ctx,
-                                           board_uuid,
-                                           'PluginInject',
-                                           (plugin, onboot))
-        except exception:
-            return exception
+            res = self.execute_on_board(ctx, board_uuid, 'PluginCheck',
+                                        (plugin.uuid, plugin.code_hash))
+        except Exception as e:
+            LOG.debug('Code of plugin %s not checked on the board %s: %s',
+                      plugin.uuid, board_uuid, e)
+            return False
+        return res.result == wm.SUCCESS and bool(res.message)
+
+    def _inject_plugin(self, ctx, plugin, board_uuid, onboot, payloads):
+        plugin_uuid = plugin.uuid
 
         injection = None
         try:
@@ -282,6 +467,23 @@ class ConductorEndpoint(object):
                                                     plugin_uuid)
         except Exception:
             pass
+
+        # only a board the plugin was injected into may hold its code
+        payload, by_hash = payloads
+        if (injection and plugin.code_hash and
+                self._board_has_code(ctx, board_uuid, plugin)):
+            LOG.debug('The board %s holds the code %s, sending its hash',
+                      board_uuid, plugin.code_hash)
+            payload = by_hash
+
+        try:
+            result = self.execute_on_board(ctx,
+                                           board_uuid,
+                                           'PluginInject',
+                                           (payload, onboot))
+        except exception:
+            return exception
+
         if injection:
             injection.status = 'updated'
             injection.save()
@@ -337,6 +539,98 @@ class ConductorEndpoint(object):
         LOG.debug(result)
         return result
 
+    def _action_on_fleet_board(self, ctx, operation_uuid, board_uuid, action,
+                               params, plugin_uuid, service_uuid,
+                               plugin=None, payloads=None):
+        try:
+            if action == objects.plugin.INJECT:
+                result = self._inject_plugin(ctx, plugin, board_uuid,
+                                             params.get('onboot', False),
+                                             payloads)
+            elif plugin_uuid:
+                result = self.action_plugin(ctx, plugin_uuid, board_uuid,
+                                            action, params)
+            else:
+                result = self.action_service(ctx, service_uuid, board_uuid,
+                                             action)
+            if isinstance(result, Exception):
+                raise result
+            item = {'status': states.OPERATION_COMPLETED, 'result': result}
+        except Exception as e:
+            LOG.error('Error executing %s on the board %s: %s',
+                      action, board_uuid, e)
+            item = {'status': states.OPERATION_FAILED, 'error': str(e)}
+
+        operation = objects.AsyncOperation(ctx, uuid=operation_uuid)
+        operation.set_item(board_uuid, item)
+
+    def _plugin_action_on_fleet_boards(self, ctx, operation_uuid,
+                                       board_uuids, action, params,
+                                       plugin_uuid):
+        """Run a plugin action on the boards of a wamp agent.
+
+        The boards get the action a batch at a time, so that a fleet does
+        not send its agent more calls than it admits; the results of every
+        batch are written together.
+        """
+        if objects.plugin.want_params(action):
+            args = (plugin_uuid, params)
+        else:
+            args = (plugin_uuid,)
+        operation = objects.AsyncOperation(ctx, uuid=operation_uuid)
+        size = max(cfg.CONF.conductor.wamp_batch_size, 1)
+        for start in range(0, len(board_uuids), size):
+            chunk = board_uuids[start:start + size]
+            results = self.execute_on_boards(
+                ctx, [(board_uuid, action, args) for board_uuid in chunk])
+
+            items = {}
+            for board_uuid, res in zip(chunk, results):
+                try:
+                    if isinstance(res, Exception):
+                        raise res
+                    items[board_uuid] = {
+                        'status': states.OPERATION_COMPLETED,
+                        'result': manage_result(res, action, board_uuid)}
+                except Exception as e:
+                    LOG.error('Error executing %s on the board %s: %s',
+                              action, board_uuid, e)
+                    items[board_uuid] = {'status': states.OPERATION_FAILED,
+                                         'error': str(e)}
+            operation.set_items(items)
+
+    def action_fleet(self, ctx, operation_uuid, board_uuids, action, params,
+                     plugin_uuid=None, service_uuid=None):
+        LOG.info('Executing %s on %d boards (operation %s)',
+                 action, len(board_uuids), operation_uuid)
+        if plugin_uuid and action != objects.plugin.INJECT:
+            # one worker per agent, sending it a batch at a time; the
+            # boards without a route fail together
+            by_agent = collections.defaultdict(list)
+            for board_uuid in board_uuids:
+                try:
+                    agent = _board_routes.get(ctx, board_uuid).agent
+                except Exception:
+                    agent = None
+                by_agent[agent].append(board_uuid)
+            for agent_boards in by_agent.values():
+                self.fleet_executor.submit(
+                    self._plugin_action_on_fleet_boards, ctx,
+                    operation_uuid, agent_boards, action, params,
+                    plugin_uuid)
+            return
+
+        plugin = payloads = None
+        if action == objects.plugin.INJECT:
+            # every board of the fleet gets the same payload
+            plugin = objects.Plugin.get(ctx, plugin_uuid)
+            payloads = plugin_payloads(plugin)
+        for board_uuid in board_uuids:
+            self.fleet_executor.submit(self._action_on_fleet_board, ctx,
+                                       operation_uuid, board_uuid, action,
+                                       params, plugin_uuid, service_uuid,
+                                       plugin, payloads)
+
     def create_service(self, ctx, service_obj):
         new_service = serializer.deserialize_entity(ctx, service_obj)
         LOG.debug('Creating service %s',
@@ -370,11 +664,16 @@ class ConductorEndpoint(object):
                                            service_uuid)
                 return exception.ServiceAlreadyExposed(uuid=service_uuid)
             except Exception:
-                public_port = random_public_port()
+                board = objects.Board.get_by_uuid(ctx, board_uuid)
+                public_port = reserve_public_port(ctx, board)
 
-                res = self.execute_on_board(ctx, board_uuid, action,
-                                            (service, public_port))
-                result = manage_result(res, action, board_uuid)
+                try:
+                    res = self.execute_on_board(ctx, board_uuid, action,
+                                                (service, public_port))
+                    result = manage_result(res, action, board_uuid)
+                except Exception:
+                    objects.AgentPort.release(ctx, board.agent, public_port)
+                    raise
 
                 exp_data = {
                     'board_uuid': board_uuid,
@@ -400,6 +699,8 @@ class ConductorEndpoint(object):
             result = manage_result(res, action, board_uuid)
             LOG.debug(res.message)
             exposed.destroy()
+            board = objects.Board.get_by_uuid(ctx, board_uuid)
+            objects.AgentPort.release(ctx, board.agent, exposed.public_port)
             return result
 
         elif action == "ServiceRestore":
@@ -418,15 +719,45 @@ class ConductorEndpoint(object):
     def restore_services_on_board(self, ctx, board_uuid):
         LOG.info('Restoring the services into the board %s',
                  board_uuid)
-        exposed_list = objects.ExposedService.get_by_board_uuid(ctx,
-                                                                board_uuid)
-
-        for exposed in exposed_list:
-            service = objects.Service.get_by_uuid(ctx, exposed.service_uuid)
-            self.execute_on_board(ctx, board_uuid, "ServiceRestore",
-                                  (service, exposed.public_port))
+        exposed_list = objects.ExposedService.get_with_services_by_board_uuid(
+            ctx, board_uuid)
+        if not exposed_list:
+            return []
 
-        return 0
+        restore = [(service, exposed.public_port)
+                   for exposed, service in exposed_list]
+        try:
+            res = self.execute_on_board(ctx, board_uuid, "ServicesRestore",
+                                        (restore,))
+        except Exception as e:
+            # boards not knowing ServicesRestore get a call per service
+            LOG.debug('ServicesRestore failed on the board %s (%s), '
+                      'restoring one service at a time', board_uuid, e)
+            return [self._restore_service(ctx, board_uuid, service,
+                                          public_port)
+                    for service, public_port in restore]
+
+        # the board replies with the result of every service by uuid
+        results = res.message if isinstance(res.message, dict) else {}
+        return [{'service': service.uuid,
+                 'public_port': public_port,
+                 'status': res.result,
+                 'result': results.get(service.uuid, res.message)}
+                for service, public_port in restore]
+
+    def _restore_service(self, ctx, board_uuid, service, public_port):
+        item = {'service': service.uuid, 'public_port': public_port}
+        try:
+            res = self.execute_on_board(ctx, board_uuid, "ServiceRestore",
+                                        (service, public_port))
+            item['status'] = res.result
+            item['result'] = res.message
+        except Exception as e:
+            LOG.error('Error restoring the service %s on the board %s: %s',
+                      service.uuid, board_uuid, e)
+            item['status'] = wm.ERROR
+            item['error'] = str(e)
+        return item
 
     def create_port_on_board(self, ctx, board_uuid, network_uuid,
                              subnet_uuid, security_groups=None):
@@ -440,23 +771,15 @@ class ConductorEndpoint(object):
         subnet_info = neutron.subnet_info(subnet_uuid)
         cidr = str(subnet_info['subnet']['cidr'])
         slash = cidr.split("/", 1)[1]
+        port_socat = None
+        error = None
         try:
 
             port = neutron.add_port_to_network(board, network_uuid,
                                                subnet_uuid, security_groups)
             p = str(port['port']['id'])
 
-            port_socat = random.randint(10000, 20000)
-
-            global Port
-            i = 0
-            while i < len(Port):
-                if Port[i] == port_socat:
-                    i = 0
-                    port_socat = random.randint(10000, 20000)
-                i += 1
-
-            Port.insert(0, port_socat)
+            port_socat = reserve_socat_port(ctx, board)
             r_tcp_port = str(port_socat)
 
             try:
@@ -482,6 +805,7 @@ class ConductorEndpoint(object):
                             port['port']['fixed_ips'][0]['subnet_id']
                         port_iotronic.ip = \
                             port['port']['fixed_ips'][0]['ip_address']
+                        port_iotronic.tcp_port = port_socat
                         port_iotronic.create()
 
                         try:
@@ -491,20 +815,31 @@ class ConductorEndpoint(object):
                                                   (port_iotronic, slash,))
                             return port_iotronic
 
-                        except Exception:
+                        except Exception as e:
                             LOG.error("Error while configuring the VIF")
+                            error = 'error while configuring the VIF: %s' % e
 
                     except Exception as e:
                         LOG.error('Error while updating the DB :' + str(e))
+                        error = 'error while updating the DB: %s' % e
 
-                except Exception:
+                except Exception as e:
                     LOG.error('wamp client error')
+                    error = 'wamp client error: %s' % e
 
-            except Exception:
+            except Exception as e:
                 LOG.error('Error while creating the VIF')
+                error = 'error while creating the VIF: %s' % e
 
         except Exception as e:
             LOG.error(str(e))
+            error = str(e)
+
+        # once in the DB, the port is released when the VIF is removed
+        if port_socat is not None and not port_iotronic.obj_attr_is_set('id'):
+            objects.AgentPort.release(ctx, board.agent, port_socat)
+        # raised, so that an asynchronous operation is not completed
+        raise exception.PortCreationFailed(board=board_uuid, reason=error)
 
     def remove_VIF_from_board(self, ctx, board_uuid, port_uuid):
 
@@ -518,9 +853,6 @@ class ConductorEndpoint(object):
         try:
 
             self.execute_on_board(ctx, board_uuid, "Remove_VIF", (VIF_name,))
-            port_num = int(VIF_name[8:])
-            global Port
-            Port.remove(port_num)
             try:
                 LOG.info("Removing the port from Neutron "
                          "and Iotronic databases")
@@ -681,9 +1013,8 @@ class ConductorEndpoint(object):
 
         except Exception:
 
-            # TO BE CHANGED
-            https_port = random_public_port()
-            http_port = random_public_port()
+            https_port = reserve_public_port(ctx, board)
+            http_port = reserve_public_port(ctx, board)
 
             en_webservice = {
                 'board_uuid': board.uuid,
@@ -702,37 +1033,40 @@ class ConductorEndpoint(object):
         LOG.debug('Open ports on WampAgent %s for http and %s for https '
                   'on board %s', http_port, https_port, board.uuid)
 
-        service = objects.Service.get_by_name(ctx, 'webservice')
-
-        res = self.execute_on_board(ctx, board.uuid, "ServiceEnable",
-                                    (service, http_port))
-        result = manage_result(res, "ServiceEnable", board.uuid)
+        services = [(objects.Service.get_by_name(ctx, 'webservice'),
+                     http_port),
+                    (objects.Service.get_by_name(ctx, 'webservice_ssl'),
+                     https_port)]
 
-        exp_data = {
-            'board_uuid': board_uuid,
-            'service_uuid': service.uuid,
-            'public_port': http_port,
-        }
-        exposed = objects.ExposedService(ctx, **exp_data)
-        exposed.create()
+        # both the services are enabled with a single RPC to the agent
+        results = self.execute_on_boards(
+            ctx, [(board.uuid, "ServiceEnable", (service, port))
+                  for service, port in services])
 
-        LOG.debug(result)
-
-        service = objects.Service.get_by_name(ctx, 'webservice_ssl')
+        # the calls run concurrently: the services enabled on the board are
+        # recorded even if the other one failed, then the failure is raised
+        error = None
+        for (service, port), res in zip(services, results):
+            try:
+                if isinstance(res, Exception):
+                    raise res
+                result = manage_result(res, "ServiceEnable", board.uuid)
+            except Exception as e:
+                error = error or e
+                continue
 
-        res = self.execute_on_board(ctx, board.uuid, "ServiceEnable",
-                                    (service, https_port))
-        result = manage_result(res, "ServiceEnable", board.uuid)
+            exp_data = {
+                'board_uuid': board_uuid,
+                'service_uuid': service.uuid,
+                'public_port': port,
+            }
+            exposed = objects.ExposedService(ctx, **exp_data)
+            exposed.create()
 
-        exp_data = {
-            'board_uuid': board_uuid,
-            'service_uuid': service.uuid,
-            'public_port': https_port,
-        }
-        exposed = objects.ExposedService(ctx, **exp_data)
-        exposed.create()
+            LOG.debug(result)
 
-        LOG.debug(result)
+        if error is not None:
+            raise error
 
         cctx = self.wamp_agent_client.prepare(server=board.agent)
         cctx.call(ctx, 'enable_webservice', board=dns,
@@ -814,4 +1148,6 @@ class ConductorEndpoint(object):
         cctx.call(ctx, 'reload_proxy')
 
         webservice.destroy()
+        objects.AgentPort.release(ctx, board.agent, http_port)
+        objects.AgentPort.release(ctx, board.agent, https_port)
         return
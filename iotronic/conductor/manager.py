@@ -35,11 +35,54 @@ conductor_opts = [
                help='URL of Iotronic API service. If not set iotronic can '
                     'get the current value from the keystone service '
                     'catalog.'),
+    cfg.IntOpt('heartbeat_interval',
+               default=10,
+               help='Seconds between the check-ins of a conductor, which '
+                    'keep it in the hash ring of the active conductors.'),
     cfg.IntOpt('heartbeat_timeout',
                default=60,
                help='Maximum time (in seconds) since the last check-in '
                     'of a conductor. A conductor is considered inactive '
                     'when this time has been exceeded.'),
+    cfg.IntOpt('fleet_action_workers',
+               default=16,
+               help='Maximum number of boards an action on a fleet is '
+                    'executed on concurrently by a conductor. The plugin '
+                    'actions are batched: they run on this many wamp '
+                    'agents at a time, one batch per agent.'),
+    cfg.IntOpt('wamp_batch_size',
+               default=32,
+               help='Maximum number of calls to the boards sent to a wamp '
+                    'agent in a single RPC. Keep it below the '
+                    'max_inflight_calls of the agents.'),
+    cfg.IntOpt('wamp_rejected_retries',
+               default=5,
+               help='Number of times the calls of a batch rejected by a '
+                    'busy wamp agent are sent again.'),
+    cfg.FloatOpt('wamp_rejected_backoff',
+                 default=0.5,
+                 help='Seconds waited before sending again the calls '
+                      'rejected by a wamp agent, doubled at every retry.'),
+    cfg.PortOpt('public_port_min',
+                default=50001,
+                help='First port of the wampagents exposing the services '
+                     'of the boards.'),
+    cfg.PortOpt('public_port_max',
+                default=59999,
+                help='Last port of the wampagents exposing the services '
+                     'of the boards.'),
+    cfg.PortOpt('socat_port_min',
+                default=10000,
+                help='First port of the wampagents for the socat tunnels '
+                     'of the VIFs of the boards.'),
+    cfg.PortOpt('socat_port_max',
+                default=20000,
+                help='Last port of the wampagents for the socat tunnels '
+                     'of the VIFs of the boards.'),
+    cfg.IntOpt('async_workers',
+               default=16,
+               help='Number of threads running the asynchronous '
+                    'operations requested to a conductor.'),
 ]
 
 CONF = cfg.CONF
@@ -95,7 +138,15 @@ class ConductorManager(object):
         self.server.start()
 
         while True:
-            time.sleep(1)
+            time.sleep(CONF.conductor.heartbeat_interval)
+            self._heartbeat()
+
+    def _heartbeat(self):
+        try:
+            self.dbapi.touch_conductor(self.host)
+        except Exception as e:
+            LOG.warning("Conductor %(hostname)s failed to check in: %(err)s",
+                        {'hostname': self.host, 'err': e})
 
     def stop_handler(self, signum, frame):
         LOG.info("Stopping server")
@@ -14,11 +14,71 @@
 """
 Client side of the conductor RPC API.
 """
+import threading
+import time
+
+from iotronic.common import hash_ring
+from iotronic.common import metrics
 from iotronic.common import rpc
 from iotronic.conductor import manager
 from iotronic.objects import base
 import oslo_messaging
 
+_INSTANCE = None
+_INSTANCE_LOCK = threading.Lock()
+
+# time spent waiting for the conductor by the current request
+_accounting = threading.local()
+
+
+def get_instance():
+    """Return the ConductorAPI shared by the whole process.
+
+    Building a client means a new target, serializer and RPCClient, so
+    API workers reuse a single one, created on first use (after the
+    worker has been forked). Connections are pooled by the transport.
+    """
+    global _INSTANCE
+    if _INSTANCE is None:
+        with _INSTANCE_LOCK:
+            if _INSTANCE is None:
+                _INSTANCE = ConductorAPI()
+    return _INSTANCE
+
+
+def reset_rpc_time():
+    _accounting.seconds = 0.0
+
+
+def get_rpc_time():
+    """Return the seconds spent in RPC calls since reset_rpc_time()."""
+    return getattr(_accounting, 'seconds', 0.0)
+
+
+class _MeteredClient(object):
+    """Wraps an RPC client to time every call by method name."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def prepare(self, *args, **kwargs):
+        return _MeteredClient(self._client.prepare(*args, **kwargs))
+
+    def _timed(self, func, ctxt, method, **kwargs):
+        start = time.time()
+        try:
+            return func(ctxt, method, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            metrics.record('conductor_rpc.' + method, elapsed)
+            _accounting.seconds = get_rpc_time() + elapsed
+
+    def call(self, ctxt, method, **kwargs):
+        return self._timed(self._client.call, ctxt, method, **kwargs)
+
+    def cast(self, ctxt, method, **kwargs):
+        return self._timed(self._client.cast, ctxt, method, **kwargs)
+
 
 class ConductorAPI(object):
     """Client side of the conductor RPC API.
@@ -38,9 +98,25 @@ class ConductorAPI(object):
         target = oslo_messaging.Target(topic=self.topic,
                                        version='1.0')
         serializer = base.IotronicObjectSerializer()
-        self.client = rpc.get_client(target,
-                                     version_cap=self.RPC_API_VERSION,
-                                     serializer=serializer)
+        self.client = _MeteredClient(
+            rpc.get_client(target,
+                           version_cap=self.RPC_API_VERSION,
+                           serializer=serializer))
+        self.ring_manager = hash_ring.HashRingManager()
+
+    def _prepare(self, topic=None, board_uuid=None):
+        """Prepare a call to the conductor owning a board.
+
+        Board-scoped calls are sent to the server the board is mapped onto
+        by the hash ring of the active conductors, so that the state of a
+        board stays in one process; the other calls, and the board-scoped
+        ones when no conductor is active, use the shared topic.
+        """
+        server = None
+        if topic is None and board_uuid is not None:
+            server = self.ring_manager.get_host(str(board_uuid))
+        return self.client.prepare(topic=topic or self.topic, server=server,
+                                   version='1.0')
 
     def echo(self, context, data, topic=None):
         """Test
@@ -72,10 +148,25 @@ class ConductorAPI(object):
         :param session_num: wamp session number
         :param topic: RPC topic. Defaults to self.topic.
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=uuid)
         return cctxt.call(context, 'connection',
                           uuid=uuid, session_num=session_num)
 
+    def invalidate_board_routes(self, context, board_uuids, topic=None):
+        """Drop the cached routes of boards from every conductor.
+
+        Sent when the sessions of the boards change outside the conductors,
+        e.g. when the boards connect to or leave their wamp agent.
+
+        :param context: request context.
+        :param board_uuids: list of board uuids.
+        :param topic: RPC topic. Defaults to self.topic.
+        """
+        cctxt = self.client.prepare(topic=topic or self.topic, fanout=True,
+                                    version='1.0')
+        cctxt.cast(context, 'invalidate_board_routes',
+                   board_uuids=board_uuids)
+
     def create_board(self, context, board_obj, location_obj, topic=None):
         """Add a board on the cloud
 
@@ -89,6 +180,23 @@ class ConductorAPI(object):
         return cctxt.call(context, 'create_board',
                           board_obj=board_obj, location_obj=location_obj)
 
+    def create_boards(self, context, board_objs, location_objs, owner,
+                      topic=None):
+        """Add a batch of boards on the cloud
+
+        :param context: request context.
+        :param board_objs: changed (but not saved) board objects.
+        :param location_objs: the location object of every board.
+        :param owner: uuid of the user owning the boards.
+        :param topic: RPC topic. Defaults to self.topic.
+        :returns: for every board, a dict with its code and either its
+                  uuid or the error preventing its creation.
+
+        """
+        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        return cctxt.call(context, 'create_boards', board_objs=board_objs,
+                          location_objs=location_objs, owner=owner)
+
     def update_board(self, context, board_obj, topic=None):
         """Synchronously, have a conductor update the board's information.
 
@@ -104,7 +212,7 @@ class ConductorAPI(object):
         :returns: updated board object, including all fields.
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_obj.uuid)
         return cctxt.call(context, 'update_board', board_obj=board_obj)
 
     def destroy_board(self, context, board_id, topic=None):
@@ -118,12 +226,12 @@ class ConductorAPI(object):
         :raises: InvalidState if the board is in the wrong provision
             state to perform deletion.
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_id)
         return cctxt.call(context, 'destroy_board', board_id=board_id)
 
     def execute_on_board(self, context, board_uuid, wamp_rpc_call,
                          wamp_rpc_args=None, topic=None):
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
         return cctxt.call(context, 'execute_on_board', board_uuid=board_uuid,
                           wamp_rpc_call=wamp_rpc_call,
                           wamp_rpc_args=wamp_rpc_args)
@@ -179,7 +287,7 @@ class ConductorAPI(object):
         :param board_uuid: board id or uuid.
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
         return cctxt.call(context, 'inject_plugin', plugin_uuid=plugin_uuid,
                           board_uuid=board_uuid, onboot=onboot)
 
@@ -191,7 +299,7 @@ class ConductorAPI(object):
         :param board_uuid: board id or uuid.
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
         return cctxt.call(context, 'remove_plugin', plugin_uuid=plugin_uuid,
                           board_uuid=board_uuid)
 
@@ -204,10 +312,49 @@ class ConductorAPI(object):
         :param board_uuid: board id or uuid.
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
         return cctxt.call(context, 'action_plugin', plugin_uuid=plugin_uuid,
                           board_uuid=board_uuid, action=action, params=params)
 
+    def action_fleet(self, context, operation_uuid, board_uuids, action,
+                     params, plugin_uuid=None, service_uuid=None,
+                     topic=None):
+        """Dispatch a plugin or service action to the boards of a fleet.
+
+        The call returns immediately: the conductor fills in the operation
+        with the result of every board as it replies.
+
+        :param context: request context.
+        :param operation_uuid: uuid of the operation tracking the action.
+        :param board_uuids: uuids of the boards of the fleet.
+        :param action: the plugin or service action.
+        :param params: the parameters of a plugin action.
+        :param plugin_uuid: plugin uuid, for plugin actions.
+        :param service_uuid: service uuid, for service actions.
+
+        """
+        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt.cast(context, 'action_fleet', operation_uuid=operation_uuid,
+                   board_uuids=board_uuids, action=action, params=params,
+                   plugin_uuid=plugin_uuid, service_uuid=service_uuid)
+
+    def run_async(self, context, operation_uuid, method, kwargs,
+                  topic=None):
+        """Run a conductor method in background.
+
+        The call returns immediately: the conductor stores the status and
+        the result of the method in the operation.
+
+        :param context: request context.
+        :param operation_uuid: uuid of the operation tracking the method.
+        :param method: the name of the method, e.g. 'action_plugin'.
+        :param kwargs: the arguments of the method.
+
+        """
+        cctxt = self._prepare(topic, board_uuid=kwargs.get('board_uuid'))
+        cctxt.cast(context, 'run_async', operation_uuid=operation_uuid,
+                   method=method, kwargs=kwargs)
+
     def create_service(self, context, service_obj, topic=None):
         """Add a service on the cloud
 
@@ -259,7 +406,7 @@ class ConductorAPI(object):
         :param board_uuid: board id or uuid.
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
 
         return cctxt.call(context, 'action_service', service_uuid=service_uuid,
                           board_uuid=board_uuid, action=action)
@@ -270,9 +417,10 @@ class ConductorAPI(object):
 
         :param context: request context.
         :param board_uuid: board id or uuid.
-
+        :returns: a list with the status and the result, or the error, of
+                  every service.
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
 
         return cctxt.call(context, 'restore_services_on_board',
                           board_uuid=board_uuid)
@@ -290,7 +438,7 @@ class ConductorAPI(object):
         :returns: created port object
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
         return cctxt.call(context, 'create_port_on_board',
                           board_uuid=board_uuid, network_uuid=network,
                           subnet_uuid=subnet, security_groups=sec_groups)
@@ -305,7 +453,7 @@ class ConductorAPI(object):
                 :returns: delete port object
 
                 """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
         return cctxt.call(context, 'remove_VIF_from_board',
                           board_uuid=board_uuid,
                           port_uuid=port_uuid)
@@ -384,7 +532,7 @@ class ConductorAPI(object):
         """Eneble a webservice on the board
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board)
         return cctxt.call(context, 'enable_webservice',
                           dns=dns, zone=zone, email=email, board_uuid=board)
 
@@ -392,6 +540,6 @@ class ConductorAPI(object):
         """Disable webservice manager.
 
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.0')
+        cctxt = self._prepare(topic, board_uuid=board_uuid)
         return cctxt.call(context, 'disable_webservice',
                           board_uuid=board_uuid)
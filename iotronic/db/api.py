@@ -120,9 +120,37 @@ class Connection(object):
         :returns: A list of tuples of the specified columns.
         """
 
+    @abc.abstractmethod
+    def create_board_batch(self, items):
+        """Create boards with their location and delegation in batch.
+
+        Boards are inserted in a single transaction, with one statement per
+        table; a board whose code is already taken is reported and skipped.
+
+        :param items: A list of (board values, location values, delegation
+                      values) tuples.
+        :returns: For every item, either the created board or the
+                  exception explaining why it was not created.
+        """
+
+    @abc.abstractmethod
+    def get_tables_version(self, tables):
+        """Return a value changing whenever one of the tables changes.
+
+        Every transaction writing a versioned table bumps its version when
+        it commits, so the versions change even within the same second.
+        The sessions, written by every presence batch, are not versioned:
+        their greatest id changes with every new session instead.
+
+        :param tables: the names of the tables.
+        :returns: A tuple with the version of every table, None for the
+                  tables which are not versioned.
+        """
+
     @abc.abstractmethod
     def get_board_list(self, authorized_boards, filters=None, limit=None,
-                       marker=None, sort_key=None, sort_dir=None):
+                       marker=None, sort_key=None, sort_dir=None,
+                       fields=None, cursor=None):
         """Return a list of boards.
 
         :param filters: Filters to apply. Defaults to None.
@@ -140,6 +168,21 @@ class Connection(object):
         :param sort_key: Attribute by which results should be sorted.
         :param sort_dir: direction in which results should be sorted.
                          (asc, desc)
+        :param fields: Columns to load. Defaults to all.
+        :param cursor: Optional, keyset pagination cursor: the sort_key and
+                       id values of the last board of the previous page.
+                       When set, marker is ignored.
+        """
+
+    @abc.abstractmethod
+    def get_board_iter(self, authorized_boards, filters=None, fields=None,
+                       batch_size=1000):
+        """Iterate over boards without loading them all in memory.
+
+        :param filters: Filters to apply. Defaults to None.
+        :param fields: Columns to load. Defaults to all.
+        :param batch_size: Number of rows fetched at a time.
+        :returns: A generator of boards, ordered by id.
         """
 
     @abc.abstractmethod
@@ -246,6 +289,15 @@ class Connection(object):
         :raises: ConductorNotFound
         """
 
+    @abc.abstractmethod
+    def get_active_conductors(self, interval=None):
+        """Return the hostnames of the active conductors.
+
+        :param interval: Seconds since the last check-in of an active
+                         conductor. Defaults to [conductor]heartbeat_timeout.
+        :returns: A sorted list of hostnames.
+        """
+
     @abc.abstractmethod
     def create_session(self, values):
         """Create a new location.
@@ -271,6 +323,15 @@ class Connection(object):
         :returns: A session.
         """
 
+    @abc.abstractmethod
+    def get_sessions_by_board_uuids(self, board_uuids, valid):
+        """Return the Wamp sessions of a set of Boards
+
+        :param board_uuids: List of board uuids.
+        :param valid: is valid
+        :returns: A list of sessions.
+        """
+
     @abc.abstractmethod
     def get_session_by_id(self, session_id):
         """Return a Wamp session
@@ -279,6 +340,14 @@ class Connection(object):
          :returns: A session.
         """
 
+    @abc.abstractmethod
+    def get_locations_by_board_ids(self, board_ids):
+        """List all the locations for a set of boards.
+
+        :param board_ids: List of integer board IDs.
+        :returns: A list of locations, ordered by board and id.
+        """
+
     @abc.abstractmethod
     def create_location(self, values):
         """Create a new location.
@@ -321,6 +390,32 @@ class Connection(object):
     def get_valid_wpsessions_list(self, agent):
         """Return a list of wpsession."""
 
+    @abc.abstractmethod
+    def invalidate_sessions(self, session_ids):
+        """Invalidate Wamp sessions and set their boards offline.
+
+        Both the updates run in a single transaction.
+
+        :param session_ids: List of wamp session ids.
+        :returns: The uuids of the boards of the sessions which were valid.
+        """
+
+    @abc.abstractmethod
+    def update_presence(self, connections, leaves):
+        """Apply a batch of connections and leaves of boards.
+
+        The connections replace the valid session of their boards and set
+        them online, then the sessions which left are invalidated and
+        their boards set offline, all in a single transaction.
+
+        :param connections: A dict mapping the uuid of a board to a dict
+                            with its new session_id and, optionally, the
+                            values of the board to update.
+        :param leaves: List of wamp session ids which left.
+        :returns: A dict with the uuids of the boards set online, of those
+                  set offline and of the connected ones not found.
+        """
+
     @abc.abstractmethod
     def get_wampagent(self, hostname):
         """Retrieve a wampagent's service record from the database.
@@ -354,6 +449,14 @@ class Connection(object):
         :raises: WampAgentNotFound
         """
 
+    @abc.abstractmethod
+    def get_wampagent_loads(self):
+        """Return the number of boards connected to every wampagent.
+
+        :returns: A dict mapping the hostname of a wampagent to the number
+                  of valid sessions of the boards assigned to it.
+        """
+
     @abc.abstractmethod
     def get_wampagent_list(self, filters=None, limit=None, marker=None,
                            sort_key=None, sort_dir=None):
@@ -533,6 +636,15 @@ class Connection(object):
 
         """
 
+    @abc.abstractmethod
+    def get_exposed_services_with_service(self, board_uuid):
+        """Return the exposed services of a board with their services.
+
+        :param board_uuid: The uuid of a board.
+        :returns: A list of (ExposedService, Service) pairs, read with
+                  a single query.
+        """
+
     @abc.abstractmethod
     def get_exposed_service_by_uuids(self, board_uuid, service_uuid):
         """get an exposed of a service using a board_uuid and service_uuid
@@ -759,3 +871,88 @@ class Connection(object):
 
         :param enabled_webservice_id: The id or uuid of a enabled_webservice.
         """
+
+    @abc.abstractmethod
+    def get_async_operation_by_uuid(self, operation_uuid):
+        """Return an asynchronous operation.
+
+        :param operation_uuid: The uuid of an operation.
+        :returns: An operation.
+        """
+
+    @abc.abstractmethod
+    def create_async_operation(self, values, keys=None):
+        """Create a new asynchronous operation.
+
+        :param values: A dict containing several items used to identify
+                       and track the operation
+        :param keys: The entries of the result, e.g. board uuids, created
+                     pending in the async_operation_items table.
+        :returns: An operation.
+        """
+
+    @abc.abstractmethod
+    def get_async_operation_items(self, operation_uuid):
+        """Return the entries of the result of an asynchronous operation.
+
+        :param operation_uuid: The uuid of an operation.
+        :returns: A dict mapping every entry to its status dict.
+        """
+
+    @abc.abstractmethod
+    def update_async_operation(self, operation_uuid, values):
+        """Update properties of an asynchronous operation.
+
+        :param operation_uuid: The uuid of an operation.
+        :param values: Dict of values to update.
+        :returns: An operation.
+        :raises: AsyncOperationNotFound
+        """
+
+    @abc.abstractmethod
+    def set_async_operation_items(self, operation_uuid, items):
+        """Set some entries of the result of an asynchronous operation.
+
+        Every entry is a row of its own, so that the workers of the same
+        operation neither lock nor rewrite the operation; once no entry is
+        pending any more, the operation is completed.
+
+        :param operation_uuid: The uuid of an operation.
+        :param items: A dict mapping the entries, e.g. board uuids, to a
+                      dict with their status.
+        :returns: An operation.
+        :raises: AsyncOperationNotFound
+        """
+
+    @abc.abstractmethod
+    def reserve_agent_port(self, agent, kind, board_uuid, first, last):
+        """Reserve a free port of a wampagent for a board.
+
+        The ports of an agent are rows of the agent_ports table, created
+        for the range on first use; a reservation takes a free row with a
+        conditional update, so that concurrent conductors never get the
+        same port.
+
+        :param agent: The hostname of the wampagent.
+        :param kind: The kind of port, e.g. 'public'.
+        :param board_uuid: The uuid of the board the port is reserved for.
+        :param first: The first port of the range of this kind.
+        :param last: The last port of the range of this kind.
+        :returns: The reserved port.
+        :raises: NoFreeAgentPort
+        """
+
+    @abc.abstractmethod
+    def release_agent_port(self, agent, port):
+        """Give a port back to a wampagent.
+
+        :param agent: The hostname of the wampagent.
+        :param port: The port to release.
+        """
+
+    @abc.abstractmethod
+    def reclaim_agent_ports(self):
+        """Release the ports still held by boards which do not exist.
+
+        :returns: The number of released ports.
+        """
@@ -0,0 +1,22 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# revision identifiers, used by Alembic.
+revision = '3a1f5c27e0b4'
+down_revision = 'd417c8ca8c52'
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('delegations_delegated_type_role_idx', 'delegations',
+                    ['delegated', 'type', 'role'])
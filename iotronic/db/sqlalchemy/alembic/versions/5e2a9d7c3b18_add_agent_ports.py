@@ -0,0 +1,37 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# revision identifiers, used by Alembic.
+revision = '5e2a9d7c3b18'
+down_revision = 'c4d1e8b2a7f6'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table('agent_ports',
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('agent', sa.String(length=255),
+                              nullable=False),
+                    sa.Column('kind', sa.String(length=15), nullable=False),
+                    sa.Column('port', sa.Integer(), nullable=False),
+                    sa.Column('board_uuid', sa.String(length=36),
+                              nullable=True),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('agent', 'port',
+                                        name='uniq_agent_ports0agent0port')
+                    )
+    op.create_index('agent_ports_agent_kind_board_idx', 'agent_ports',
+                    ['agent', 'kind', 'board_uuid'])
@@ -0,0 +1,36 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# revision identifiers, used by Alembic.
+revision = '8b6f0e4d2c91'
+down_revision = '5e2a9d7c3b18'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('ports_on_boards',
+                  sa.Column('tcp_port', sa.Integer(), nullable=True))
+
+    # the socat port of the existing VIFs is only in their name
+    ports = sa.table('ports_on_boards',
+                     sa.column('id', sa.Integer),
+                     sa.column('VIF_name', sa.String),
+                     sa.column('tcp_port', sa.Integer))
+    bind = op.get_bind()
+    for port_id, vif_name in bind.execute(
+            sa.select([ports.c.id, ports.c.VIF_name])):
+        if vif_name and vif_name[8:].isdigit():
+            bind.execute(ports.update()
+                         .where(ports.c.id == port_id)
+                         .values(tcp_port=int(vif_name[8:])))
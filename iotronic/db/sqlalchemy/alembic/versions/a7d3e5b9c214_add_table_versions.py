@@ -0,0 +1,34 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e5b9c214'
+down_revision = 'e6a4c1f9b702'
+
+from alembic import op
+import sqlalchemy as sa
+
+# the tables whose writes are versioned, see iotronic.db.sqlalchemy.api
+TABLES = ('boards', 'locations', 'plugins', 'fleets', 'delegations', 'roles',
+          'users')
+
+
+def upgrade():
+    table_versions = op.create_table(
+        'table_versions',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name'))
+    op.bulk_insert(table_versions,
+                   [{'name': name, 'version': 0} for name in TABLES])
@@ -0,0 +1,39 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1e8b2a7f6'
+down_revision = '3a1f5c27e0b4'
+
+from alembic import op
+import iotronic.db.sqlalchemy.models
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table('async_operations',
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('uuid', sa.String(length=36), nullable=True),
+                    sa.Column('name', sa.String(length=255), nullable=True),
+                    sa.Column('target', sa.String(length=36), nullable=True),
+                    sa.Column('owner', sa.String(length=36), nullable=True),
+                    sa.Column('project', sa.String(length=36), nullable=True),
+                    sa.Column('status', sa.String(length=15), nullable=True),
+                    sa.Column('result',
+                              iotronic.db.sqlalchemy.models.JSONEncodedDict(),
+                              nullable=True),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('uuid',
+                                        name='uniq_async_operations0uuid')
+                    )
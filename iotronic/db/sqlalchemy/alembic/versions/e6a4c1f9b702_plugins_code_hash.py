@@ -0,0 +1,38 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# revision identifiers, used by Alembic.
+revision = 'e6a4c1f9b702'
+down_revision = '8b6f0e4d2c91'
+
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('plugins',
+                  sa.Column('code_hash', sa.String(length=64), nullable=True))
+
+    plugins = sa.table('plugins',
+                       sa.column('id', sa.Integer),
+                       sa.column('code', sa.Text),
+                       sa.column('code_hash', sa.String))
+    bind = op.get_bind()
+    for plugin_id, code in bind.execute(
+            sa.select([plugins.c.id, plugins.c.code])):
+        if code is not None:
+            code_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+            bind.execute(plugins.update()
+                         .where(plugins.c.id == plugin_id)
+                         .values(code_hash=code_hash))
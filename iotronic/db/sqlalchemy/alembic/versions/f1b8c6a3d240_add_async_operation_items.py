@@ -0,0 +1,40 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# revision identifiers, used by Alembic.
+revision = 'f1b8c6a3d240'
+down_revision = 'a7d3e5b9c214'
+
+from alembic import op
+import iotronic.db.sqlalchemy.models
+import sqlalchemy as sa
+
+
+def upgrade():
+    value_type = iotronic.db.sqlalchemy.models.LongJSONEncodedDict()
+    op.create_table('async_operation_items',
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('operation_uuid', sa.String(length=36),
+                              nullable=False),
+                    sa.Column('key', sa.String(length=36), nullable=False),
+                    sa.Column('status', sa.String(length=15), nullable=True),
+                    sa.Column('value', value_type, nullable=True),
+                    sa.ForeignKeyConstraint(['operation_uuid'],
+                                            ['async_operations.uuid'], ),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('operation_uuid', 'key',
+                                        name='uniq_async_operation_items0key')
+                    )
+    op.create_index('async_operation_items_op_status_idx',
+                    'async_operation_items', ['operation_uuid', 'status'])
@@ -16,6 +16,11 @@
 
 """SQLAlchemy storage backend."""
 
+import collections
+import datetime
+import hashlib
+import random
+
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_db.sqlalchemy import session as db_session
@@ -23,7 +28,12 @@ from oslo_db.sqlalchemy import utils as db_utils
 from oslo_utils import strutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
+import sqlalchemy as sa
+from sqlalchemy import and_
+from sqlalchemy import event
 from sqlalchemy import or_
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm import Session
 from sqlalchemy.orm.exc import NoResultFound
 
 from iotronic.common import exception
@@ -43,6 +53,13 @@ CONF.import_opt('heartbeat_timeout',
 
 _FACADE = None
 
+# free agent ports a reservation picks from, and attempts before giving up
+_AGENT_PORT_CANDIDATES = 16
+_AGENT_PORT_RETRIES = 10
+
+# values of the IN lists of the bulk statements
+_IN_CHUNK = 500
+
 
 def _create_facade_lazily():
     global _FACADE
@@ -61,6 +78,60 @@ def get_session(**kwargs):
     return facade.get_session(**kwargs)
 
 
+# tables whose writes bump their version, see get_tables_version: only
+# the ones the conditional GET middleware watches
+_VERSIONED_TABLES = frozenset(['boards', 'locations', 'plugins', 'fleets',
+                               'delegations', 'roles', 'users'])
+# tables churning with the presence of the boards, whose version would be
+# a hot row: a change of theirs shown by a resource comes with a new row,
+# or with a write to a versioned table, so their greatest id is read
+_PROBED_TABLES = {'sessions': models.SessionWP.id}
+_WRITTEN_TABLES = 'iotronic_written_tables'
+
+
+def _mark_written(session, tables):
+    tables = _VERSIONED_TABLES.intersection(tables)
+    if tables:
+        session.info.setdefault(_WRITTEN_TABLES, set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    written = (list(session.new) + list(session.deleted) +
+               [o for o in session.dirty if session.is_modified(o)])
+    _mark_written(session, [o.__table__.name for o in written
+                            if hasattr(o, '__table__')])
+
+
+@event.listens_for(Session, 'after_bulk_update')
+def _after_bulk_update(update_context):
+    _mark_written(update_context.session,
+                  [update_context.mapper.local_table.name])
+
+
+@event.listens_for(Session, 'after_bulk_delete')
+def _after_bulk_delete(delete_context):
+    _mark_written(delete_context.session,
+                  [delete_context.mapper.local_table.name])
+
+
+@event.listens_for(Session, 'before_commit')
+def _before_commit(session):
+    # bumped last, so that the version rows stay locked for the shortest
+    # time, and in the same transaction as the writes
+    tables = session.info.pop(_WRITTEN_TABLES, None)
+    if tables:
+        versions = models.TableVersion.__table__
+        session.execute(versions.update()
+                        .where(versions.c.name.in_(sorted(tables)))
+                        .values(version=versions.c.version + 1))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop(_WRITTEN_TABLES, None)
+
+
 def get_backend():
     """The backend is this module itself."""
     return Connection()
@@ -77,6 +148,13 @@ def model_query(model, *args, **kwargs):
     return query
 
 
+def _code_hash(code):
+    """Return the content address of the code of a plugin."""
+    if code is None:
+        return None
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+
 def add_identity_filter(query, value):
     """Adds an identity filter to a query.
 
@@ -96,9 +174,11 @@ def add_identity_filter(query, value):
 
 
 def _paginate_query(model, limit=None, marker=None, sort_key=None,
-                    sort_dir=None, query=None):
+                    sort_dir=None, query=None, cursor=None):
     if not query:
         query = model_query(model)
+    if cursor is not None:
+        return _seek_query(model, query, limit, cursor, sort_key, sort_dir)
     sort_keys = ['id']
     if sort_key and sort_key not in sort_keys:
         sort_keys.insert(0, sort_key)
@@ -113,6 +193,120 @@ def _paginate_query(model, limit=None, marker=None, sort_key=None,
     return query.all()
 
 
+def _seek_query(model, query, limit, cursor, sort_key=None, sort_dir=None):
+    """Keyset pagination: seeks past the last row of the previous page.
+
+    Unlike the marker based pagination, the previous page is identified by
+    the values of its last row, so no marker lookup is needed and the
+    database can seek the (sort_key, id) index directly.
+
+    NULL values of a nullable sort key sort before any other value, as
+    if they were the smallest, so that the rows holding them are neither
+    skipped nor repeated across pages.
+
+    :param cursor: the sort_key and id values of the last row of the
+                   previous page, an empty list for the first page.
+    """
+    sort_keys = ['id']
+    if sort_key and sort_key not in sort_keys:
+        sort_keys.insert(0, sort_key)
+    try:
+        columns = [getattr(model, k) for k in sort_keys]
+        nullable = [c.property.columns[0].nullable for c in columns]
+    except AttributeError:
+        raise exception.InvalidParameterValue(
+            _('The sort_key value "%(key)s" is an invalid field for sorting')
+            % {'key': sort_key})
+    if cursor and len(cursor) != len(columns):
+        raise exception.InvalidParameterValue(
+            _('The cursor does not match the sort_key "%(key)s"')
+            % {'key': sort_key})
+    try:
+        cursor = [_seek_value(c, v) for c, v in zip(columns, cursor or [])]
+    except (TypeError, ValueError):
+        raise exception.InvalidParameterValue(
+            _('The cursor does not match the sort_key "%(key)s"')
+            % {'key': sort_key})
+
+    desc = sort_dir == 'desc'
+    ordering = []
+    for column, null in zip(columns, nullable):
+        # portable NULLS FIRST (asc) / NULLS LAST (desc)
+        if null:
+            ordering.append(column.isnot(None).desc() if desc
+                            else column.isnot(None).asc())
+        ordering.append(column.desc() if desc else column.asc())
+
+    if cursor:
+        # (k1, k2) > (v1, v2)  <=>  k1 > v1 or (k1 = v1 and k2 > v2)
+        clauses = []
+        for i in range(len(columns)):
+            equal = [_seek_equal(columns[j], cursor[j]) for j in range(i)]
+            clauses.append(and_(*(equal + [
+                _seek_after(columns[i], cursor[i], nullable[i], desc)])))
+        query = query.filter(or_(*clauses))
+
+    query = query.order_by(*ordering)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def _seek_value(column, value):
+    """Returns a cursor value as the type of its column compares it."""
+    if value is not None and isinstance(column.type, sa.DateTime):
+        if not isinstance(value, datetime.datetime):
+            value = timeutils.parse_isotime(value)
+        # the database stores naive UTC datetimes
+        return timeutils.normalize_time(value)
+    return value
+
+
+def _seek_equal(column, value):
+    if value is None:
+        return column.is_(None)
+    return column == value
+
+
+def _seek_after(column, value, nullable, desc):
+    """Returns the clause of the values sorted after value in column."""
+    if value is None:
+        # NULL is the first value ascending, the last one descending
+        return sa.false() if desc else column.isnot(None)
+    if desc:
+        after = column < value
+        return or_(after, column.is_(None)) if nullable else after
+    return column > value
+
+
+def _add_projection(query, model, fields):
+    """Restricts the columns loaded by a query to the requested fields.
+
+    :param fields: the fields to load, None loads every column.
+    """
+    if fields is None:
+        return query
+    return query.options(load_only(*[getattr(model, f) for f in fields]))
+
+
+def _authorized_filter(column, authorized):
+    """Returns the clause restricting column to the authorized nodes.
+
+    :param column: the uuid column of the listed nodes.
+    :param authorized: either the list of the authorized node uuids, or an
+                       authorization scope (user, type and granting roles)
+                       resolved with a subquery on the delegations table.
+    """
+    if authorized is None or isinstance(authorized,
+                                        (list, tuple, set, frozenset)):
+        return column.in_(authorized or [])
+    nodes = model_query(models.Delegation.node).filter(
+        models.Delegation.delegated == authorized.user,
+        models.Delegation.type == authorized.type,
+        models.Delegation.role.in_(authorized.roles))
+    return column.in_(nodes)
+
+
 class Connection(api.Connection):
     """SqlAlchemy connection."""
 
@@ -154,7 +348,8 @@ class Connection(api.Connection):
             query = query.filter(models.Board.fleet == filters['fleet'])
         # if 'uuid' in filters:
         #    query = query.filter(models.Board.uuid == filters['uuid'])
-        query = query.filter(models.Board.uuid.in_(authorized_boards))
+        query = query.filter(
+            _authorized_filter(models.Board.uuid, authorized_boards))
 
         return query
 
@@ -165,13 +360,16 @@ class Connection(api.Connection):
         if 'with_public' in filters and filters['with_public']:
             query = query.filter(
                 or_(models.Plugin.public == 1,
-                    models.Plugin.uuid.in_(authorized_plugins)))
+                    _authorized_filter(models.Plugin.uuid,
+                                       authorized_plugins)))
         elif 'public' in filters and filters['public']:
             query = query.filter(
                 or_(models.Plugin.public == 1,
-                    models.Plugin.uuid.in_(authorized_plugins)))
+                    _authorized_filter(models.Plugin.uuid,
+                                       authorized_plugins)))
         else:
-            query = query.filter(models.Plugin.uuid.in_(authorized_plugins))
+            query = query.filter(
+                _authorized_filter(models.Plugin.uuid, authorized_plugins))
         return query
 
     def _add_services_filters(self, query, filters, authorized_services):
@@ -180,7 +378,8 @@ class Connection(api.Connection):
 
         # if 'owner' in filters:
         #    query = query.filter(models.Plugin.owner == filters['owner'])
-        query = query.filter(models.Service.uuid.in_(authorized_services))
+        query = query.filter(
+            _authorized_filter(models.Service.uuid, authorized_services))
         return query
 
     def _add_enabled_webservices_filters(self, query, filters,
@@ -194,7 +393,8 @@ class Connection(api.Connection):
                                models.Board.uuid)
             query = query.filter(
                 models.Board.project == filters['project_id'])
-        query = query.filter(models.EnabledWebservice.board_uuid.in_(
+        query = query.filter(_authorized_filter(
+            models.EnabledWebservice.board_uuid,
             authorized_board_webservices))
         return query
 
@@ -212,7 +412,8 @@ class Connection(api.Connection):
             query = query.filter(
                 models.Webservice.board_uuid == filters['board_uuid'])
         query = query.filter(
-            models.Webservice.uuid.in_(authorized_webservices))
+            _authorized_filter(models.Webservice.uuid,
+                               authorized_webservices))
         return query
 
     def _add_fleets_filters(self, query, filters, authorized_fleets):
@@ -221,7 +422,8 @@ class Connection(api.Connection):
 
         if 'project' in filters:
             query = query.filter(models.Fleet.project == filters['project'])
-        query = query.filter(models.Fleet.uuid.in_(authorized_fleets))
+        query = query.filter(
+            _authorized_filter(models.Fleet.uuid, authorized_fleets))
         return query
 
     def _add_wampagents_filters(self, query, filters):
@@ -249,7 +451,9 @@ class Connection(api.Connection):
         if 'board_uuid' in filters:
             query = query. \
                 filter(models.Port.board_uuid == filters['board_uuid'])
-        query = query.filter(models.Port.uuid.in_(authorized_ports))
+        query = query.filter(
+            _authorized_filter(models.Port.uuid, authorized_ports))
+        return query
 
     def _do_update_delegation(self, delegation_id, values):
         session = get_session()
@@ -303,6 +507,10 @@ class Connection(api.Connection):
         return ref
 
     def _do_update_plugin(self, plugin_id, values):
+        # the hash always follows the stored code
+        values.pop('code_hash', None)
+        if 'code' in values:
+            values['code_hash'] = _code_hash(values['code'])
         session = get_session()
         with session.begin():
             query = model_query(models.Plugin, session=session)
@@ -330,6 +538,17 @@ class Connection(api.Connection):
         return ref
     # AUTHORIZATION api
 
+    def get_tables_version(self, tables):
+        session = get_session()
+        versions = models.TableVersion.__table__
+        query = session.query(versions.c.name, versions.c.version)
+        found = dict(query.filter(versions.c.name.in_(tables)).all())
+        for name in tables:
+            if name in _PROBED_TABLES:
+                found[name] = session.query(
+                    sa.func.max(_PROBED_TABLES[name])).scalar()
+        return tuple(found.get(name) for name in tables)
+
     def get_node_delegations(self, user_uuid=None, type=None, node=None):
         if node:
             query = model_query(models.Delegation).filter_by(
@@ -570,11 +789,24 @@ class Connection(api.Connection):
                                sort_key, sort_dir, query)
 
     def get_board_list(self, authorized_boards, filters=None, limit=None,
-                       marker=None, sort_key=None, sort_dir=None):
+                       marker=None, sort_key=None, sort_dir=None,
+                       fields=None, cursor=None):
         query = model_query(models.Board)
         query = self._add_boards_filters(query, filters, authorized_boards)
+        query = _add_projection(query, models.Board, fields)
         return _paginate_query(models.Board, limit, marker,
-                               sort_key, sort_dir, query)
+                               sort_key, sort_dir, query, cursor=cursor)
+
+    def get_board_iter(self, authorized_boards, filters=None, fields=None,
+                       batch_size=1000):
+        query = model_query(models.Board)
+        query = self._add_boards_filters(query, filters, authorized_boards)
+        query = _add_projection(query, models.Board, fields)
+        query = query.order_by(models.Board.id)
+        # server side cursor: rows are fetched batch_size at a time
+        query = query.execution_options(stream_results=True)
+        for board in query.yield_per(batch_size):
+            yield board
 
     def create_board(self, values):
         # ensure defaults are present for new boards
@@ -593,6 +825,94 @@ class Connection(api.Connection):
             raise exception.BoardAlreadyExists(uuid=values['uuid'])
         return board
 
+    def _create_board_item(self, session, board_values, location_values,
+                           delegation_values):
+        with session.begin_nested():
+            board = models.Board()
+            board.update(board_values)
+            session.add(board)
+            session.flush()
+            location = models.Location()
+            location.update(location_values)
+            location.board_id = board.id
+            delegation = models.Delegation()
+            delegation.update(delegation_values)
+            delegation.node = board.uuid
+            session.add_all([location, delegation])
+        return board
+
+    def _insert_many(self, session, model, rows):
+        # executemany needs the same columns on every row: group them by
+        # the columns they set, so that the others keep their defaults.
+        groups = collections.OrderedDict()
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        for group in groups.values():
+            session.execute(model.__table__.insert(), group)
+        _mark_written(session, [model.__tablename__])
+
+    def create_board_batch(self, items):
+        session = get_session()
+        results = [None] * len(items)
+        rows = []
+        with session.begin():
+            codes = [item[0].get('code') for item in items]
+            taken = set(c for (c,) in session.query(models.Board.code).filter(
+                models.Board.code.in_(codes)))
+            for index, (board_values, loc_values, dele_values) in enumerate(
+                    items):
+                board_values = dict(board_values)
+                board_values.setdefault('uuid', uuidutils.generate_uuid())
+                board_values.setdefault('status', states.REGISTERED)
+                code = board_values.get('code')
+                if code in taken:
+                    results[index] = exception.DuplicateCode(code=code)
+                    continue
+                taken.add(code)
+                rows.append((index, board_values, loc_values, dele_values))
+
+            if not rows:
+                return results
+
+            uuids = [r[1]['uuid'] for r in rows]
+            try:
+                with session.begin_nested():
+                    self._insert_many(session, models.Board,
+                                      [r[1] for r in rows])
+                    ids = dict(session.query(
+                        models.Board.uuid, models.Board.id).filter(
+                        models.Board.uuid.in_(uuids)))
+                    self._insert_many(
+                        session, models.Location,
+                        [dict(r[2], board_id=ids[r[1]['uuid']])
+                         for r in rows])
+                    self._insert_many(
+                        session, models.Delegation,
+                        [dict(r[3], node=r[1]['uuid']) for r in rows])
+            except db_exc.DBDuplicateEntry:
+                # a concurrent insert took one of the codes or uuids:
+                # retry one board at a time to find out which one.
+                for index, board_values, loc_values, dele_values in rows:
+                    try:
+                        self._create_board_item(session, board_values,
+                                                loc_values, dele_values)
+                    except db_exc.DBDuplicateEntry as exc:
+                        uuids.remove(board_values['uuid'])
+                        if 'code' in exc.columns:
+                            results[index] = exception.DuplicateCode(
+                                code=board_values['code'])
+                        else:
+                            results[index] = exception.BoardAlreadyExists(
+                                uuid=board_values['uuid'])
+
+            boards = dict((b.uuid, b) for b in model_query(
+                models.Board, session=session).filter(
+                models.Board.uuid.in_(uuids)))
+            for index, board_values, loc_values, dele_values in rows:
+                if results[index] is None:
+                    results[index] = boards[board_values['uuid']]
+        return results
+
     def get_board_by_id(self, board_id):
         query = model_query(models.Board).filter_by(id=board_id)
         try:
@@ -651,6 +971,11 @@ class Connection(api.Connection):
                 location_query, board_id)
             location_query.delete()
 
+            # give the ports of the board back to its agent
+            (model_query(models.AgentPort, session=session)
+             .filter_by(board_uuid=board_ref['uuid'])
+             .update({'board_uuid': None}, synchronize_session=False))
+
             query.delete()
 
     def update_board(self, board_id, values):
@@ -720,6 +1045,16 @@ class Connection(api.Connection):
             if count == 0:
                 raise exception.ConductorNotFound(conductor=hostname)
 
+    def get_active_conductors(self, interval=None):
+        if interval is None:
+            interval = CONF.conductor.heartbeat_timeout
+        limit = timeutils.utcnow() - datetime.timedelta(seconds=interval)
+        query = (model_query(models.Conductor.hostname)
+                 .filter_by(online=True)
+                 .filter(models.Conductor.updated_at >= limit)
+                 .order_by(models.Conductor.hostname))
+        return [hostname for (hostname,) in query]
+
     # LOCATION api
 
     def create_location(self, values):
@@ -757,6 +1092,14 @@ class Connection(api.Connection):
         return _paginate_query(models.Location, limit, marker,
                                sort_key, sort_dir, query)
 
+    def get_locations_by_board_ids(self, board_ids):
+        if not board_ids:
+            return []
+        query = model_query(models.Location)
+        query = query.filter(models.Location.board_id.in_(board_ids))
+        return query.order_by(models.Location.board_id,
+                              models.Location.id).all()
+
     # SESSION api
 
     def create_session(self, values):
@@ -788,6 +1131,14 @@ class Connection(api.Connection):
         except NoResultFound:
             raise exception.BoardNotConnected(board=board_uuid)
 
+    def get_sessions_by_board_uuids(self, board_uuids, valid):
+        if not board_uuids:
+            return []
+        query = model_query(models.SessionWP).filter(
+            models.SessionWP.board_uuid.in_(board_uuids)).filter_by(
+            valid=valid)
+        return query.all()
+
     def get_session_by_id(self, session_id):
         query = model_query(models.SessionWP).filter_by(session_id=session_id)
         try:
@@ -804,6 +1155,75 @@ class Connection(api.Connection):
 
         return query.all()
 
+    def _invalidate_sessions(self, session, session_ids):
+        session_ids = [str(s) for s in session_ids]
+        board_uuids = []
+        # bounded IN lists, for the databases limiting their size
+        for start in range(0, len(session_ids), _IN_CHUNK):
+            chunk = session_ids[start:start + _IN_CHUNK]
+            query = (model_query(models.SessionWP, session=session)
+                     .filter(models.SessionWP.session_id.in_(chunk))
+                     .filter_by(valid=True))
+            uuids = [uuid for uuid, in
+                     query.with_entities(models.SessionWP.board_uuid)]
+            if not uuids:
+                continue
+            query.update({'valid': False,
+                          'updated_at': timeutils.utcnow()},
+                         synchronize_session=False)
+            (model_query(models.Board, session=session)
+             .filter(models.Board.uuid.in_(uuids))
+             .update({'status': states.OFFLINE,
+                      'updated_at': timeutils.utcnow()},
+                     synchronize_session=False))
+            board_uuids.extend(uuids)
+        return board_uuids
+
+    def invalidate_sessions(self, session_ids):
+        session = get_session()
+        with session.begin():
+            return self._invalidate_sessions(session, session_ids)
+
+    def update_presence(self, connections, leaves):
+        session = get_session()
+        with session.begin():
+            uuids = list(connections)
+            boards = {}
+            for start in range(0, len(uuids), _IN_CHUNK):
+                chunk = uuids[start:start + _IN_CHUNK]
+                query = (model_query(models.Board, session=session)
+                         .filter(models.Board.uuid.in_(chunk)))
+                boards.update((board.uuid, board) for board in query)
+            found = [uuid for uuid in uuids if uuid in boards]
+
+            # the new sessions replace the valid ones of the boards
+            now = timeutils.utcnow()
+            for start in range(0, len(found), _IN_CHUNK):
+                chunk = found[start:start + _IN_CHUNK]
+                (model_query(models.SessionWP, session=session)
+                 .filter(models.SessionWP.board_uuid.in_(chunk))
+                 .filter_by(valid=True)
+                 .update({'valid': False, 'updated_at': now},
+                         synchronize_session=False))
+            self._insert_many(session, models.SessionWP, [
+                {'board_id': boards[uuid].id,
+                 'board_uuid': uuid,
+                 'session_id': str(connections[uuid]['session_id']),
+                 'valid': True,
+                 'created_at': now}
+                for uuid in found])
+
+            for uuid in found:
+                board = boards[uuid]
+                board.status = states.ONLINE
+                board.update(connections[uuid].get('values') or {})
+
+            offline = self._invalidate_sessions(session, leaves)
+
+        return {'online': found,
+                'offline': offline,
+                'missing': [uuid for uuid in uuids if uuid not in boards]}
+
     # WAMPAGENT api
 
     def register_wampagent(self, values, update_existing=False):
@@ -863,6 +1283,16 @@ class Connection(api.Connection):
             if count == 0:
                 raise exception.WampAgentNotFound(wampagent=hostname)
 
+    def get_wampagent_loads(self):
+        query = (model_query(models.Board.agent,
+                             sa.func.count(models.SessionWP.id))
+                 .join(models.SessionWP,
+                       models.SessionWP.board_uuid == models.Board.uuid)
+                 .filter(models.SessionWP.valid == 1)
+                 .group_by(models.Board.agent))
+        return dict((agent, count) for agent, count in query
+                    if agent is not None)
+
     def get_wampagent_list(self, filters=None, limit=None, marker=None,
                            sort_key=None, sort_dir=None):
         query = model_query(models.WampAgent)
@@ -931,6 +1361,7 @@ class Connection(api.Connection):
         # ensure defaults are present for new plugins
         if 'uuid' not in values:
             values['uuid'] = uuidutils.generate_uuid()
+        values['code_hash'] = _code_hash(values.get('code'))
         plugin = models.Plugin()
         plugin.update(values)
         try:
@@ -940,9 +1371,11 @@ class Connection(api.Connection):
         return plugin
 
     def get_plugin_list(self, authorized_plugins, filters=None, limit=None,
-                        marker=None, sort_key=None, sort_dir=None):
+                        marker=None, sort_key=None, sort_dir=None,
+                        fields=None):
         query = model_query(models.Plugin)
         query = self._add_plugins_filters(query, filters, authorized_plugins)
+        query = _add_projection(query, models.Plugin, fields)
         return _paginate_query(models.Plugin, limit, marker,
                                sort_key, sort_dir, query)
 
@@ -1012,7 +1445,8 @@ class Connection(api.Connection):
         query = model_query(models.InjectionPlugin).filter_by(
             board_uuid=board_uuid)
         query = query.filter(
-            models.InjectionPlugin.board_uuid.in_(authorized_board_plugins))
+            _authorized_filter(models.InjectionPlugin.board_uuid,
+                               authorized_board_plugins))
         return query.all()
 
     # SERVICE api
@@ -1085,9 +1519,11 @@ class Connection(api.Connection):
         return service
 
     def get_service_list(self, authorized_services, filters=None, limit=None,
-                         marker=None, sort_key=None, sort_dir=None):
+                         marker=None, sort_key=None, sort_dir=None,
+                         fields=None):
         query = model_query(models.Service)
         query = self._add_services_filters(query, filters, authorized_services)
+        query = _add_projection(query, models.Service, fields)
         return _paginate_query(models.Service, limit, marker,
                                sort_key, sort_dir, query)
 
@@ -1115,6 +1551,14 @@ class Connection(api.Connection):
         except NoResultFound:
             raise exception.NoExposedServices(uuid=board_uuid)
 
+    def get_exposed_services_with_service(self, board_uuid):
+        exposed = models.ExposedService
+        query = (model_query(exposed, models.Service)
+                 .join(models.Service,
+                       models.Service.uuid == exposed.service_uuid)
+                 .filter(exposed.board_uuid == board_uuid))
+        return query.all()
+
     def create_exposed_service(self, values):
         # ensure defaults are present for new services
         if 'uuid' not in values:
@@ -1243,10 +1687,22 @@ class Connection(api.Connection):
         with session.begin():
             query = model_query(models.Port, session=session)
             query = add_identity_filter(query, uuid)
-            count = query.delete()
-            if count == 0:
+            try:
+                port_ref = query.one()
+            except NoResultFound:
                 raise exception.PortNotFound(uuid=uuid)
 
+            # give the socat port of the VIF back to the agent
+            if port_ref.tcp_port is not None:
+                (model_query(models.AgentPort, session=session)
+                 .filter_by(kind='socat', port=port_ref.tcp_port,
+                            board_uuid=port_ref.board_uuid)
+                 .update({'board_uuid': None,
+                          'updated_at': timeutils.utcnow()},
+                         synchronize_session=False))
+
+            query.delete()
+
     # FLEET api
 
     def get_fleet_by_id(self, fleet_id):
@@ -1317,9 +1773,11 @@ class Connection(api.Connection):
         return fleet
 
     def get_fleet_list(self, authorized_fleets, filters=None, limit=None,
-                       marker=None, sort_key=None, sort_dir=None):
+                       marker=None, sort_key=None, sort_dir=None,
+                       fields=None):
         query = model_query(models.Fleet)
         query = self._add_fleets_filters(query, filters, authorized_fleets)
+        query = _add_projection(query, models.Fleet, fields)
         return _paginate_query(models.Fleet, limit, marker,
                                sort_key, sort_dir, query)
 
@@ -1407,10 +1865,11 @@ class Connection(api.Connection):
 
     def get_webservice_list(self, authorized_webservices, filters=None,
                             limit=None, marker=None,
-                            sort_key=None, sort_dir=None):
+                            sort_key=None, sort_dir=None, fields=None):
         query = model_query(models.Webservice)
         query = self._add_webservices_filters(
             query, filters, authorized_webservices)
+        query = _add_projection(query, models.Webservice, fields)
         return _paginate_query(models.Webservice, limit, marker,
                                sort_key, sort_dir, query)
 
@@ -1487,3 +1946,197 @@ class Connection(api.Connection):
             query, filters, authorized_board_webservices)
         return _paginate_query(models.EnabledWebservice, limit, marker,
                                sort_key, sort_dir, query)
+
+    # ASYNC OPERATION api
+
+    def get_async_operation_by_uuid(self, operation_uuid):
+        query = model_query(models.AsyncOperation).filter_by(
+            uuid=operation_uuid)
+        try:
+            return query.one()
+        except NoResultFound:
+            raise exception.AsyncOperationNotFound(operation=operation_uuid)
+
+    def create_async_operation(self, values, keys=None):
+        # ensure defaults are present for new operations
+        if 'uuid' not in values:
+            values['uuid'] = uuidutils.generate_uuid()
+        if 'status' not in values:
+            values['status'] = states.OPERATION_PENDING
+        operation = models.AsyncOperation()
+        operation.update(values)
+        session = get_session()
+        try:
+            with session.begin():
+                session.add(operation)
+                session.flush()
+                if keys:
+                    pending = {'status': states.OPERATION_PENDING}
+                    self._insert_many(session, models.AsyncOperationItem, [
+                        {'operation_uuid': values['uuid'], 'key': key,
+                         'status': states.OPERATION_PENDING,
+                         'value': pending} for key in keys])
+        except db_exc.DBDuplicateEntry:
+            raise exception.AsyncOperationAlreadyExists(uuid=values['uuid'])
+        return operation
+
+    def get_async_operation_items(self, operation_uuid):
+        query = model_query(models.AsyncOperationItem.key,
+                            models.AsyncOperationItem.value)
+        query = query.filter_by(operation_uuid=operation_uuid)
+        return dict((key, value) for key, value in query)
+
+    def _get_locked_async_operation(self, session, operation_uuid):
+        query = model_query(models.AsyncOperation, session=session)
+        query = query.filter_by(uuid=operation_uuid)
+        try:
+            return query.with_lockmode('update').one()
+        except NoResultFound:
+            raise exception.AsyncOperationNotFound(operation=operation_uuid)
+
+    def update_async_operation(self, operation_uuid, values):
+        if 'uuid' in values:
+            msg = _("Cannot overwrite UUID for an existing Operation.")
+            raise exception.InvalidParameterValue(err=msg)
+
+        session = get_session()
+        with session.begin():
+            ref = self._get_locked_async_operation(session, operation_uuid)
+            ref.update(values)
+        return ref
+
+    def set_async_operation_items(self, operation_uuid, items):
+        table = models.AsyncOperationItem.__table__
+        session = get_session()
+        with session.begin():
+            # a single executemany for the whole chunk, the operation
+            # row is neither locked nor rewritten
+            session.execute(
+                table.update().where(and_(
+                    table.c.operation_uuid == sa.bindparam('b_operation'),
+                    table.c.key == sa.bindparam('b_key'))).values(
+                    status=sa.bindparam('b_status'),
+                    value=sa.bindparam('b_value')),
+                [{'b_operation': operation_uuid, 'b_key': key,
+                  'b_status': value.get('status'), 'b_value': value}
+                 for key, value in items.items()])
+
+        # checked once the items are committed: of two workers finishing
+        # together, at least the last one sees no pending item left
+        left = model_query(models.AsyncOperationItem.id).filter(
+            models.AsyncOperationItem.operation_uuid == operation_uuid,
+            models.AsyncOperationItem.status.in_(
+                [states.OPERATION_PENDING, states.OPERATION_RUNNING])).first()
+        query = model_query(models.AsyncOperation).filter_by(
+            uuid=operation_uuid)
+        if left is None:
+            query.filter(models.AsyncOperation.status.in_(
+                [states.OPERATION_PENDING, states.OPERATION_RUNNING])).update(
+                {'status': states.OPERATION_COMPLETED},
+                synchronize_session=False)
+        else:
+            query.filter_by(status=states.OPERATION_PENDING).update(
+                {'status': states.OPERATION_RUNNING},
+                synchronize_session=False)
+        return self.get_async_operation_by_uuid(operation_uuid)
+
+    # AGENT PORT api
+
+    def _agent_ports_in_use(self, session, agent, kind):
+        """Return the ports of an agent used before the allocator existed."""
+        if kind == 'public':
+            query = (model_query(models.ExposedService.public_port,
+                                 models.ExposedService.board_uuid,
+                                 session=session)
+                     .join(models.Board,
+                           models.Board.uuid ==
+                           models.ExposedService.board_uuid)
+                     .filter(models.Board.agent == agent))
+            return dict(query)
+        if kind == 'socat':
+            query = (model_query(models.Port.tcp_port,
+                                 models.Port.board_uuid,
+                                 session=session)
+                     .join(models.Board,
+                           models.Board.uuid == models.Port.board_uuid)
+                     .filter(models.Board.agent == agent)
+                     .filter(models.Port.tcp_port.isnot(None)))
+            return dict(query)
+        return {}
+
+    def _populate_agent_ports(self, agent, kind, first, last):
+        session = get_session()
+        try:
+            with session.begin():
+                existing = set(port for (port,) in model_query(
+                    models.AgentPort.port, session=session).filter_by(
+                    agent=agent))
+                missing = [port for port in range(first, last + 1)
+                           if port not in existing]
+                if not missing:
+                    return False
+                in_use = self._agent_ports_in_use(session, agent, kind)
+                session.execute(models.AgentPort.__table__.insert(),
+                                [{'agent': agent,
+                                  'kind': kind,
+                                  'port': port,
+                                  'board_uuid': in_use.get(port)}
+                                 for port in missing])
+        except db_exc.DBDuplicateEntry:
+            # another conductor populated the range at the same time
+            pass
+        return True
+
+    def reserve_agent_port(self, agent, kind, board_uuid, first, last):
+        populated = reclaimed = False
+        for attempt in range(_AGENT_PORT_RETRIES):
+            query = (model_query(models.AgentPort.id)
+                     .filter_by(agent=agent, kind=kind, board_uuid=None)
+                     .limit(_AGENT_PORT_CANDIDATES))
+            candidates = [port_id for (port_id,) in query]
+            if not candidates:
+                if not populated:
+                    populated = True
+                    if self._populate_agent_ports(agent, kind, first, last):
+                        continue
+                if not reclaimed:
+                    reclaimed = True
+                    if self.reclaim_agent_ports():
+                        continue
+                break
+
+            # a random candidate makes concurrent reservations unlikely to
+            # collide; the conditional update makes them safe anyway.
+            port_id = random.choice(candidates)
+            session = get_session()
+            with session.begin():
+                count = (model_query(models.AgentPort, session=session)
+                         .filter_by(id=port_id, board_uuid=None)
+                         .update({'board_uuid': board_uuid,
+                                  'updated_at': timeutils.utcnow()},
+                                 synchronize_session=False))
+            if count:
+                return model_query(models.AgentPort.port).filter_by(
+                    id=port_id).scalar()
+
+        raise exception.NoFreeAgentPort(agent=agent, kind=kind)
+
+    def release_agent_port(self, agent, port):
+        session = get_session()
+        with session.begin():
+            (model_query(models.AgentPort, session=session)
+             .filter_by(agent=agent, port=port)
+             .update({'board_uuid': None,
+                      'updated_at': timeutils.utcnow()},
+                     synchronize_session=False))
+
+    def reclaim_agent_ports(self):
+        session = get_session()
+        with session.begin():
+            boards = sa.select([models.Board.uuid])
+            return (model_query(models.AgentPort, session=session)
+                    .filter(models.AgentPort.board_uuid.isnot(None))
+                    .filter(~models.AgentPort.board_uuid.in_(boards))
+                    .update({'board_uuid': None,
+                             'updated_at': timeutils.utcnow()},
+                            synchronize_session=False))
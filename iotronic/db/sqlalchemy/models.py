@@ -20,8 +20,10 @@ import json
 from oslo_config import cfg
 from oslo_db.sqlalchemy import models
 import six.moves.urllib.parse as urlparse
+from sqlalchemy import BigInteger
 from sqlalchemy import Boolean
 from sqlalchemy import Column
+from sqlalchemy.dialects import mysql
 from sqlalchemy import ForeignKey, Integer
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import schema
@@ -83,6 +85,18 @@ class JSONEncodedList(JsonEncodedType):
     type = list
 
 
+class LongJSONEncodedDict(JSONEncodedDict):
+    """Represents dict serialized as json-encoded string in db.
+
+    On MySQL the string is a LONGTEXT, a TEXT is limited to 64 KB.
+    """
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'mysql':
+            return dialect.type_descriptor(mysql.LONGTEXT())
+        return dialect.type_descriptor(TEXT())
+
+
 class IotronicBase(models.TimestampMixin,
                    models.ModelBase):
     metadata = None
@@ -167,6 +181,8 @@ class Delegation(Base):
         schema.UniqueConstraint('uuid', name='uniq_delegations0uuid'),
         schema.UniqueConstraint('delegated', 'node',
                                 name='uniq_delegations0delegated_node'),
+        schema.Index('delegations_delegated_type_role_idx',
+                     'delegated', 'type', 'role'),
         table_args())
     id = Column(Integer, primary_key=True)
     uuid = Column(String(36), ForeignKey('boards.id'))
@@ -271,6 +287,7 @@ class Plugin(Base):
     owner = Column(String(36))
     public = Column(Boolean, default=False)
     code = Column(TEXT)
+    code_hash = Column(String(64))
     callable = Column(Boolean)
     parameters = Column(JSONEncodedDict)
     extra = Column(JSONEncodedDict)
@@ -334,6 +351,7 @@ class Port(Base):
     ip = Column(String(36))
     #    status = Column(String(36))
     network = Column(String(36))
+    tcp_port = Column(Integer, nullable=True)
 
 
 #    security_groups = Column(String(40))
@@ -384,3 +402,64 @@ class EnabledWebservice(Base):
     dns = Column(String(100))
     zone = Column(String(100))
     extra = Column(JSONEncodedDict)
+
+
+class AsyncOperation(Base):
+    """Represents a long running operation on one or more boards."""
+
+    __tablename__ = 'async_operations'
+    __table_args__ = (
+        schema.UniqueConstraint('uuid', name='uniq_async_operations0uuid'),
+        table_args())
+    id = Column(Integer, primary_key=True)
+    uuid = Column(String(36))
+    name = Column(String(255))
+    target = Column(String(36))
+    owner = Column(String(36))
+    project = Column(String(36))
+    status = Column(String(15))
+    result = Column(JSONEncodedDict)
+
+
+class AsyncOperationItem(Base):
+    """Represents the result of an operation on one of its boards."""
+
+    __tablename__ = 'async_operation_items'
+    __table_args__ = (
+        schema.UniqueConstraint('operation_uuid', 'key',
+                                name='uniq_async_operation_items0key'),
+        schema.Index('async_operation_items_op_status_idx',
+                     'operation_uuid', 'status'),
+        table_args())
+    id = Column(Integer, primary_key=True)
+    operation_uuid = Column(String(36), ForeignKey('async_operations.uuid'),
+                            nullable=False)
+    key = Column(String(36), nullable=False)
+    status = Column(String(15))
+    value = Column(LongJSONEncodedDict)
+
+
+class AgentPort(Base):
+    """Represents a port of a wampagent, free when board_uuid is null."""
+
+    __tablename__ = 'agent_ports'
+    __table_args__ = (
+        schema.UniqueConstraint('agent', 'port',
+                                name='uniq_agent_ports0agent0port'),
+        schema.Index('agent_ports_agent_kind_board_idx',
+                     'agent', 'kind', 'board_uuid'),
+        table_args())
+    id = Column(Integer, primary_key=True)
+    agent = Column(String(255), nullable=False)
+    kind = Column(String(15), nullable=False)
+    port = Column(Integer, nullable=False)
+    board_uuid = Column(String(36), nullable=True)
+
+
+class TableVersion(Base):
+    """Represents the version of a table, bumped by every write to it."""
+
+    __tablename__ = 'table_versions'
+    __table_args__ = (table_args(),)
+    name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -12,6 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from iotronic.objects import agentport
+from iotronic.objects import asyncoperation
 from iotronic.objects import board
 from iotronic.objects import conductor
 from iotronic.objects import delegation
@@ -30,6 +32,8 @@ from iotronic.objects import sessionwp
 from iotronic.objects import wampagent
 from iotronic.objects import webservice
 
+AgentPort = agentport.AgentPort
+AsyncOperation = asyncoperation.AsyncOperation
 Conductor = conductor.Conductor
 Delegation = delegation.Delegation
 Board = board.Board
@@ -65,5 +69,7 @@ __all__ = (
     Operation,
     Fleet,
     Webservice,
-    EnabledWebservice
+    EnabledWebservice,
+    AsyncOperation,
+    AgentPort
 )
@@ -0,0 +1,75 @@
+# coding=utf-8
+#
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from iotronic.db import api as db_api
+from iotronic.objects import base
+from iotronic.objects import utils as obj_utils
+
+# ports exposing the services of the boards on the agents
+PUBLIC = 'public'
+# ports of the socat tunnels bridging the VIFs of the boards
+SOCAT = 'socat'
+
+
+class AgentPort(base.IotronicObject):
+    """A port of a wampagent, reserved for a board or free."""
+
+    # Version 1.0: Initial version
+    VERSION = '1.0'
+
+    dbapi = db_api.get_instance()
+
+    fields = {
+        'id': int,
+        'agent': obj_utils.str_or_none,
+        'kind': obj_utils.str_or_none,
+        'port': int,
+        'board_uuid': obj_utils.str_or_none,
+    }
+
+    @base.remotable_classmethod
+    def reserve(cls, context, agent, kind, board_uuid, first, last):
+        """Reserve a free port of an agent for a board.
+
+        :param context: Security context.
+        :param agent: the hostname of the wampagent.
+        :param kind: the kind of port, e.g. PUBLIC.
+        :param board_uuid: the uuid of the board.
+        :param first: the first port of the range of this kind.
+        :param last: the last port of the range of this kind.
+        :returns: the reserved port.
+        :raises: NoFreeAgentPort if every port of the range is reserved.
+        """
+        return cls.dbapi.reserve_agent_port(agent, kind, board_uuid,
+                                            first, last)
+
+    @base.remotable_classmethod
+    def release(cls, context, agent, port):
+        """Give a port back to an agent.
+
+        :param context: Security context.
+        :param agent: the hostname of the wampagent.
+        :param port: the port to release.
+        """
+        cls.dbapi.release_agent_port(agent, port)
+
+    @base.remotable_classmethod
+    def reclaim(cls, context):
+        """Release the ports held by boards which were deleted.
+
+        :param context: Security context.
+        :returns: the number of released ports.
+        """
+        return cls.dbapi.reclaim_agent_ports()
@@ -0,0 +1,128 @@
+# coding=utf-8
+#
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from iotronic.common import states
+from iotronic.db import api as db_api
+from iotronic.objects import base
+from iotronic.objects import utils as obj_utils
+
+
+class AsyncOperation(base.IotronicObject):
+    """A long running operation, polled by the clients.
+
+    The result maps every unit of work of the operation (e.g. a board) to
+    a dict holding its status and either its result or its error.
+    """
+
+    # Version 1.0: Initial version
+    # Version 1.1: The entries of the result are kept in their own rows
+    VERSION = '1.1'
+
+    dbapi = db_api.get_instance()
+
+    fields = {
+        'id': int,
+        'uuid': obj_utils.str_or_none,
+        'name': obj_utils.str_or_none,
+        'target': obj_utils.str_or_none,
+        'owner': obj_utils.str_or_none,
+        'project': obj_utils.str_or_none,
+        'status': obj_utils.str_or_none,
+        'result': obj_utils.dict_or_none,
+    }
+
+    def is_done(self):
+        return self.status in (states.OPERATION_COMPLETED,
+                               states.OPERATION_FAILED)
+
+    @staticmethod
+    def _from_db_object(operation, db_operation, items=None):
+        """Converts a database entity to a formal object."""
+        for field in operation.fields:
+            operation[field] = db_operation[field]
+        if items:
+            # the entries of an operation on many boards have their rows
+            operation.result = items
+        operation.obj_reset_changes()
+        return operation
+
+    @base.remotable_classmethod
+    def get_by_uuid(cls, context, uuid):
+        """Find an operation based on uuid and return an AsyncOperation.
+
+        :param uuid: the uuid of an operation.
+        :returns: a :class:`AsyncOperation` object.
+        """
+        db_operation = cls.dbapi.get_async_operation_by_uuid(uuid)
+        items = cls.dbapi.get_async_operation_items(uuid)
+        operation = AsyncOperation._from_db_object(cls(context), db_operation,
+                                                   items)
+        return operation
+
+    @base.remotable
+    def create(self, context=None, keys=None):
+        """Create an AsyncOperation record in the DB.
+
+        :param context: Security context. NOTE: This should only
+                        be used internally by the indirection_api.
+                        Unfortunately, RPC requires context as the first
+                        argument, even though we don't use it.
+                        A context should be set when instantiating the
+                        object, e.g.: AsyncOperation(context)
+        :param keys: the entries of the result, e.g. board uuids, which
+                     start pending.
+
+        """
+        values = self.obj_get_changes()
+        db_operation = self.dbapi.create_async_operation(values, keys)
+        pending = {'status': states.OPERATION_PENDING}
+        self._from_db_object(self, db_operation,
+                             dict((key, pending) for key in keys or ()))
+
+    @base.remotable
+    def save(self, context=None):
+        """Save updates to this AsyncOperation.
+
+        :param context: Security context. NOTE: This should only
+                        be used internally by the indirection_api.
+                        Unfortunately, RPC requires context as the first
+                        argument, even though we don't use it.
+                        A context should be set when instantiating the
+                        object, e.g.: AsyncOperation(context)
+        """
+        updates = self.obj_get_changes()
+        db_operation = self.dbapi.update_async_operation(self.uuid, updates)
+        self._from_db_object(self, db_operation)
+
+    @base.remotable
+    def set_items(self, context, items):
+        """Set some entries of the result, completing the operation if last.
+
+        :param context: Security context.
+        :param items: a dict mapping the entries of the result, e.g. board
+                      uuids, to a dict with their status.
+        """
+        db_operation = self.dbapi.set_async_operation_items(self.uuid, items)
+        # the result is not read back, it would cost a read per call
+        self.status = db_operation.status
+        self.obj_reset_changes(['status'])
+
+    def set_item(self, key, value):
+        """Set one entry of the result, completing the operation if last.
+
+        :param key: the entry of the result, e.g. a board uuid.
+        :param value: a dict with the status of the entry.
+        """
+        self.set_items({key: value})
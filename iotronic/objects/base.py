@@ -454,9 +454,11 @@ class IotronicObject(object):
             self[key] = value
 
     def as_dict(self):
+        # objects listed with a subset of their fields are partly loaded,
+        # the unset fields are left out rather than lazy loaded
         return dict((k, getattr(self, k))
                     for k in self.fields
-                    if hasattr(self, k))
+                    if self.obj_attr_is_set(k))
 
 
 class ObjectListBase(object):
@@ -17,6 +17,7 @@ from oslo_utils import strutils
 from oslo_utils import uuidutils
 
 from iotronic.common import exception
+from iotronic.common import permission_cache
 from iotronic.common import states
 from iotronic.db import api as db_api
 from iotronic.objects import base
@@ -57,9 +58,9 @@ class Board(base.IotronicObject):
         return False
 
     @staticmethod
-    def _from_db_object(board, db_board):
+    def _from_db_object(board, db_board, fields=None):
         """Converts a database entity to a formal object."""
-        for field in board.fields:
+        for field in (board.fields if fields is None else fields):
             board[field] = db_board[field]
         board.obj_reset_changes()
         return board
@@ -124,7 +125,8 @@ class Board(base.IotronicObject):
 
     @base.remotable_classmethod
     def list(cls, context, authorized_boards, limit=None,
-             marker=None, sort_key=None, sort_dir=None, filters=None):
+             marker=None, sort_key=None, sort_dir=None, filters=None,
+             fields=None, cursor=None):
         """Return a list of Board objects.
 
         :param context: Security context.
@@ -133,15 +135,35 @@ class Board(base.IotronicObject):
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
         :param filters: Filters to apply.
+        :param fields: Optional, the fields to load. Defaults to all.
+        :param cursor: Optional, keyset pagination cursor, see
+                       :func:`iotronic.db.api.Connection.get_board_list`.
         :returns: a list of :class:`Board` object.
 
         """
-
+        fields = obj_utils.projection(cls.fields, fields)
         db_boards = cls.dbapi.get_board_list(authorized_boards,
                                              filters=filters, limit=limit,
                                              marker=marker, sort_key=sort_key,
-                                             sort_dir=sort_dir)
-        return [Board._from_db_object(cls(context), obj) for obj in db_boards]
+                                             sort_dir=sort_dir, fields=fields,
+                                             cursor=cursor)
+        return [Board._from_db_object(cls(context), obj, fields)
+                for obj in db_boards]
+
+    @classmethod
+    def iterate(cls, context, authorized_boards, filters=None, fields=None):
+        """Iterate over Board objects, streaming them from the DB.
+
+        :param context: Security context.
+        :param filters: Filters to apply.
+        :param fields: Optional, the fields to load. Defaults to all.
+        :returns: a generator of :class:`Board` object.
+
+        """
+        fields = obj_utils.projection(cls.fields, fields)
+        for obj in cls.dbapi.get_board_iter(authorized_boards,
+                                            filters=filters, fields=fields):
+            yield Board._from_db_object(cls(context), obj, fields)
 
     @base.remotable_classmethod
     def reserve(cls, context, tag, board_id):
@@ -194,6 +216,31 @@ class Board(base.IotronicObject):
         db_board = self.dbapi.create_board(values)
         self._from_db_object(self, db_board)
 
+    @base.remotable_classmethod
+    def create_batch(cls, context, boards, locations, owner):
+        """Create boards with their location and owner delegation.
+
+        :param context: Security context.
+        :param boards: the changed (but not saved) Board objects.
+        :param locations: the Location object of every board.
+        :param owner: the uuid of the user owning the boards.
+        :returns: for every board, either the created :class:`Board`
+                  object or the exception raised creating it.
+        """
+        items = []
+        for board, location in zip(boards, locations):
+            delegation = {'uuid': uuidutils.generate_uuid(),
+                          'delegated': owner,
+                          'role': 'owner',
+                          'type': 'board'}
+            items.append((board.obj_get_changes(),
+                          location.obj_get_changes(), delegation))
+        results = cls.dbapi.create_board_batch(items)
+        permission_cache.PermissionCache.invalidate_user(owner)
+        return [r if isinstance(r, Exception)
+                else Board._from_db_object(cls(context), r)
+                for r in results]
+
     @base.remotable
     def destroy(self, context=None):
         """Delete the Board from the DB.
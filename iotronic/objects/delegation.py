@@ -17,6 +17,7 @@ from oslo_utils import strutils
 from oslo_utils import uuidutils
 
 from iotronic.common import exception
+from iotronic.common import permission_cache
 from iotronic.db import api as db_api
 from iotronic.objects import base
 from iotronic.objects import utils as obj_utils
@@ -144,6 +145,7 @@ class Delegation(base.IotronicObject):
         values = self.obj_get_changes()
         db_delegation = self.dbapi.create_delegation(values)
         self._from_db_object(self, db_delegation)
+        permission_cache.PermissionCache.invalidate_user(self.delegated)
 
     @base.remotable
     def destroy(self, context=None):
@@ -158,16 +160,19 @@ class Delegation(base.IotronicObject):
         """
         self.dbapi.destroy_delegation(self.uuid, self.type)
         self.obj_reset_changes()
+        permission_cache.PermissionCache.invalidate_user(self.delegated)
 
     @base.remotable_classmethod
     def destroy_by_node_uuid(cls, context, node_uuid, type):
         """Delete the Delegation from the DB."""
         cls.dbapi.destroy_delegation_by_node(node_uuid, type=type)
+        permission_cache.PermissionCache.invalidate_nodes()
 
     @base.remotable_classmethod
     def destroy_by_uuid(cls, context, delegation_uuid, type):
         """Delete the Delegation from the DB."""
         cls.dbapi.destroy_delegation(delegation_uuid, type=type)
+        permission_cache.PermissionCache.invalidate_nodes()
 
     @base.remotable_classmethod
     def check_role_assignment(cls, context, delegator_role,
@@ -215,6 +220,7 @@ class Delegation(base.IotronicObject):
         updates = self.obj_get_changes()
         self.dbapi.update_delegation(self.uuid, updates)
         self.obj_reset_changes()
+        permission_cache.PermissionCache.invalidate_user(self.delegated)
 
     @base.remotable
     def refresh(self, context=None):
@@ -15,6 +15,7 @@
 
 from iotronic.db import api as db_api
 from iotronic.objects import base
+from iotronic.objects import service
 from iotronic.objects import utils as obj_utils
 
 
@@ -69,6 +70,21 @@ class ExposedService(base.IotronicObject):
         return [ExposedService._from_db_object(cls(context), obj)
                 for obj in db_exps]
 
+    @base.remotable_classmethod
+    def get_with_services_by_board_uuid(cls, context, board_uuid):
+        """Return the exposed services of a board with their services.
+
+        :param context: Security context.
+        :param board_uuid: the uuid of a board.
+        :returns: a list of (:class:`ExposedService`, :class:`Service`)
+                  pairs.
+        """
+        db_pairs = cls.dbapi.get_exposed_services_with_service(board_uuid)
+        return [(ExposedService._from_db_object(cls(context), db_exp),
+                 service.Service._from_db_object(
+                     service.Service(context), db_service))
+                for db_exp, db_service in db_pairs]
+
     @base.remotable_classmethod
     def get_by_service_uuid(cls, context, service_uuid):
         """Find a exposed_service based on uuid and return a Board object.
@@ -38,9 +38,9 @@ class Fleet(base.IotronicObject):
     }
 
     @staticmethod
-    def _from_db_object(fleet, db_fleet):
+    def _from_db_object(fleet, db_fleet, fields=None):
         """Converts a database entity to a formal object."""
-        for field in fleet.fields:
+        for field in (fleet.fields if fields is None else fields):
             fleet[field] = db_fleet[field]
         fleet.obj_reset_changes()
         return fleet
@@ -94,7 +94,7 @@ class Fleet(base.IotronicObject):
 
     @base.remotable_classmethod
     def list(cls, context, authorized_fleets, limit=None, marker=None,
-             sort_key=None, sort_dir=None, filters=None):
+             sort_key=None, sort_dir=None, filters=None, fields=None):
         """Return a list of Fleet objects.
 
         :param context: Security context.
@@ -103,16 +103,19 @@ class Fleet(base.IotronicObject):
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
         :param filters: Filters to apply.
+        :param fields: Optional, the fields to load. Defaults to all.
         :returns: a list of :class:`Fleet` object.
 
         """
+        fields = obj_utils.projection(cls.fields, fields)
         db_fleets = cls.dbapi.get_fleet_list(authorized_fleets,
                                              filters=filters,
                                              limit=limit,
                                              marker=marker,
                                              sort_key=sort_key,
-                                             sort_dir=sort_dir)
-        return [Fleet._from_db_object(cls(context), obj)
+                                             sort_dir=sort_dir,
+                                             fields=fields)
+        return [Fleet._from_db_object(cls(context), obj, fields)
                 for obj in db_fleets]
 
     @base.remotable
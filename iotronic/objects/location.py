@@ -146,6 +146,18 @@ class Location(base.IotronicObject):
                                                      sort_dir=sort_dir)
         return Location._from_db_object_list(db_loc, cls, context)
 
+    @base.remotable_classmethod
+    def list_by_board_ids(cls, context, board_ids):
+        """Return the Location objects associated with a set of boards.
+
+        :param context: Security context.
+        :param board_ids: the IDs of the boards.
+        :returns: a list of :class:`Location` object, ordered by board.
+
+        """
+        db_loc = cls.dbapi.get_locations_by_board_ids(board_ids)
+        return Location._from_db_object_list(db_loc, cls, context)
+
     @base.remotable_classmethod
     def list_by_board_id(cls, context, board_id, limit=None, marker=None,
                          sort_key=None, sort_dir=None):
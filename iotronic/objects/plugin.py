@@ -25,6 +25,8 @@ ACTIONS = ['PluginCall', 'PluginStop', 'PluginStart',
            'PluginStatus', 'PluginReboot']
 CUSTOM_PARAMS = ['PluginCall', 'PluginStart', 'PluginReboot']
 NO_PARAMS = ['PluginStatus']
+# the injection, run on the boards of a fleet as the other actions
+INJECT = 'PluginInject'
 
 
 def is_valid_action(action):
@@ -54,15 +56,16 @@ class Plugin(base.IotronicObject):
         'owner': obj_utils.str_or_none,
         'public': bool,
         'code': obj_utils.str_or_none,
+        'code_hash': obj_utils.str_or_none,
         'callable': bool,
         'parameters': obj_utils.dict_or_none,
         'extra': obj_utils.dict_or_none,
     }
 
     @staticmethod
-    def _from_db_object(plugin, db_plugin):
+    def _from_db_object(plugin, db_plugin, fields=None):
         """Converts a database entity to a formal object."""
-        for field in plugin.fields:
+        for field in (plugin.fields if fields is None else fields):
             plugin[field] = db_plugin[field]
         plugin.obj_reset_changes()
         return plugin
@@ -116,7 +119,7 @@ class Plugin(base.IotronicObject):
 
     @base.remotable_classmethod
     def list(cls, context, authorized_plugins, limit=None, marker=None,
-             sort_key=None, sort_dir=None, filters=None):
+             sort_key=None, sort_dir=None, filters=None, fields=None):
         """Return a list of Plugin objects.
 
         :param context: Security context.
@@ -125,16 +128,19 @@ class Plugin(base.IotronicObject):
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
         :param filters: Filters to apply.
+        :param fields: Optional, the fields to load. Defaults to all.
         :returns: a list of :class:`Plugin` object.
 
         """
+        fields = obj_utils.projection(cls.fields, fields)
         db_plugins = cls.dbapi.get_plugin_list(authorized_plugins,
                                                filters=filters,
                                                limit=limit,
                                                marker=marker,
                                                sort_key=sort_key,
-                                               sort_dir=sort_dir)
-        return [Plugin._from_db_object(cls(context), obj)
+                                               sort_dir=sort_dir,
+                                               fields=fields)
+        return [Plugin._from_db_object(cls(context), obj, fields)
                 for obj in db_plugins]
 
     @base.remotable
@@ -36,6 +36,7 @@ class Port(base.IotronicObject):
         'MAC_add': obj_utils.str_or_none,
         'ip': obj_utils.str_or_none,
         'board_uuid': obj_utils.str_or_none,
+        'tcp_port': obj_utils.int_or_none,
     }
 
     @staticmethod
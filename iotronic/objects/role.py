@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from iotronic.common import permission_cache
 from iotronic.db import api as db_api
 from iotronic.objects import base
 from iotronic.objects import utils as obj_utils
@@ -85,6 +86,7 @@ class Role(base.IotronicObject):
         values = self.obj_get_changes()
         db_role = self.dbapi.create_role(values)
         self._from_db_object(self, db_role)
+        permission_cache.PermissionCache.reset()
 
     @base.remotable
     def destroy(self, context=None):
@@ -99,6 +101,7 @@ class Role(base.IotronicObject):
         """
         self.dbapi.destroy_role(self.name)
         self.obj_reset_changes()
+        permission_cache.PermissionCache.reset()
 
     @base.remotable
     def save(self, context=None):
@@ -119,3 +122,4 @@ class Role(base.IotronicObject):
         updates = self.obj_get_changes()
         self.dbapi.update_role(self.name, updates)
         self.obj_reset_changes()
+        permission_cache.PermissionCache.reset()
@@ -48,9 +48,9 @@ class Service(base.IotronicObject):
     }
 
     @staticmethod
-    def _from_db_object(service, db_service):
+    def _from_db_object(service, db_service, fields=None):
         """Converts a database entity to a formal object."""
-        for field in service.fields:
+        for field in (service.fields if fields is None else fields):
             service[field] = db_service[field]
         service.obj_reset_changes()
         return service
@@ -104,7 +104,7 @@ class Service(base.IotronicObject):
 
     @base.remotable_classmethod
     def list(cls, context, authorized_services, limit=None, marker=None,
-             sort_key=None, sort_dir=None, filters=None):
+             sort_key=None, sort_dir=None, filters=None, fields=None):
         """Return a list of Service objects.
 
         :param context: Security context.
@@ -113,16 +113,19 @@ class Service(base.IotronicObject):
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
         :param filters: Filters to apply.
+        :param fields: Optional, the fields to load. Defaults to all.
         :returns: a list of :class:`Service` object.
 
         """
+        fields = obj_utils.projection(cls.fields, fields)
         db_services = cls.dbapi.get_service_list(authorized_services,
                                                  filters=filters,
                                                  limit=limit,
                                                  marker=marker,
                                                  sort_key=sort_key,
-                                                 sort_dir=sort_dir)
-        return [Service._from_db_object(cls(context), obj)
+                                                 sort_dir=sort_dir,
+                                                 fields=fields)
+        return [Service._from_db_object(cls(context), obj, fields)
                 for obj in db_services]
 
     @base.remotable
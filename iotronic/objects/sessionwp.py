@@ -81,6 +81,17 @@ class SessionWP(base.IotronicObject):
         session = SessionWP._from_db_object(cls(context), db_session)
         return session
 
+    @base.remotable_classmethod
+    def list_by_board_uuids(cls, context, board_uuids, valid=True):
+        """Return the SessionWP objects of a set of boards.
+
+        :param board_uuids: the uuids of the boards.
+        :param context: Security context
+        :returns: a list of :class:`SessionWP` objects.
+        """
+        db_list = cls.dbapi.get_sessions_by_board_uuids(board_uuids, valid)
+        return [SessionWP._from_db_object(cls(context), x) for x in db_list]
+
     @base.remotable_classmethod
     def valid_list(cls, context, agent):
         """Return a list of SessionWP objects.
@@ -92,6 +103,30 @@ class SessionWP(base.IotronicObject):
         db_list = cls.dbapi.get_valid_wpsessions_list(agent)
         return [SessionWP._from_db_object(cls(context), x) for x in db_list]
 
+    @base.remotable_classmethod
+    def invalidate(cls, context, session_ids):
+        """Invalidate sessions and set their boards offline.
+
+        :param context: Security context
+        :param session_ids: the wamp ids of the sessions.
+        :returns: the uuids of the boards which went offline.
+        """
+        return cls.dbapi.invalidate_sessions(session_ids)
+
+    @base.remotable_classmethod
+    def update_presence(cls, context, connections, leaves):
+        """Apply a batch of connections and leaves of boards.
+
+        :param context: Security context
+        :param connections: a dict mapping the uuid of a board to a dict
+                            with its new session_id and the values of the
+                            board to update.
+        :param leaves: the wamp ids of the sessions which left.
+        :returns: a dict with the uuids of the boards set online, offline
+                  and of the connected ones not found.
+        """
+        return cls.dbapi.update_presence(connections, leaves)
+
     @base.remotable
     def create(self, context=None):
         """Create a SessionWP record in the DB.
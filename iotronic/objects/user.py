@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from iotronic.common import permission_cache
 from iotronic.db import api as db_api
 from iotronic.objects import base
 from iotronic.objects import utils as obj_utils
@@ -96,6 +97,7 @@ class User(base.IotronicObject):
         values = self.obj_get_changes()
         db_user = self.dbapi.create_user(values)
         self._from_db_object(self, db_user)
+        permission_cache.PermissionCache.invalidate_user(self.uuid)
 
     @base.remotable
     def destroy(self, context=None):
@@ -110,6 +112,7 @@ class User(base.IotronicObject):
         """
         self.dbapi.destroy_user(self.uuid)
         self.obj_reset_changes()
+        permission_cache.PermissionCache.invalidate_user(self.uuid)
 
     @base.remotable
     def save(self, context=None):
@@ -130,3 +133,4 @@ class User(base.IotronicObject):
         updates = self.obj_get_changes()
         self.dbapi.update_user(self.uuid, updates)
         self.obj_reset_changes()
+        permission_cache.PermissionCache.invalidate_user(self.uuid)
@@ -25,6 +25,17 @@ import six
 from iotronic.common.i18n import _
 
 
+def projection(obj_fields, fields):
+    """Return the object fields to load for a set of requested fields.
+
+    id and uuid are always loaded, they are needed to build the links and
+    to look up the related resources. None means every field.
+    """
+    if fields is None:
+        return None
+    return [f for f in obj_fields if f in fields or f in ('id', 'uuid')]
+
+
 def datetime_or_none(dt):
     """Validate a datetime or None value."""
     if dt is None:
@@ -39,9 +39,9 @@ class Webservice(base.IotronicObject):
     }
 
     @staticmethod
-    def _from_db_object(webservice, db_webservice):
+    def _from_db_object(webservice, db_webservice, fields=None):
         """Converts a database entity to a formal object."""
-        for field in webservice.fields:
+        for field in (webservice.fields if fields is None else fields):
             webservice[field] = db_webservice[field]
         webservice.obj_reset_changes()
         return webservice
@@ -95,7 +95,7 @@ class Webservice(base.IotronicObject):
 
     @base.remotable_classmethod
     def list(cls, context, authorized_webservices, limit=None, marker=None,
-             sort_key=None, sort_dir=None, filters=None):
+             sort_key=None, sort_dir=None, filters=None, fields=None):
         """Return a list of Webservice objects.
 
         :param context: Security context.
@@ -104,16 +104,19 @@ class Webservice(base.IotronicObject):
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
         :param filters: Filters to apply.
+        :param fields: Optional, the fields to load. Defaults to all.
         :returns: a list of :class:`Webservice` object.
 
         """
+        fields = obj_utils.projection(cls.fields, fields)
         db_webservices = cls.dbapi.get_webservice_list(authorized_webservices,
                                                        filters=filters,
                                                        limit=limit,
                                                        marker=marker,
                                                        sort_key=sort_key,
-                                                       sort_dir=sort_dir)
-        return [Webservice._from_db_object(cls(context), obj)
+                                                       sort_dir=sort_dir,
+                                                       fields=fields)
+        return [Webservice._from_db_object(cls(context), obj, fields)
                 for obj in db_webservices]
 
     @base.remotable
@@ -0,0 +1,90 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Base classes and helpers of the unit tests."""
+
+import datetime
+import unittest
+from unittest import mock
+import uuid
+
+from iotronic.common import states
+
+
+class TestCase(unittest.TestCase):
+    """Test case running against a mocked request and database."""
+
+    def setUp(self):
+        super(TestCase, self).setUp()
+        self.context = mock.Mock()
+        request = mock.patch('pecan.request')
+        self.request = request.start()
+        self.request.context = self.context
+        self.request.public_url = 'http://iotronic'
+        self.addCleanup(request.stop)
+
+    def patch_dbapi(self, *classes):
+        """Replace the db api of objects classes with a single mock.
+
+        :returns: the mock, whose calls are the queries run.
+        """
+        dbapi = mock.Mock()
+        for cls in classes:
+            patcher = mock.patch.object(cls, 'dbapi', dbapi)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return dbapi
+
+
+def db_board(board_id, **kwargs):
+    """Return a database row of a board."""
+    row = {'id': board_id,
+           'created_at': datetime.datetime(2026, 10, 16, 12, board_id % 60),
+           'updated_at': None,
+           'uuid': str(uuid.UUID(int=board_id)),
+           'code': 'code-%d' % board_id,
+           'status': states.ONLINE,
+           'name': 'board-%d' % board_id,
+           'type': 'gateway',
+           'agent': 'agent',
+           'owner': str(uuid.uuid4()),
+           'project': str(uuid.uuid4()),
+           'fleet': None,
+           'lr_version': '0.4',
+           'connectivity': {},
+           'mobile': False,
+           'config': {},
+           'extra': {}}
+    row.update(kwargs)
+    return row
+
+
+def db_session(board, **kwargs):
+    """Return a database row of the session of a board."""
+    row = {'id': board['id'],
+           'board_uuid': board['uuid'],
+           'session_id': str(1000 + board['id']),
+           'board_id': board['id'],
+           'valid': True}
+    row.update(kwargs)
+    return row
+
+
+def db_location(board, **kwargs):
+    """Return a database row of the location of a board."""
+    row = {'id': board['id'],
+           'board_id': board['id'],
+           'longitude': '15.5',
+           'latitude': '38.2',
+           'altitude': '0'}
+    row.update(kwargs)
+    return row
@@ -0,0 +1,149 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests and cold/warm benchmark of authorize().
+
+Run as a script to print the benchmark:
+
+    python -m iotronic.tests.test_authorization [delegations] [rounds]
+"""
+
+import sys
+import time
+from unittest import mock
+import uuid
+
+from oslo_config import cfg
+
+from iotronic.common import authorization
+from iotronic.common import exception
+from iotronic.common import permission_cache
+from iotronic.tests import base
+
+CONF = cfg.CONF
+
+USER = str(uuid.uuid4())
+
+
+def fake_dbapi(delegations):
+    """Return a db api whose user has a number of delegated boards."""
+    dbapi = mock.Mock()
+    nodes = [str(uuid.UUID(int=i)) for i in range(1, delegations + 1)]
+    dbapi.get_node_delegations.return_value = [
+        mock.Mock(node=node, role='owner' if i % 2 else 'user')
+        for i, node in enumerate(nodes)]
+    dbapi.get_node_delegation.return_value = mock.Mock(role='user')
+    dbapi.get_role_permissions.return_value = mock.Mock(
+        permissions=['board:get', 'plugin:all'])
+    dbapi.nodes = nodes
+    return dbapi
+
+
+def benchmark(dbapi, rounds=100):
+    """Time cold and warm authorizations of a board list.
+
+    :returns: a dict with the average seconds, queries, cache hits and
+              cache misses of a cold and of a warm call.
+    """
+    cache = permission_cache.PermissionCache
+    result = {}
+    for name, reset in (('cold', True), ('warm', False)):
+        dbapi.reset_mock()
+        stats = cache.stats()
+        start = time.time()
+        for i in range(rounds):
+            if reset:
+                cache.reset()
+            authorization.authorize('board:get')
+        seconds = time.time() - start
+        after = cache.stats()
+        result[name] = {
+            'seconds': seconds / rounds,
+            'queries': len(dbapi.mock_calls) / rounds,
+            'hits': (after['hits'] - stats['hits']) / rounds,
+            'misses': (after['misses'] - stats['misses']) / rounds}
+    return result
+
+
+class TestAuthorize(base.TestCase):
+
+    def setUp(self):
+        super(TestAuthorize, self).setUp()
+        self.request.environ = {'HTTP_X_USER_ID': USER}
+        self.dbapi = fake_dbapi(2000)
+        instance = mock.patch.object(authorization.db_api, 'get_instance',
+                                     return_value=self.dbapi)
+        instance.start()
+        self.addCleanup(instance.stop)
+        CONF.set_override('list_mode', 'list', 'authorization')
+        self.addCleanup(CONF.clear_override, 'list_mode', 'authorization')
+        permission_cache.PermissionCache.reset()
+        self.addCleanup(permission_cache.PermissionCache.reset)
+
+    def test_cold_and_warm(self):
+        result = benchmark(self.dbapi, rounds=10)
+        # one query for the delegations and one for the role
+        self.assertEqual(2, result['cold']['queries'])
+        self.assertEqual(0, result['warm']['queries'])
+        # a warm call is served by the node set cached by the cold one
+        self.assertLessEqual(1, result['cold']['misses'])
+        self.assertEqual(0, result['warm']['misses'])
+        self.assertEqual(1, result['warm']['hits'])
+
+    def test_list_uses_the_cache(self):
+        nodes = authorization.authorize('board:get')
+        self.assertEqual(self.dbapi.nodes, sorted(nodes))
+        authorization.authorize('board:get')
+        self.assertEqual(1, self.dbapi.get_node_delegations.call_count)
+
+    def test_target_reads_the_delegation(self):
+        target = self.dbapi.nodes[0]
+        authorization.authorize('board:get')
+        authorization.authorize('board:get', target)
+        self.dbapi.get_node_delegation.assert_called_once_with(
+            USER, 'board', target)
+
+    def test_unknown_user_is_not_cached(self):
+        self.dbapi.get_user_details.side_effect = exception.UserNotFound(
+            user=USER)
+        self.assertIsNone(authorization._base_role(self.dbapi, USER))
+        # created meanwhile, e.g. through another API worker
+        self.dbapi.get_user_details.side_effect = None
+        self.dbapi.get_user_details.return_value = mock.Mock(
+            base_role='admin')
+        self.assertEqual('admin', authorization._base_role(self.dbapi, USER))
+        self.assertEqual('admin', authorization._base_role(self.dbapi, USER))
+        self.assertEqual(2, self.dbapi.get_user_details.call_count)
+
+    def test_target_revoked_elsewhere(self):
+        target = self.dbapi.nodes[0]
+        authorization.authorize('board:get')
+        # revoked through another API worker: the cache is not invalidated
+        self.dbapi.get_node_delegation.side_effect = (
+            exception.DelegationNotFound())
+        self.assertRaises(exception.DelegationNotFound,
+                          authorization.authorize, 'board:get', target)
+
+
+if __name__ == '__main__':
+    delegations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    test = TestAuthorize('test_cold_and_warm')
+    test.setUp()
+    try:
+        test.dbapi = fake_dbapi(delegations)
+        authorization.db_api.get_instance.return_value = test.dbapi
+        for name, timing in sorted(benchmark(test.dbapi, rounds).items()):
+            print('%s: %.6f s, %.1f queries per call' % (
+                name, timing['seconds'], timing['queries']))
+    finally:
+        test.doCleanups()
@@ -0,0 +1,115 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import json
+from unittest import mock
+
+import wsme
+
+from iotronic.api.controllers.v1 import board as board_api
+from iotronic.api.controllers.v1 import utils as api_utils
+from iotronic import objects
+from iotronic.tests import base
+
+
+class TestBoardList(base.TestCase):
+
+    def setUp(self):
+        super(TestBoardList, self).setUp()
+        self.dbapi = self.patch_dbapi(objects.Board, objects.SessionWP,
+                                      objects.Location)
+        limit = mock.patch.object(board_api.api_utils, 'validate_limit',
+                                  side_effect=lambda limit: limit)
+        limit.start()
+        self.addCleanup(limit.stop)
+
+    def _list(self, rows, fields=board_api._DEFAULT_RETURN_FIELDS):
+        self.dbapi.get_board_list.return_value = rows
+        self.dbapi.get_sessions_by_board_uuids.return_value = [
+            base.db_session(row) for row in rows]
+        self.dbapi.get_locations_by_board_ids.return_value = [
+            base.db_location(row) for row in rows]
+        return board_api.BoardsController()._get_boards_collection(
+            [], None, None, len(rows), 'id', 'asc', fields=fields)
+
+    def test_as_dict_skips_unset_fields(self):
+        board = objects.Board(self.context, uuid='uuid', name='name')
+        self.assertEqual({'uuid': 'uuid', 'name': 'name'}, board.as_dict())
+
+    def test_default_fields(self):
+        rows = [base.db_board(i) for i in range(1, 4)]
+        collection = self._list(rows)
+
+        kwargs = self.dbapi.get_board_list.call_args[1]
+        self.assertNotIn('config', kwargs['fields'])
+        self.assertNotIn('agent', kwargs['fields'])
+        self.assertEqual([r['uuid'] for r in rows],
+                         [b.uuid for b in collection.boards])
+        self.assertEqual([str(1000 + r['id']) for r in rows],
+                         [b.session for b in collection.boards])
+        for board in collection.boards:
+            self.assertEqual(2, len(board.links))
+
+    def test_export_fields(self):
+        rows = [base.db_board(i) for i in range(1, 4)]
+        self.dbapi.get_board_iter.return_value = iter(rows)
+        with mock.patch.object(board_api.authorization, 'authorize',
+                               return_value=[]):
+            response = board_api.BoardsController().export(
+                fields='name,status')
+
+        lines = [json.loads(line) for line in response.app_iter]
+        self.assertEqual([{'name': r['name'], 'status': r['status']}
+                          for r in rows], lines)
+
+    def test_queries_per_page(self):
+        # boards, sessions and locations: one query each, whatever the size
+        for size in (1, 10, 1000):
+            self.dbapi.reset_mock()
+            rows = [base.db_board(i) for i in range(1, size + 1)]
+            collection = self._list(rows, fields=None)
+
+            self.assertEqual(size, len(collection.boards))
+            self.assertEqual(
+                ['get_board_list', 'get_locations_by_board_ids',
+                 'get_sessions_by_board_uuids'],
+                sorted(call[0] for call in self.dbapi.mock_calls))
+            for board in collection.boards:
+                self.assertEqual(1, len(board.location))
+
+    def test_cursor_by_created_at(self):
+        rows = [base.db_board(i) for i in range(1, 4)]
+        self.dbapi.get_board_list.return_value = rows
+        self.dbapi.get_sessions_by_board_uuids.return_value = []
+        self.dbapi.get_locations_by_board_ids.return_value = []
+        controller = board_api.BoardsController()
+        collection = controller._get_boards_collection(
+            [], None, None, 3, 'created_at', 'asc', fields=None)
+
+        # the next page seeks past the datetime of the last board
+        cursor = collection.next.split('cursor=')[1].split('&')[0]
+        controller._get_boards_collection(
+            [], None, None, 3, 'created_at', 'asc', fields=None,
+            cursor=cursor)
+        kwargs = self.dbapi.get_board_list.call_args[1]
+        self.assertEqual([datetime.datetime(2026, 10, 16, 12, 3), 3],
+                         kwargs['cursor'])
+
+    def test_cursor_datetime_is_utc(self):
+        board = objects.Board(self.context, id=1, created_at=(
+            '2026-10-16T14:00:00+02:00'))
+        cursor = api_utils.encode_cursor(board, 'created_at')
+        self.assertEqual([datetime.datetime(2026, 10, 16, 12, 0), 1],
+                         api_utils.decode_cursor(cursor))
+        self.assertRaises(wsme.exc.ClientSideError,
+                          api_utils.decode_cursor, 'eyJpZCI6IDF9')
@@ -0,0 +1,132 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests of the plugin actions on a fleet."""
+
+from concurrent import futures
+import threading
+import time
+from unittest import mock
+import uuid
+
+from oslo_config import cfg
+
+from iotronic.common import states
+from iotronic.conductor import board_routes
+from iotronic.conductor import endpoints
+from iotronic import objects
+from iotronic.tests import base
+from iotronic.wamp import wampmessage as wm
+
+CONF = cfg.CONF
+CONF.import_group('conductor', 'iotronic.conductor.manager')
+
+# the default max_inflight_calls of the agents
+MAX_INFLIGHT_CALLS = 48
+
+
+class FakeAgent(object):
+    """A wamp agent admitting a bounded number of calls, as InflightCalls.
+
+    :param busy: the number of calls of other clients in progress during
+                 the first batch.
+    """
+
+    def __init__(self, busy=0):
+        self._lock = threading.Lock()
+        self.busy = busy
+        self.inflight = 0
+        self.max_inflight = 0
+        self.batches = []
+        self.rejected = 0
+
+    def prepare(self, server=None, **kwargs):
+        return self
+
+    def call(self, ctx, method, calls):
+        with self._lock:
+            admitted = max(0, min(len(calls), MAX_INFLIGHT_CALLS -
+                                  self.inflight - self.busy))
+            self.busy = 0
+            self.inflight += admitted
+            self.max_inflight = max(self.max_inflight, self.inflight)
+            self.rejected += len(calls) - admitted
+            self.batches.append(len(calls))
+        # let the concurrent batches overlap
+        time.sleep(0.01)
+        with self._lock:
+            self.inflight -= admitted
+        return [wm.WampSuccess('done').serialize()] * admitted + \
+            [wm.WampRejected('busy').serialize()] * (len(calls) - admitted)
+
+
+class TestPluginActionOnFleet(base.TestCase):
+
+    def setUp(self):
+        super(TestPluginActionOnFleet, self).setUp()
+        CONF.set_override('fleet_action_workers', 16, 'conductor')
+        CONF.set_override('wamp_batch_size', 32, 'conductor')
+        CONF.set_override('wamp_rejected_backoff', 0, 'conductor')
+        self.addCleanup(CONF.clear_override, 'fleet_action_workers',
+                        'conductor')
+        self.addCleanup(CONF.clear_override, 'wamp_batch_size', 'conductor')
+        self.addCleanup(CONF.clear_override, 'wamp_rejected_backoff',
+                        'conductor')
+
+        route = board_routes.Route('agent', '1001', states.ONLINE)
+        get_route = mock.patch.object(endpoints._board_routes, 'get',
+                                      return_value=route)
+        get_route.start()
+        self.addCleanup(get_route.stop)
+
+        self.items = {}
+        self.dbapi = self.patch_dbapi(objects.AsyncOperation)
+        self.dbapi.set_async_operation_items.side_effect = self._set_items
+
+    def _set_items(self, operation_uuid, items):
+        self.items.update(items)
+        return mock.Mock(status=states.OPERATION_RUNNING)
+
+    def _action_fleet(self, agent, boards):
+        endpoint = endpoints.ConductorEndpoint.__new__(
+            endpoints.ConductorEndpoint)
+        endpoint.wamp_agent_client = agent
+        endpoint.fleet_executor = futures.ThreadPoolExecutor(
+            max_workers=CONF.conductor.fleet_action_workers)
+        board_uuids = [str(uuid.uuid4()) for i in range(boards)]
+        with mock.patch.object(objects.plugin, 'want_params',
+                               return_value=False):
+            endpoint.action_fleet(self.context, str(uuid.uuid4()),
+                                  board_uuids, 'PluginStart', None,
+                                  plugin_uuid=str(uuid.uuid4()))
+            endpoint.fleet_executor.shutdown(wait=True)
+        return board_uuids
+
+    def test_more_boards_than_the_agent_admits(self):
+        agent = FakeAgent()
+        boards = self._action_fleet(agent, 5 * MAX_INFLIGHT_CALLS)
+
+        self.assertLessEqual(agent.max_inflight, MAX_INFLIGHT_CALLS)
+        self.assertEqual(0, agent.rejected)
+        self.assertTrue(all(size <= 32 for size in agent.batches))
+        self.assertEqual(set(boards), set(self.items))
+        self.assertTrue(all(item['status'] == states.OPERATION_COMPLETED
+                            for item in self.items.values()))
+
+    def test_rejected_calls_are_sent_again(self):
+        agent = FakeAgent(busy=MAX_INFLIGHT_CALLS - 10)
+        boards = self._action_fleet(agent, 100)
+
+        self.assertEqual(22, agent.rejected)
+        self.assertEqual(set(boards), set(self.items))
+        self.assertTrue(all(item['status'] == states.OPERATION_COMPLETED
+                            for item in self.items.values()))
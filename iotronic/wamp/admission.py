@@ -0,0 +1,110 @@
+# coding=utf-8
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Admission control of the registrations and connections of the boards.
+"""
+
+import asyncio
+import random
+import time
+
+from iotronic.common import metrics
+from iotronic.wamp import wampmessage as wm
+from oslo_config import cfg
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+admission_opts = [
+    cfg.FloatOpt('admission_rate',
+                 default=50.0,
+                 help=('Registrations and connections of boards admitted '
+                       'per second. 0 disables the admission control.')),
+    cfg.IntOpt('admission_burst',
+               default=100,
+               help=('Registrations and connections admitted at once '
+                     'before the rate applies.')),
+    cfg.IntOpt('admission_queue_size',
+               default=500,
+               help=('Registrations and connections waiting for their '
+                     'turn; the further ones are asked to retry later.')),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(admission_opts, 'wamp')
+
+
+class TokenBucket(object):
+    """A token bucket whose callers wait on the asyncio loop.
+
+    A caller finding no token reserves the next one and sleeps until it
+    is due, as long as at most admission_queue_size callers are waiting;
+    otherwise it is rejected with the seconds it should wait, jittered so
+    that the rejected boards do not come back all together.
+
+    Only to be used from the WAMP loop.
+    """
+
+    def __init__(self):
+        self._tokens = None
+        self._updated = None
+        self.rejected = 0
+
+    def _refill(self, now):
+        burst = max(CONF.wamp.admission_burst, 1)
+        if self._tokens is None:
+            self._tokens = float(burst)
+        else:
+            self._tokens = min(
+                float(burst),
+                self._tokens +
+                (now - self._updated) * CONF.wamp.admission_rate)
+        self._updated = now
+
+    async def admit(self):
+        """Wait for the turn of a caller.
+
+        :returns: None when admitted, else the seconds to retry after.
+        """
+        rate = CONF.wamp.admission_rate
+        if rate <= 0:
+            return None
+
+        self._refill(time.time())
+        # the reserved tokens of the waiting callers are below zero
+        if self._tokens <= -CONF.wamp.admission_queue_size:
+            retry_after = (1 - self._tokens) / rate
+            retry_after *= random.uniform(1.0, 2.0)
+            self.rejected += 1
+            metrics.gauge('admission.rejected', self.rejected)
+            return round(retry_after, 1)
+
+        self._tokens -= 1
+        metrics.gauge('admission.queued', max(0, -int(self._tokens)))
+        if self._tokens < 0:
+            wait = -self._tokens / rate
+            metrics.record('admission.wait', wait)
+            await asyncio.sleep(wait)
+        return None
+
+
+bucket = TokenBucket()
+
+
+def retry_later(retry_after):
+    """Return the reply asking a board to retry after some seconds."""
+    LOG.debug('Too many boards connecting, retry after %s seconds',
+              retry_after)
+    return wm.WampWarning({'retry_after': retry_after}).serialize()
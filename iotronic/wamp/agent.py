@@ -13,7 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import asyncio
+import collections
+from concurrent import futures
 import subprocess
+import threading
 import time
 import txaio
 
@@ -22,6 +25,7 @@ from iotronic.common.i18n import _
 from iotronic.common.i18n import _LI
 from iotronic.common.i18n import _LW
 from iotronic.db import api as dbapi
+from iotronic.wamp import wampmessage as wm
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging
@@ -36,6 +40,7 @@ import os
 import signal
 
 from autobahn.asyncio.component import Component
+from autobahn.wamp import serializer as wamp_serializer
 
 LOG = logging.getLogger(__name__)
 
@@ -72,7 +77,30 @@ wamp_opts = [
     cfg.IntOpt('autoPingTimeout',
                default=2,
                help=('autoPingInterval parameter for wamp')),
-
+    cfg.ListOpt('serializers',
+                default=['msgpack', 'cbor', 'json'],
+                help=('WAMP serializers offered to the router, in order of '
+                      'preference. The ones not installed are skipped.')),
+    cfg.IntOpt('rpc_workers',
+               help=('Number of threads serving the RPC calls of the '
+                     'conductors. If not set, the executor_thread_pool_size '
+                     'of oslo.messaging is used.')),
+    cfg.IntOpt('max_inflight_calls',
+               default=48,
+               help=('Maximum number of calls to the boards waiting for a '
+                     'reply. Further calls are rejected at once; keep it '
+                     'below the number of RPC threads, so that the other '
+                     'RPC calls are served anyway.')),
+    cfg.IntOpt('max_board_calls',
+               default=4,
+               help=('Maximum number of calls waiting for a reply from the '
+                     'same board.')),
+    cfg.IntOpt('call_timeout',
+               default=50,
+               help=('Seconds a call to a board waits for its reply before '
+                     'being cancelled. Keep it a few seconds below the RPC '
+                     'timeout of the conductors, rpc_response_timeout, '
+                     '60 seconds by default.')),
 ]
 
 proxy_opts = [
@@ -100,15 +128,158 @@ async def wamp_request(kwarg):
     return d
 
 
+def _timeout_error():
+    return wm.WampError('no reply from the board in %s seconds'
+                        % CONF.wamp.call_timeout).serialize()
+
+
+async def wamp_batch_request(calls):
+    async def call(kwarg):
+        try:
+            return await asyncio.wait_for(wamp_request(kwarg),
+                                          CONF.wamp.call_timeout)
+        except asyncio.TimeoutError:
+            LOG.warning('%s cancelled after %s seconds',
+                        kwarg['wamp_rpc_call'], CONF.wamp.call_timeout)
+            return _timeout_error()
+        except Exception as e:
+            return wm.WampError(str(e)).serialize()
+
+    return await asyncio.gather(*[call(kwarg) for kwarg in calls])
+
+
+class InflightCalls(object):
+    """The calls to the boards waiting for a reply.
+
+    The calls are bounded in total and per board, so that a few slow
+    boards can neither take every RPC thread of the agent nor starve the
+    other boards.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = set()
+        self._boards = collections.Counter()
+        self._total = 0
+
+    def admit(self, board, wamp_rpc_call):
+        """Count a call against the limits.
+
+        :raises: WampCallRejected if the agent or the board is saturated.
+        """
+        with self._lock:
+            if self._total >= CONF.wamp.max_inflight_calls:
+                raise exception.WampCallRejected(
+                    call=wamp_rpc_call, reason='too many calls in progress')
+            if self._boards[board] >= CONF.wamp.max_board_calls:
+                raise exception.WampCallRejected(
+                    call=wamp_rpc_call,
+                    reason='too many calls in progress on the board')
+            self._boards[board] += 1
+            self._total += 1
+
+    def run(self, coro):
+        """Schedule the admitted calls on the WAMP loop.
+
+        :returns: the concurrent future of the coroutine.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, LOOP)
+        with self._lock:
+            self._calls.add(future)
+        return future
+
+    def done(self, boards, future=None):
+        with self._lock:
+            self._calls.discard(future)
+            for board in boards:
+                self._total -= 1
+                self._boards[board] -= 1
+                if self._boards[board] <= 0:
+                    del self._boards[board]
+
+    def cancel_all(self):
+        with self._lock:
+            for future in self._calls:
+                future.cancel()
+
+
+inflight_calls = InflightCalls()
+
+
+def _board_of(wamp_rpc_call):
+    # iotronic.<session>.<board_uuid>.<procedure>
+    parts = wamp_rpc_call.split('.')
+    return parts[2] if len(parts) > 3 else None
+
+
 # OSLO ENDPOINT
 class WampEndpoint(object):
 
     def s4t_invoke_wamp(self, ctx, **kwarg):
-        LOG.debug("CONDUCTOR sent me: " + kwarg['wamp_rpc_call'])
+        wamp_rpc_call = kwarg['wamp_rpc_call']
+        LOG.debug("CONDUCTOR sent me: " + wamp_rpc_call)
 
-        r = asyncio.run_coroutine_threadsafe(wamp_request(kwarg), LOOP)
+        board = _board_of(wamp_rpc_call)
+        try:
+            inflight_calls.admit(board, wamp_rpc_call)
+        except exception.WampCallRejected as e:
+            LOG.warning(str(e))
+            return wm.WampRejected(str(e)).serialize()
 
-        return r.result()
+        r = None
+        try:
+            r = inflight_calls.run(wamp_request(kwarg))
+            return r.result(timeout=CONF.wamp.call_timeout)
+        except futures.TimeoutError:
+            # cancelling the task cancels the call on the router too
+            r.cancel()
+            LOG.warning('%s cancelled after %s seconds', wamp_rpc_call,
+                        CONF.wamp.call_timeout)
+            return _timeout_error()
+        finally:
+            inflight_calls.done([board], r)
+
+    def s4t_invoke_wamp_batch(self, ctx, calls):
+        """Invoke many procedures of the boards concurrently.
+
+        :param calls: a list of dicts with the wamp_rpc_call and the data
+            of every call, as for s4t_invoke_wamp.
+        :returns: the serialized reply of every call, in order; the calls
+            failed or timed out get a serialized WampError, the ones
+            rejected a WampRejected.
+        """
+        LOG.debug("CONDUCTOR sent me a batch of %d calls", len(calls))
+
+        results = [None] * len(calls)
+        admitted = []
+        for i, kwarg in enumerate(calls):
+            board = _board_of(kwarg['wamp_rpc_call'])
+            try:
+                inflight_calls.admit(board, kwarg['wamp_rpc_call'])
+                admitted.append(i)
+            except exception.WampCallRejected as e:
+                LOG.warning(str(e))
+                results[i] = wm.WampRejected(str(e)).serialize()
+        if not admitted:
+            return results
+
+        boards = [_board_of(calls[i]['wamp_rpc_call']) for i in admitted]
+        r = None
+        try:
+            r = inflight_calls.run(
+                wamp_batch_request([calls[i] for i in admitted]))
+            # every call times out on its own on the loop, this only
+            # bounds the wait of the RPC thread if the loop is stuck
+            replies = r.result(timeout=CONF.wamp.call_timeout + 1)
+        except futures.TimeoutError:
+            r.cancel()
+            replies = [_timeout_error()] * len(admitted)
+        finally:
+            inflight_calls.done(boards, r)
+
+        for i, reply in zip(admitted, replies):
+            results[i] = reply
+        return results
 
 
 class AgentEndpoint(object):
@@ -152,6 +323,10 @@ class RPCServer(Thread):
             transport, target,
             endpoints, executor='threading',
             access_policy=access_policy)
+        # the executor reads its size when the server starts
+        if CONF.wamp.rpc_workers:
+            CONF.set_override('executor_thread_pool_size',
+                              CONF.wamp.rpc_workers)
 
     def run(self):
         LOG.info("Starting AMQP server... ")
@@ -159,10 +334,23 @@ class RPCServer(Thread):
 
     def stop(self):
         LOG.info("Stopping AMQP server... ")
+        inflight_calls.cancel_all()
         self.server.stop()
         LOG.info("AMQP server stopped. ")
 
 
+def _serializers():
+    # autobahn registers only the serializers whose library is installed
+    available = getattr(wamp_serializer, 'SERID_TO_SER', {})
+    serializers = []
+    for name in CONF.wamp.serializers:
+        if name in available:
+            serializers.append(name)
+        else:
+            LOG.warning('WAMP serializer %s is not available', name)
+    return serializers or ['json']
+
+
 class WampManager(object):
     def __init__(self):
 
@@ -181,22 +369,25 @@ class WampManager(object):
         whost = wurl_list[1].replace('/', '')
         wport = int(wurl_list[2].replace('/', ''))
 
+        serializers = _serializers()
+        LOG.debug("wamp serializers: %s", serializers)
+        wamp_transport = [
+            {
+                "url": CONF.wamp.wamp_transport_url,
+                "serializers": serializers,
+            },
+        ]
+
         if is_wss and CONF.wamp.skip_cert_verify:
             ctx = ssl.create_default_context()
             ctx.check_hostname = False
             ctx.verify_mode = ssl.CERT_NONE
-            wamp_transport = [
-                {
-                    "url": CONF.wamp.wamp_transport_url,
-                    "serializers": ["json"],
-                    "endpoint": {
-                        "type": "tcp",
-                        "host": whost,
-                        "port": wport,
-                        "tls": ctx
-                    },
-                },
-            ]
+            wamp_transport[0]["endpoint"] = {
+                "type": "tcp",
+                "host": whost,
+                "port": wport,
+                "tls": ctx
+            }
 
         comp = Component(
             transports=wamp_transport,
@@ -13,12 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import asyncio
 from datetime import datetime
 from iotronic.common import rpc
-from iotronic.common import states
 from iotronic.conductor import rpcapi
 from iotronic import objects
-from iotronic.wamp import wampmessage as wm
+from iotronic.wamp import admission
+from iotronic.wamp import presence as wamp_presence
 from oslo_config import cfg
 from oslo_log import log
 
@@ -41,6 +42,19 @@ class cont(object):
 ctxt = cont()
 
 
+def invalidate_routes(board_uuids):
+    # the conductors cache the session of the online boards
+    if not board_uuids:
+        return
+    try:
+        c.invalidate_board_routes(ctxt, board_uuids)
+    except Exception as e:
+        LOG.warning('Routes of the boards not invalidated: %s', e)
+
+
+presence = wamp_presence.PresenceQueue(ctxt, on_flush=invalidate_routes)
+
+
 def echo(data):
     LOG.info("ECHO: %s" % data)
     return data
@@ -60,9 +74,16 @@ def alive():
 
 
 def update_sessions(session_list, agent):
+    """Reconcile the valid sessions of an agent with the wamp ones.
+
+    :param session_list: the ids of the sessions on the wamp router.
+    :param agent: the hostname of the agent.
+    """
     session_list = set(session_list)
     list_from_db = objects.SessionWP.valid_list(ctxt, agent)
-    list_db = set([int(elem.session_id) for elem in list_from_db])
+    db_boards = dict((int(elem.session_id), elem.board_uuid)
+                     for elem in list_from_db)
+    list_db = set(db_boards)
     LOG.debug('Wamp session list: %s', session_list)
     LOG.debug('DB session list: %s', list_db)
 
@@ -75,102 +96,57 @@ def update_sessions(session_list, agent):
 
     LOG.debug('no more valid session list: %s', old_connected)
 
-    for elem in old_connected:
-        old_session = objects.SessionWP.get(ctxt, elem)
-        if old_session.valid:
-            old_session.valid = False
-            old_session.save()
-            board = objects.Board.get_by_uuid(ctxt, old_session.board_uuid)
-            board.status = states.OFFLINE
-            board.save()
-            LOG.debug('Session updated. Board %s is now  %s', board.uuid,
-                      states.OFFLINE)
-
     if old_connected:
-        LOG.warning('Some boards have been updated: status offline')
+        offline = objects.SessionWP.invalidate(ctxt, list(old_connected))
+        invalidate_routes(offline)
+        LOG.warning('%d boards have been updated: status offline',
+                    len(offline))
 
     # list of board still connected
     keep_connected = list_db.intersection(session_list)
     LOG.debug('still valid session list: %s', keep_connected)
 
-    for elem in keep_connected:
-        for x in list_from_db:
-            if x.session_id == str(elem):
-                LOG.debug('%s need to be restored.', x.board_uuid)
-                break
     if keep_connected:
+        LOG.debug('%s need to be restored.',
+                  [db_boards[elem] for elem in keep_connected])
         LOG.warning('Some boards need to be restored.')
 
 
 def board_on_leave(session_id):
     LOG.debug('A board with %s disconnectd', session_id)
-    try:
-        old_session = objects.SessionWP.get(ctxt, session_id)
-
-        if old_session.valid:
-            old_session.valid = False
-            old_session.save()
-            board = objects.Board.get_by_uuid(ctxt, old_session.board_uuid)
-            board.status = states.OFFLINE
-            board.save()
-            LOG.debug('Session updated. Board %s is now  %s', board.uuid,
-                      states.OFFLINE)
-            return
+    presence.left(session_id)
 
-        LOG.debug('Session %s already set to not valid', session_id)
-    except Exception:
-        LOG.debug('session %s not found', session_id)
 
-
-def connection(uuid, session, info=None):
+async def connection(uuid, session, info=None):
     LOG.debug('Received registration from %s with session %s',
               uuid, session)
-    try:
-        board = objects.Board.get_by_uuid(ctxt, uuid)
-    except Exception as exc:
-        msg = exc.message % {'board': uuid}
-        LOG.error(msg)
-        return wm.WampError(msg).serialize()
-    try:
-        old_ses = objects.SessionWP(ctxt)
-        old_ses = old_ses.get_session_by_board_uuid(ctxt, board.uuid,
-                                                    valid=True)
-        old_ses.valid = False
-        old_ses.save()
-        LOG.debug('old session for %s found: %s', board.uuid,
-                  old_ses.session_id)
-
-    except Exception:
-        LOG.debug('valid session for %s not found', board.uuid)
-
-    session_data = {'board_id': board.id,
-                    'board_uuid': board.uuid,
-                    'session_id': session}
-    session = objects.SessionWP(ctxt, **session_data)
-    session.create()
-    LOG.debug('new session for %s saved %s', board.uuid,
-              session.session_id)
-    board.status = states.ONLINE
+    retry_after = await admission.bucket.admit()
+    if retry_after is not None:
+        return admission.retry_later(retry_after)
 
+    values = {}
     if info:
         LOG.debug('board infos %s', info)
         if 'lr_version' in info:
-            if board.lr_version != info['lr_version']:
-                board.lr_version = info['lr_version']
+            values['lr_version'] = info['lr_version']
         if 'connectivity' in info:
-            board.connectivity = info['connectivity']
+            values['connectivity'] = info['connectivity']
         if 'mac_addr' in info:
-            board.connectivity = {"mac_addr": info['mac_addr']}
+            values['connectivity'] = {"mac_addr": info['mac_addr']}
 
-    board.save()
-    LOG.info('Board %s (%s) is now  %s', board.uuid,
-             board.name, states.ONLINE)
+    # the reply is sent once the session is written by the presence queue
+    return await presence.connected(uuid, session, values)
 
-    return wm.WampSuccess('').serialize()
 
+async def registration(code, session):
+    retry_after = await admission.bucket.admit()
+    if retry_after is not None:
+        return admission.retry_later(retry_after)
 
-def registration(code, session):
-    return c.registration(ctxt, code, session)
+    # the conductor is called off the WAMP loop
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, c.registration, ctxt, code,
+                                      session)
 
 
 def board_on_join(session_id):
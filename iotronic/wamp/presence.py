@@ -0,0 +1,232 @@
+# coding=utf-8
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Write-behind queue of the connections and leaves of the boards.
+"""
+
+import asyncio
+import collections
+import threading
+import time
+
+from iotronic.common import exception
+from iotronic.common import metrics
+from iotronic import objects
+from iotronic.wamp import wampmessage as wm
+from oslo_config import cfg
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+presence_opts = [
+    cfg.FloatOpt('presence_flush_interval',
+                 default=0.5,
+                 help=('Seconds the connections and leaves of the boards '
+                       'are collected before being written to the database '
+                       'in a single transaction.')),
+    cfg.IntOpt('presence_batch_size',
+               default=1000,
+               help=('Maximum number of connections, and of leaves, '
+                     'written in a single transaction.')),
+    cfg.IntOpt('presence_tombstone_ttl',
+               default=300,
+               help=('Seconds the sessions which left are remembered, so '
+                     'that a connection of theirs arriving late is not '
+                     'written.')),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(presence_opts, 'wamp')
+
+
+def _reply(loop, future, message):
+    def set_result():
+        if not future.done():
+            future.set_result(message)
+    loop.call_soon_threadsafe(set_result)
+
+
+def _left(board_uuid, session_id):
+    LOG.debug('Session %s of board %s left before being written',
+              session_id, board_uuid)
+    return wm.WampError('Session %s already left' % session_id).serialize()
+
+
+class PresenceQueue(object):
+    """Collects the session events of the boards off the WAMP loop.
+
+    The events are coalesced: the last connection of a board replaces the
+    previous ones, which get its reply. A worker thread writes them in
+    batches, so that a reconnection storm neither blocks the WAMP loop on
+    the database nor runs a transaction per event.
+
+    A session which left is kept as a tombstone for presence_tombstone_ttl
+    seconds: its connection, still queued or held back by the admission
+    control, is dropped instead of being written after the leave, which
+    would set the board online with a dead session.
+
+    The queue depth is exposed as the presence.queue_depth gauge, the time
+    an event waits to be written as presence.latency and the duration of
+    the transactions as presence.flush.
+    """
+
+    def __init__(self, ctxt, on_flush=None):
+        self._ctxt = ctxt
+        self._on_flush = on_flush
+        self._cond = threading.Condition()
+        self._connections = {}
+        self._leaves = {}
+        # the boards of the queued connections, by session id
+        self._sessions = {}
+        self._tombstones = collections.OrderedDict()
+        self._thread = None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='presence')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _depth(self):
+        metrics.gauge('presence.queue_depth',
+                      len(self._connections) + len(self._leaves))
+
+    def connected(self, board_uuid, session_id, values):
+        """Queue the connection of a board.
+
+        To be called on the WAMP loop.
+
+        :param board_uuid: the uuid of the board.
+        :param session_id: the id of its new wamp session.
+        :param values: the values of the board to update.
+        :returns: a future resolved with the serialized reply for the board
+                  once the connection is written.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        with self._cond:
+            if str(session_id) in self._tombstones:
+                _reply(loop, future, _left(board_uuid, session_id))
+                return future
+            previous = self._connections.pop(board_uuid, None)
+            waiters = [(loop, future)]
+            queued = time.time()
+            if previous is not None:
+                self._sessions.pop(str(previous['session_id']), None)
+                waiters = previous['waiters'] + waiters
+                queued = previous['queued']
+            self._connections[board_uuid] = {'session_id': session_id,
+                                             'values': values,
+                                             'waiters': waiters,
+                                             'queued': queued}
+            self._sessions[str(session_id)] = board_uuid
+            self._depth()
+            self._start()
+            self._cond.notify()
+        return future
+
+    def left(self, session_id):
+        """Queue the leave of a wamp session."""
+        session_id = str(session_id)
+        with self._cond:
+            now = time.time()
+            self._leaves.setdefault(session_id, now)
+            self._tombstones[session_id] = now
+            self._tombstones.move_to_end(session_id)
+            # a connection not written yet is dropped with its session
+            board_uuid = self._sessions.pop(session_id, None)
+            if board_uuid is not None:
+                c = self._connections.pop(board_uuid)
+                message = _left(board_uuid, session_id)
+                for loop, future in c['waiters']:
+                    _reply(loop, future, message)
+            self._depth()
+            self._start()
+            self._cond.notify()
+
+    def _take(self):
+        size = max(CONF.wamp.presence_batch_size, 1)
+        with self._cond:
+            expired = time.time() - CONF.wamp.presence_tombstone_ttl
+            while (self._tombstones and
+                   next(iter(self._tombstones.values())) < expired):
+                self._tombstones.popitem(last=False)
+            connections = {}
+            for board_uuid in list(self._connections)[:size]:
+                c = self._connections.pop(board_uuid)
+                self._sessions.pop(str(c['session_id']), None)
+                connections[board_uuid] = c
+            leaves = {}
+            for session_id in list(self._leaves)[:size]:
+                leaves[session_id] = self._leaves.pop(session_id)
+            self._depth()
+        return connections, leaves
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._connections and not self._leaves:
+                    self._cond.wait()
+            # let the events of a burst pile up and coalesce
+            time.sleep(CONF.wamp.presence_flush_interval)
+            connections, leaves = self._take()
+            try:
+                self._flush(connections, leaves)
+            except Exception as e:
+                LOG.exception('Error writing the presence of the boards: %s',
+                              e)
+
+    def _flush(self, connections, leaves):
+        queued = ([c['queued'] for c in connections.values()] +
+                  list(leaves.values()))
+        start = time.time()
+        try:
+            result = objects.SessionWP.update_presence(
+                self._ctxt,
+                dict((uuid, {'session_id': c['session_id'],
+                             'values': c['values']})
+                     for uuid, c in connections.items()),
+                list(leaves))
+        except Exception as e:
+            # the boards retry to connect, the leaves are written later
+            for c in connections.values():
+                for loop, future in c['waiters']:
+                    _reply(loop, future, wm.WampError(str(e)).serialize())
+            with self._cond:
+                for session_id, at in leaves.items():
+                    self._leaves.setdefault(session_id, at)
+                self._depth()
+            raise
+        finished = time.time()
+        metrics.record('presence.flush', finished - start)
+        if queued:
+            metrics.record('presence.latency', finished - min(queued))
+
+        missing = set(result['missing'])
+        for board_uuid, c in connections.items():
+            if board_uuid in missing:
+                msg = str(exception.BoardNotFound(board=board_uuid))
+                LOG.error(msg)
+                message = wm.WampError(msg).serialize()
+            else:
+                message = wm.WampSuccess('').serialize()
+            for loop, future in c['waiters']:
+                _reply(loop, future, message)
+
+        LOG.debug('%d boards online, %d offline',
+                  len(result['online']), len(result['offline']))
+        if self._on_flush is not None:
+            self._on_flush(result['online'] + result['offline'])
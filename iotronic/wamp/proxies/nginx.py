@@ -13,6 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import tempfile
+import threading
+import time
+
+from iotronic.common import metrics
 from iotronic.wamp.proxies.proxy import Proxy
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -23,33 +29,52 @@ LOG = logging.getLogger(__name__)
 nginx_opts = [
     cfg.StrOpt('nginx_path',
                default='/etc/nginx/conf.d/iotronic',
-               help=('Default Nginx Path'))
+               help=('Default Nginx Path')),
+    cfg.FloatOpt('reload_interval',
+                 default=1.0,
+                 help=('Seconds the reloads requested after a change of the '
+                       'configuration are collected into a single nginx '
+                       'reload. 0 reloads nginx on every request.')),
+    cfg.IntOpt('reload_timeout',
+               default=60,
+               help=('Seconds a request waits for the reload applying its '
+                     'changes.')),
 ]
 
 CONF = cfg.CONF
 CONF.register_opts(nginx_opts, 'nginx')
 
+# prefix of the lines of the redirects in the server files
+REDIRECT = 'if ($host = '
+# index of the redirects in the lines of a server file
+REDIRECT_INDEX = 4
+
+
+def map_path(board):
+    return CONF.nginx.nginx_path + "/maps/map_" + board
+
+
+def upstream_path(board):
+    return CONF.nginx.nginx_path + "/upstreams/upstream_" + board
+
+
+def server_path(board):
+    return CONF.nginx.nginx_path + "/servers/" + board
 
-def save_map(board, zone):
-    fp = CONF.nginx.nginx_path + "/maps/map_" + board
-    with open(fp, "w") as text_file:
-        text_file.write("~" + board + "." + zone + " " + board + ";")
 
+def render_map(board, zone):
+    return "~" + board + "." + zone + " " + board + ";"
 
-def save_upstream(board, https_port):
-    fp = CONF.nginx.nginx_path + "/upstreams/upstream_" + board
-    string = '''upstream {0} {{
+
+def render_upstream(board, https_port):
+    return '''upstream {0} {{
     server localhost:{1} max_fails=3 fail_timeout=10s;
     }}
     '''.format(board, https_port)
 
-    with open(fp, "w") as text_file:
-        text_file.write("%s" % string)
-
 
-def save_server(board, http_port, zone):
-    fp = CONF.nginx.nginx_path + "/servers/" + board
-    string = '''server {{
+def render_server(board, http_port, zone):
+    return '''server {{
     listen              80;
     server_name         .{0}.{2};
 
@@ -59,17 +84,6 @@ def save_server(board, http_port, zone):
     }}
     '''.format(board, http_port, zone)
 
-    with open(fp, "w") as text_file:
-        text_file.write("%s" % string)
-
-
-def remove(board):
-    call(["rm",
-          CONF.nginx.nginx_path + "/servers/" + board,
-          CONF.nginx.nginx_path + "/upstreams/upstream_" + board,
-          CONF.nginx.nginx_path + "/maps/map_" + board
-          ])
-
 
 def string_redirect(board, zone, dns=None):
     if not dns:
@@ -81,68 +95,194 @@ def string_redirect(board, zone, dns=None):
     return string
 
 
-def insert_entry(line, lines):
+def write_file(path, content):
+    """Replace a file atomically, so nginx never reads it half written."""
+    directory = os.path.dirname(path)
+    # hidden, so that it is not matched by the includes of nginx
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.')
     try:
-        lines.index(line)
+        with os.fdopen(fd, 'w') as text_file:
+            text_file.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
     except Exception:
-        lines.insert(4, line)
-    return lines
+        os.remove(tmp)
+        raise
 
 
-def remove_entry(line, lines):
+def remove_file(path):
     try:
-        lines.remove(line)
-    except Exception:
+        os.remove(path)
+    except FileNotFoundError:
         pass
-    return lines
 
 
-def save_conf(f_conf, lines):
-    f = open(f_conf, "w")
-    lines = "".join(lines)
-    f.write(lines)
-    f.close()
+class ServerConf(object):
+    """The server file of a board: its lines and redirects."""
+
+    def __init__(self, lines, redirects=None):
+        self.lines = lines
+        self.redirects = redirects or []
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            lines = f.readlines()
+        return cls([line for line in lines if not line.startswith(REDIRECT)],
+                   [line for line in lines if line.startswith(REDIRECT)])
+
+    def render(self):
+        return "".join(self.lines[:REDIRECT_INDEX] + self.redirects +
+                       self.lines[REDIRECT_INDEX:])
+
+
+class Reloader(object):
+    """Coalesces the reloads of nginx.
+
+    Every change of the configuration bumps a generation; a reload request
+    waits until a reload started after its changes has completed. The first
+    request of a time window schedules the reload, the further ones join it,
+    so that a burst of changes costs a single reload. Requests with no
+    pending change return at once.
+
+    The duration of the reloads is recorded as nginx.reload, the time from
+    the first request they serve to their completion as nginx.reload_latency
+    and the number of requests they serve as the nginx.coalesced gauge.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._changes = 0
+        self._applied = 0
+        self._timer = None
+        self._requested = None
+        self._waiting = 0
+
+    def changed(self):
+        with self._cond:
+            self._changes += 1
+
+    def request(self):
+        with self._cond:
+            generation = self._changes
+            if self._applied >= generation:
+                return
+            if self._timer is None:
+                self._requested = time.time()
+                self._timer = threading.Timer(CONF.nginx.reload_interval,
+                                              self._reload)
+                self._timer.daemon = True
+                self._timer.start()
+            self._waiting += 1
+            if not self._cond.wait_for(
+                    lambda: self._applied >= generation,
+                    CONF.nginx.reload_interval + CONF.nginx.reload_timeout):
+                LOG.warning('Timed out waiting for the reload of nginx')
+
+    def _reload(self):
+        with self._cond:
+            self._timer = None
+            generation = self._changes
+            requested = self._requested
+            waiting = self._waiting
+            self._waiting = 0
+
+        start = time.time()
+        try:
+            code = call(["nginx", "-s", "reload"])
+        except Exception as e:
+            code = None
+            LOG.error('Error reloading nginx: %s', e)
+        finished = time.time()
+
+        metrics.record('nginx.reload', finished - start)
+        metrics.record('nginx.reload_latency', finished - requested)
+        metrics.gauge('nginx.coalesced', waiting)
+        if code:
+            LOG.error('nginx reload exited with code %s', code)
+        LOG.debug('nginx reloaded for %d requests in %.3f seconds',
+                  waiting, finished - start)
+
+        with self._cond:
+            # the waiters are released even on failure, as they were
+            # before; the next change triggers a new reload
+            self._applied = max(self._applied, generation)
+            self._cond.notify_all()
 
 
 class ProxyManager(Proxy):
+    """Keeps the nginx configuration of the boards in memory.
+
+    The server files are read from disk only the first time a board is
+    touched by this process; the redirects are then added and removed in
+    memory and the files rewritten atomically, only when their content
+    changes.
+    """
 
     def __init__(self):
         super(ProxyManager, self).__init__("nginx")
+        self._lock = threading.Lock()
+        self._servers = {}
+        self._reloader = Reloader()
+
+    def _server(self, board):
+        server = self._servers.get(board)
+        if server is None:
+            server = ServerConf.load(server_path(board))
+            self._servers[board] = server
+        return server
+
+    def _save_server(self, board, server):
+        write_file(server_path(board), server.render())
+        self._reloader.changed()
 
     def reload_proxy(self, ctx):
-        call(["nginx", "-s", "reload"])
+        if CONF.nginx.reload_interval <= 0:
+            with metrics.timed('nginx.reload'):
+                call(["nginx", "-s", "reload"])
+            return
+        self._reloader.request()
 
     def enable_webservice(self, ctx, board, https_port, http_port, zone):
         LOG.debug(
             'Enabling WebService with ports  %s for http and %s for https '
             'on board %s', http_port, https_port, board)
-        save_map(board, zone)
-        save_upstream(board, https_port)
-        save_server(board, http_port, zone)
+        server = ServerConf(
+            render_server(board, http_port, zone).splitlines(True))
+        with self._lock:
+            write_file(map_path(board), render_map(board, zone))
+            write_file(upstream_path(board),
+                       render_upstream(board, https_port))
+            self._save_server(board, server)
+            self._servers[board] = server
 
     def disable_webservice(self, ctx, board):
         LOG.debug('Disabling WebService on board %s',
                   board)
-        remove(board)
+        with self._lock:
+            self._servers.pop(board, None)
+            remove_file(server_path(board))
+            remove_file(upstream_path(board))
+            remove_file(map_path(board))
+            self._reloader.changed()
 
     def add_redirect(self, ctx, board_dns, zone, dns=None):
         line = string_redirect(board_dns, zone, dns)
-        path = CONF.nginx.nginx_path + "/servers/" + board_dns
-        LOG.debug('Adding redirect %s on %s', line, path)
+        LOG.debug('Adding redirect %s on %s', line, server_path(board_dns))
 
-        f = open(str(CONF.nginx.nginx_path + "/servers/" + board_dns), "r")
-        lines = f.readlines()
-        f.close()
-        lines = insert_entry(line, lines)
-        save_conf(path, lines)
+        with self._lock:
+            server = self._server(board_dns)
+            if line not in server.redirects:
+                server.redirects.insert(0, line)
+                self._save_server(board_dns, server)
 
     def remove_redirect(self, ctx, board_dns, zone, dns=None):
-        path = CONF.nginx.nginx_path + "/servers/" + board_dns
         line = string_redirect(board_dns, zone, dns)
-        LOG.debug('Removing redirect  %s on %s', line, path)
-
-        f = open(path, "r")
-        lines = f.readlines()
-        f.close()
-        lines = remove_entry(line, lines)
-        save_conf(path, lines)
+        LOG.debug('Removing redirect  %s on %s', line,
+                  server_path(board_dns))
+
+        with self._lock:
+            server = self._server(board_dns)
+            if line in server.redirects:
+                server.redirects.remove(line)
+                self._save_server(board_dns, server)
@@ -16,13 +16,32 @@
 
 import json
 
+from oslo_config import cfg
+
+wampmessage_opts = [
+    cfg.BoolOpt('native_payloads',
+                default=False,
+                help=('Carry the wamp messages as native structures, '
+                      'encoded once by the WAMP serializer, instead of '
+                      'JSON strings. Requires boards able to read them.')),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(wampmessage_opts, 'wamp')
+
 SUCCESS = 'SUCCESS'
 ERROR = 'ERROR'
 WARNING = 'WARNING'
+# the agent was too busy to make the call, which can be retried
+REJECTED = 'REJECTED'
 
 
 def deserialize(received):
-    m = json.loads(received)
+    # native messages are already decoded by the WAMP serializer
+    if isinstance(received, dict):
+        m = received
+    else:
+        m = json.loads(received)
     return WampMessage(**m)
 
 
@@ -31,7 +50,12 @@ class WampMessage(object):
         self.message = message
         self.result = result
 
+    def to_dict(self):
+        return {'message': self.message, 'result': self.result}
+
     def serialize(self):
+        if CONF.wamp.native_payloads:
+            return self.to_dict()
         return json.dumps(self, default=lambda o: o.__dict__)
 
 
@@ -48,3 +72,8 @@ class WampError(WampMessage):
 class WampWarning(WampMessage):
     def __init__(self, msg=None):
         super(WampWarning, self).__init__(msg, WARNING)
+
+
+class WampRejected(WampMessage):
+    def __init__(self, msg=None):
+        super(WampRejected, self).__init__(msg, REJECTED)